@@ -1,10 +1,19 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
+import json
 import logging
 import os
-from modules.lightroom_controller import LightroomController
-from modules.chat_commands import ChatCommandProcessor
-from modules.ocr_processor import OCRProcessor
+import shlex
+import threading
+import time
+from modules.job_queue import JobQueue
+from modules.metrics import metrics
+from modules.health import HealthMonitor
+from modules.upload_store import UploadStore, UploadError
+
+# Create necessary directories
+os.makedirs('logs', exist_ok=True)
+os.makedirs('data', exist_ok=True)
 
 # Configure logging
 logging.basicConfig(
@@ -17,37 +26,203 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Create necessary directories
-os.makedirs('logs', exist_ok=True)
-os.makedirs('data', exist_ok=True)
-
 app = Flask(__name__)
 CORS(app)
 
-# Initialize controllers
-lightroom_controller = LightroomController()
-chat_processor = ChatCommandProcessor(lightroom_controller)
-ocr_processor = OCRProcessor()
+job_queue = JobQueue()
+upload_store = UploadStore()
+
+# Run a pool of controllers, one per virtual display, instead of driving the
+# local screen: e.g. LIGHTROOM_POOL=xvfb:4 (or fake:2 to try it without Lightroom)
+POOL_SPEC = os.environ.get('LIGHTROOM_POOL')
+# Command started on each Xvfb display, e.g. LIGHTROOM_APP="wine /opt/lightroom/Lightroom.exe"
+POOL_APP = os.environ.get('LIGHTROOM_APP')
+
+# The controller pulls in cv2, the Tesseract bindings and pyautogui, so it is
+# built on first use (normally by the first health probe) instead of at import
+_services = None
+_services_lock = threading.Lock()
+
+def services():
+    global _services
+    if _services is None:
+        with _services_lock:
+            if _services is None:
+                if POOL_SPEC:
+                    from modules.controller_pool import ControllerPool
+                    from modules.virtual_display import create_displays
+                    app_command = shlex.split(POOL_APP) if POOL_APP else None
+                    pool = ControllerPool(create_displays(POOL_SPEC, app_command=app_command)).start()
+                    # The first worker stands in wherever a single controller is expected
+                    _services = {
+                        'pool': pool,
+                        'controller': pool.workers[0].controller,
+                        'chat_processor': pool.workers[0].chat_processor
+                    }
+                else:
+                    from modules.lightroom_controller import LightroomController
+                    from modules.chat_commands import ChatCommandProcessor
+                    controller = LightroomController()
+                    _services = {
+                        'pool': None,
+                        'controller': controller,
+                        'chat_processor': ChatCommandProcessor(controller)
+                    }
+    return _services
+
+def get_controller():
+    return services()['controller']
+
+def get_chat_processor():
+    return services()['chat_processor']
+
+def get_pool():
+    return services()['pool'] if POOL_SPEC else None
+
+def controllers():
+    pool = get_pool()
+    return [worker.controller for worker in pool.workers] if pool else [get_controller()]
+
+def jobs():
+    """
+    Where jobs run: the pool's workers, or the single GUI executor
+    """
+    return get_pool() or job_queue
+
+def submit_job(kind, data, func, coalesce_key=None):
+    """
+    Queue func(job, chat_processor); in pool mode jobs with the same session share a worker
+    """
+    pool = get_pool()
+    if pool:
+        return pool.submit(kind, data, func, coalesce_key=coalesce_key, session=data.get('session'))
+    return job_queue.submit(kind, data, lambda job: func(job, get_chat_processor()), coalesce_key=coalesce_key)
+
+def wait_for_job(queue, job):
+    """
+    Block until a job has run and return its result
+    """
+    while not job.done:
+        queue.wait_for_update(job, job.version)
+    if job.error is not None:
+        raise RuntimeError(job.error)
+    return job.result
+
+def run_job(kind, data, func, coalesce_key=None):
+    """
+    Run a job on a GUI executor and wait for its result, so requests never
+    drive the mouse and keyboard while a queued job does
+    """
+    return wait_for_job(jobs(), submit_job(kind, data, func, coalesce_key))
+
+def update_config(data):
+    """
+    Apply configuration between jobs on every GUI executor
+    """
+    pool = get_pool()
+    if pool:
+        # Each worker's backends belong to its display
+        data = {key: value for key, value in data.items() if key not in ('capture_backend', 'input_backend')}
+        targets = [(worker.queue, worker.controller) for worker in pool.workers]
+    else:
+        targets = [(job_queue, get_controller())]
+    submitted = [(queue, queue.submit('config', data, lambda job, controller=controller: controller.update_config(job.payload)))
+                 for queue, controller in targets]
+    return all([wait_for_job(queue, job) for queue, job in submitted])
+
+def _on_ingested(dataset):
+    # Running controllers pick up the new crops; otherwise they load them when built
+    if _services is not None:
+        for controller in controllers():
+            controller.load_dataset(dataset)
+
+# Turns stored uploads into the training dataset in worker processes, off the GUI
+# executor; built on first use like the controller, since it also imports cv2
+_ingestion = None
+
+def get_ingestion():
+    global _ingestion
+    if _ingestion is None:
+        with _services_lock:
+            if _ingestion is None:
+                from modules.training_dataset import IngestionPipeline
+                _ingestion = IngestionPipeline(upload_store, on_complete=_on_ingested)
+    return _ingestion
+
+# Probe Tesseract and Lightroom in the background; /api/config reads the cached results
+health = HealthMonitor(ttl=30.0)
+health.register('ocr', lambda: get_controller().ocr.check_status())
+health.register('lightroom', lambda: all(controller.check_connection() for controller in controllers()))
+health.start()
 
 @app.route('/api/config', methods=['GET', 'POST'])
 def handle_config():
     try:
         if request.method == 'GET':
+            # Served from memory: never runs a probe or builds the controller
             config = {
                 'status': 'running',
-                'lightroom_connected': lightroom_controller.check_connection(),
-                'ocr_status': ocr_processor.check_status()
+                'lightroom_connected': health.ok('lightroom'),
+                'ocr_status': health.ok('ocr'),
+                'health': health.status(),
+                'metrics': metrics.snapshot()
             }
+            if _services is not None:
+                config['element_cache'] = _services['controller'].element_cache_stats()
+                config['action_latency'] = _services['controller'].action_latency_stats()
+                config['ocr_config'] = dict(_services['controller'].ocr.config)
+                if _services['pool'] is not None:
+                    config['pool'] = _services['pool'].status()
             return jsonify(config)
         else:
-            data = request.json
             # Update configuration
-            success = lightroom_controller.update_config(data)
+            success = update_config(request.json)
+            health.refresh()
             return jsonify({'success': success})
     except Exception as e:
         logger.error(f"Error in config endpoint: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+# Active TraceRecorder while a session is being recorded for offline replay
+_recorder = None
+_recorder_lock = threading.Lock()
+
+@app.route('/api/trace', methods=['GET', 'POST'])
+def handle_trace():
+    global _recorder
+    try:
+        if request.method == 'POST':
+            data = request.json or {}
+            if data.get('enabled') and get_pool():
+                # A trace replays one display's session; pool workers each drive their own
+                return jsonify({'error': 'Tracing is not supported with a controller pool'}), 400
+            with _recorder_lock:
+                # Swapping the backends happens between jobs on the GUI executor,
+                # never under a command that is using them
+                if data.get('enabled') and _recorder is None:
+                    from modules.trace import TraceRecorder
+                    path = os.path.join('data', 'traces', time.strftime('%Y%m%d-%H%M%S') + '.lrtrace')
+                    recorder = TraceRecorder(path)
+                    controller, chat_processor = get_controller(), get_chat_processor()
+                    wait_for_job(job_queue, job_queue.submit(
+                        'trace', data, lambda job: recorder.attach(controller, chat_processor)))
+                    _recorder = recorder
+                elif not data.get('enabled') and _recorder is not None:
+                    recorder, _recorder = _recorder, None
+                    wait_for_job(job_queue, job_queue.submit('trace', data, lambda job: recorder.detach()))
+                    return jsonify(dict(recorder.status(), recording=False))
+        if _recorder is None:
+            return jsonify({'recording': False})
+        return jsonify(dict(_recorder.status(), recording=True))
+    except Exception as e:
+        logger.error(f"Error in trace endpoint: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/metrics', methods=['GET'])
+def handle_metrics():
+    # Prometheus text exposition format for scraping
+    return Response(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/command', methods=['POST'])
 def handle_command():
     try:
@@ -56,13 +231,117 @@ def handle_command():
         if not command:
             return jsonify({'error': 'No command provided'}), 400
 
-        # Process command through chat processor
-        result = chat_processor.process_command(command)
+        # Process command through chat processor on the GUI executor
+        result = run_job('command', data, _run_command_job)
         return jsonify(result)
     except Exception as e:
         logger.error(f"Error processing command: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/command/batch', methods=['POST'])
+def handle_command_batch():
+    try:
+        data = request.json
+        commands = data.get('commands')
+        if not commands or not isinstance(commands, list):
+            return jsonify({'error': 'No commands provided'}), 400
+
+        # Plan and run the whole list against as few screen captures as possible
+        result = run_job('batch', data, _run_batch_job)
+        return jsonify(result)
+    except Exception as e:
+        logger.error(f"Error processing command batch: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+def _run_command_job(job, chat_processor):
+    jobs().report(job, 0.0, f"Running '{job.payload['command']}'")
+    return chat_processor.process_command(job.payload['command'])
+
+def _run_batch_job(job, chat_processor):
+    def on_progress(done, total, result):
+        jobs().report(job, done / total, f"Completed {done} of {total} commands")
+    return chat_processor.process_batch(
+        job.payload['commands'],
+        stop_on_error=job.payload.get('stop_on_error', True),
+        progress_callback=on_progress
+    )
+
+@app.route('/api/jobs', methods=['GET', 'POST'])
+def handle_jobs():
+    try:
+        if request.method == 'GET':
+            return jsonify({'jobs': jobs().list()})
+
+        data = request.json or {}
+        if data.get('commands'):
+            if not isinstance(data['commands'], list):
+                return jsonify({'error': 'commands must be a list'}), 400
+            job = submit_job('batch', data, _run_batch_job)
+        elif data.get('command'):
+            job = submit_job('command', data, _run_command_job,
+                             coalesce_key=get_chat_processor().coalesce_key(data['command']))
+        else:
+            return jsonify({'error': 'No command provided'}), 400
+
+        # Return immediately; the GUI executor runs jobs in submission order
+        return jsonify({
+            'job_id': job.id,
+            'status': job.status,
+            'queue_position': jobs().queue_position(job),
+            'worker': job.payload.get('worker')
+        }), 202
+    except Exception as e:
+        logger.error(f"Error submitting job: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def handle_job_status(job_id):
+    job = jobs().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    status = job.to_dict()
+    status['queue_position'] = jobs().queue_position(job)
+    return jsonify(status)
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def handle_job_events(job_id):
+    job = jobs().get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    def stream():
+        version = None
+        while True:
+            if job.version != version:
+                version = job.version
+                yield f"data: {json.dumps(job.to_dict())}\n\n"
+                if job.done:
+                    return
+            elif jobs().wait_for_update(job, version) == version:
+                # Keep idle connections alive through proxies
+                yield ": keep-alive\n\n"
+
+    return Response(stream(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/api/state', methods=['GET'])
+def handle_state():
+    # Served from the shadow edit model; never touches the screen
+    chat_processor = get_chat_processor()
+    pool = get_pool()
+    if pool and request.args.get('session'):
+        worker = pool.worker_for(request.args['session'])
+        if worker is None:
+            return jsonify({'error': 'Unknown session'}), 404
+        chat_processor = worker.chat_processor
+    return jsonify(chat_processor.edit_state.to_dict())
+
+@app.route('/api/pool', methods=['GET'])
+def handle_pool():
+    pool = get_pool()
+    if pool is None:
+        return jsonify({'enabled': False})
+    return jsonify(dict(pool.status(), enabled=True))
+
 @app.route('/api/training/upload', methods=['POST'])
 def handle_training_upload():
     try:
@@ -73,18 +352,67 @@ def handle_training_upload():
         if file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
 
-        # Save file to data directory
-        filename = os.path.join('data', file.filename)
-        file.save(filename)
-        
+        # Stream into the content-addressed store; identical files are kept once
+        result = upload_store.put_stream(file.filename, file.stream)
+        get_ingestion().start()
+
         return jsonify({
             'success': True,
-            'message': 'File uploaded successfully',
-            'filename': file.filename
+            'message': 'File already uploaded' if result['duplicate'] else 'File uploaded successfully',
+            'filename': file.filename,
+            'digest': result['digest'],
+            'duplicate': result['duplicate']
         })
     except Exception as e:
         logger.error(f"Error handling file upload: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+def _upload_error(e):
+    return jsonify(dict(e.details, error=str(e))), e.status
+
+@app.route('/api/training/uploads', methods=['POST'])
+def handle_upload_create():
+    # Start a resumable upload, or pick up the unfinished one with the same key
+    try:
+        data = request.json or {}
+        return jsonify(upload_store.create(data.get('filename'), data.get('size'),
+                                           key=data.get('key'), sha256=data.get('sha256')))
+    except UploadError as e:
+        return _upload_error(e)
+    except Exception as e:
+        logger.error(f"Error creating upload: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/training/uploads/<upload_id>', methods=['GET', 'PUT'])
+def handle_upload_chunk(upload_id):
+    try:
+        if request.method == 'GET':
+            return jsonify(upload_store.status(upload_id))
+        # The raw request body is streamed to disk; it is never read into memory whole
+        offset = request.args.get('offset', type=int)
+        if offset is None:
+            return jsonify({'error': 'offset is required'}), 400
+        result = upload_store.write(upload_id, offset, request.stream)
+        if result['complete']:
+            get_ingestion().start()
+        return jsonify(result)
+    except UploadError as e:
+        return _upload_error(e)
+    except Exception as e:
+        logger.error(f"Error receiving upload chunk: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/training/ingest', methods=['GET', 'POST'])
+def handle_ingest():
+    try:
+        if request.method == 'POST':
+            # Processes only files that are not in the dataset yet
+            get_ingestion().start()
+            return jsonify(get_ingestion().status()), 202
+        return jsonify(get_ingestion().status())
+    except Exception as e:
+        logger.error(f"Error in ingest endpoint: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
\ No newline at end of file
@@ -0,0 +1,75 @@
+"""
+Measure capture time and allocations per frame for each screen capture backend.
+
+Usage (from the backend directory, with a display or under Xvfb):
+    python benchmarks/bench_capture.py --frames 50 --region 0 0 1280 800
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.screen_capture import FakeCapture, PyAutoGUICapture, X11Capture  # noqa: E402
+
+
+def measure(backend, frames, region):
+    # Warm up once so one-time buffer setup is reported separately
+    tracemalloc.start()
+    backend.capture(region)
+    _, setup_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings = []
+    allocated = []
+    for _ in range(frames):
+        tracemalloc.start()
+        start = time.perf_counter()
+        backend.capture(region)
+        timings.append(time.perf_counter() - start)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        allocated.append(peak)
+
+    return {
+        'mean_ms': statistics.mean(timings) * 1000,
+        'p95_ms': sorted(timings)[int(len(timings) * 0.95) - 1] * 1000,
+        'bytes_per_frame': statistics.mean(allocated),
+        'setup_bytes': setup_peak
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--frames', type=int, default=50)
+    parser.add_argument('--region', type=int, nargs=4, default=None,
+                        metavar=('LEFT', 'TOP', 'WIDTH', 'HEIGHT'))
+    args = parser.parse_args()
+    region = tuple(args.region) if args.region else None
+
+    backends = [FakeCapture([np.zeros((1080, 1920, 3), dtype=np.uint8)])]
+    for factory in (PyAutoGUICapture, lambda: X11Capture(use_shm=False), X11Capture):
+        try:
+            backends.append(factory())
+        except Exception as e:
+            print(f"Skipping backend: {e}")
+
+    for backend in backends:
+        try:
+            result = measure(backend, args.frames, region)
+        except Exception as e:
+            print(f"{backend.name:>10}: failed ({e})")
+            continue
+        print(f"{backend.name:>10}: mean {result['mean_ms']:.2f} ms, p95 {result['p95_ms']:.2f} ms, "
+              f"{result['bytes_per_frame'] / 1e6:.2f} MB allocated/frame "
+              f"(setup {result['setup_bytes'] / 1e6:.2f} MB)")
+        backend.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+Compare per-call OCR latency of the subprocess engine and the warm worker pool.
+
+Usage (from the backend directory):
+    python benchmarks/bench_ocr_engine.py --iterations 20 --workers 2
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.ocr_engine import SubprocessEngine, TesseractPoolEngine  # noqa: E402
+
+
+def make_panel(width=1280, height=800):
+    """
+    Render a sparse-text panel roughly like the Lightroom develop sidebar
+    """
+    image = Image.new('L', (width, height), color=255)
+    draw = ImageDraw.Draw(image)
+    labels = ['Exposure', 'Contrast', 'Highlights', 'Shadows', 'Whites', 'Blacks',
+              'Temp', 'Tint', 'Texture', 'Clarity', 'Dehaze', 'Vibrance', 'Saturation',
+              'Presets', 'Export', 'Reset', 'Undo']
+    for i, label in enumerate(labels):
+        draw.text((40 + (i % 3) * 400, 40 + (i // 3) * 120), label, fill=0)
+    return np.array(image)
+
+
+def run(engine, image, iterations, concurrency):
+    latencies = []
+
+    def one_call(_):
+        start = time.perf_counter()
+        engine.image_to_data(image, 'eng', '--psm 11')
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one_call, range(iterations)))
+    total = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'mean_ms': statistics.mean(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        'throughput_per_s': iterations / total
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, default=1)
+    args = parser.parse_args()
+
+    image = make_panel()
+    engines = [SubprocessEngine()]
+    try:
+        pool = TesseractPoolEngine(workers=args.workers, queue_size=args.workers * 2)
+        # Warm up so model loading is not counted against the pool
+        for _ in range(args.workers):
+            pool.image_to_data(image, 'eng', '--psm 11')
+        engines.append(pool)
+    except RuntimeError as e:
+        print(f"Skipping pool engine: {e}")
+
+    for engine in engines:
+        result = run(engine, image, args.iterations, args.concurrency)
+        print(f"{engine.name:>10}: mean {result['mean_ms']:.1f} ms, "
+              f"p95 {result['p95_ms']:.1f} ms, {result['throughput_per_s']:.2f} calls/s")
+        engine.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Compare pytesseract's dict-of-lists output with the array-backed OCRResult on a
+full-screen sized TSV: parse time, retained memory and word lookup time.
+
+Usage (from the backend directory):
+    python benchmarks/bench_ocr_result.py --width 2560 --height 1440 --lookups 200
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.ocr_result import OCRResult  # noqa: E402
+
+TSV_HEADER = 'level\tpage_num\tblock_num\tpar_num\tline_num\tword_num\tleft\ttop\twidth\theight\tconf\ttext'
+LABELS = ['Exposure', 'Contrast', 'Highlights', 'Shadows', 'Whites', 'Blacks', 'Temp', 'Tint',
+          'Texture', 'Clarity', 'Dehaze', 'Vibrance', 'Saturation', 'Presets', 'Export', 'Reset',
+          'Auto', 'Tone', 'Color', 'Detail', 'Effects', 'Calibration', '+0.35', '-12', '5500']
+
+
+def make_tsv(width, height, seed=0):
+    """
+    Synthesize Tesseract TSV for a dense full screen: one text row every 20 px,
+    with the page/block/paragraph/line rows Tesseract emits around the words
+    """
+    rng = random.Random(seed)
+    rows = [TSV_HEADER, f'1\t1\t0\t0\t0\t0\t0\t0\t{width}\t{height}\t-1\t']
+    block = 0
+    for top in range(0, height - 20, 20):
+        block += 1
+        rows.append(f'2\t1\t{block}\t0\t0\t0\t0\t{top}\t{width}\t16\t-1\t')
+        rows.append(f'3\t1\t{block}\t1\t0\t0\t0\t{top}\t{width}\t16\t-1\t')
+        rows.append(f'4\t1\t{block}\t1\t1\t0\t0\t{top}\t{width}\t16\t-1\t')
+        left = 0
+        for word in range(1, width // 90):
+            text = rng.choice(LABELS)
+            rows.append(f'5\t1\t{block}\t1\t1\t{word}\t{left}\t{top}\t80\t16\t{rng.uniform(40, 97):.6f}\t{text}')
+            left += 90
+    return '\n'.join(rows)
+
+
+def parse_dict(tsv):
+    """
+    Equivalent of pytesseract.Output.DICT
+    """
+    lines = tsv.splitlines()
+    columns = lines[0].split('\t')
+    data = {column: [] for column in columns}
+    for line in lines[1:]:
+        fields = line.split('\t')
+        for column, value in zip(columns, fields):
+            data[column].append(value if column == 'text' else int(float(value)))
+    return data
+
+
+def lookup_dict(data, target):
+    # The pre-array find_text scan: lower-case every word on every call
+    target = target.lower()
+    return [i for i, text in enumerate(data['text']) if text.strip().lower() == target]
+
+
+def timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def retained(func):
+    tracemalloc.start()
+    result = func()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--width', type=int, default=2560)
+    parser.add_argument('--height', type=int, default=1440)
+    parser.add_argument('--lookups', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    tsv = make_tsv(args.width, args.height)
+    data, dict_bytes = retained(lambda: parse_dict(tsv))
+    result, array_bytes = retained(lambda: OCRResult.from_tsv(tsv, has_header=True))
+    targets = [LABELS[i % len(LABELS)] for i in range(args.lookups)]
+
+    print(f"{len(result)} words on a {args.width}x{args.height} frame")
+    print(f"parse:  dict {timed(lambda: parse_dict(tsv), args.repeat):.1f} ms, "
+          f"array {timed(lambda: OCRResult.from_tsv(tsv, has_header=True), args.repeat):.1f} ms")
+    print(f"memory: dict {dict_bytes / 1024:.0f} KiB, array {array_bytes / 1024:.0f} KiB")
+    print(f"{args.lookups} lookups: dict {timed(lambda: [lookup_dict(data, t) for t in targets], args.repeat):.1f} ms, "
+          f"array {timed(lambda: [result.find(t) for t in targets], args.repeat):.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
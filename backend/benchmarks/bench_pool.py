@@ -0,0 +1,126 @@
+"""
+Throughput of the controller pool against the number of workers.
+
+Each worker gets a FakeDisplay with its own SyntheticLightroom, so no display,
+Lightroom or Xvfb is needed. Sessions each submit the same command script; a
+session sticks to one worker, and sessions are spread over the least loaded
+workers. --app-latency makes the simulated Lightroom take that long to react
+to every input event, which is where a real GUI spends most of its time and
+what several displays can overlap.
+
+Reports wall time, commands per second, the speedup over one worker and the
+per-worker utilisation and job counts.
+
+Usage (from the backend directory):
+    python benchmarks/bench_pool.py --workers 1 2 4 --sessions 8 --app-latency 20
+    python benchmarks/bench_pool.py --compare pool.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.controller_pool import ControllerPool  # noqa: E402
+from modules.virtual_display import create_displays  # noqa: E402
+from synthetic_lightroom import SyntheticLightroom  # noqa: E402
+
+# Hotkey commands: no OCR, so the run measures scheduling and GUI time only
+SCRIPT = ['next photo', 'undo', 'redo', 'previous photo', 'next photo']
+
+
+class SlowLightroom(SyntheticLightroom):
+    """
+    SyntheticLightroom that takes latency seconds to react to each input event
+    """
+
+    def __init__(self, latency, **kwargs):
+        self.latency = latency
+        super().__init__(**kwargs)
+
+    def handle(self, name, args):
+        time.sleep(self.latency)
+        super().handle(name, args)
+
+
+def run_command(job, chat_processor):
+    return chat_processor.process_command(job.payload['command'])
+
+
+def measure(workers, sessions, latency):
+    displays = create_displays(f"fake:{workers}", screen_factory=lambda: SlowLightroom(latency))
+    pool = ControllerPool(displays).start()
+    try:
+        for worker in pool.workers:
+            worker.controller.update_config({'click_delay': 0, 'settle_interval': 0.0, 'settle_timeout': 0.5})
+        start = time.perf_counter()
+        jobs = [pool.submit('command', {'command': command, 'session': f"session-{session}"}, run_command,
+                            session=f"session-{session}")
+                for command in SCRIPT for session in range(sessions)]
+        for job in jobs:
+            while not job.done:
+                pool.wait_for_update(job, job.version)
+        elapsed = time.perf_counter() - start
+        status = pool.status()
+    finally:
+        pool.stop()
+    return {
+        'workers': workers,
+        'commands': len(jobs),
+        'failed': sum(job.status != 'succeeded' for job in jobs),
+        'wall_s': elapsed,
+        'commands_per_s': len(jobs) / elapsed,
+        'utilisation': {worker['worker']: worker['lifetime_utilisation'] for worker in status['workers']},
+        'jobs_per_worker': {worker['worker']: worker['jobs_completed'] for worker in status['workers']}
+    }
+
+
+def compare(current, baseline, threshold):
+    """
+    Worker counts whose throughput dropped by more than threshold (a fraction)
+    """
+    previous = {run['workers']: run for run in baseline['runs']}
+    regressions = []
+    for run in current['runs']:
+        old = previous.get(run['workers'])
+        if old and run['commands_per_s'] < old['commands_per_s'] * (1 - threshold):
+            regressions.append(f"{run['workers']} workers: {old['commands_per_s']:.1f} -> "
+                               f"{run['commands_per_s']:.1f} commands/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--sessions', type=int, default=8)
+    parser.add_argument('--app-latency', type=float, default=20.0, help='Milliseconds per input event')
+    parser.add_argument('--output', default='pool.json')
+    parser.add_argument('--compare', help='Earlier results to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+
+    runs = [measure(workers, args.sessions, args.app_latency / 1000) for workers in args.workers]
+    base = runs[0]['commands_per_s']
+    for run in runs:
+        run['speedup'] = run['commands_per_s'] / base
+        utilisation = ', '.join(f"{value:.0%}" for value in run['utilisation'].values())
+        print(f"{run['workers']:>2} workers: {run['commands']} commands in {run['wall_s']:6.2f} s, "
+              f"{run['commands_per_s']:6.1f}/s (x{run['speedup']:.2f}), {run['failed']} failed, "
+              f"utilisation {utilisation}")
+
+    report = {'sessions': args.sessions, 'app_latency_ms': args.app_latency, 'runs': runs}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
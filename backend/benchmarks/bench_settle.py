@@ -0,0 +1,100 @@
+"""
+Compare fixed post-action sleeps with settle detection on simulated UI transitions.
+
+Each trial starts an animated transition of random length (drawn per action type)
+and measures how long the controller waits and whether it returned before the
+UI finished changing (a race). --repaint-delay holds each transition back, as
+when Lightroom has not started repainting yet. pyautogui must be importable, so run under Xvfb
+on headless machines:
+    python benchmarks/bench_settle.py --trials 200
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.latency import percentile  # noqa: E402
+from modules.screen_capture import FakeCapture  # noqa: E402
+from modules.lightroom_controller import LightroomController  # noqa: E402
+
+# Typical transition lengths in seconds (median, upper bound) per action type
+TRANSITIONS = {
+    'click': (0.15, 0.8),
+    'slider': (0.06, 0.3),
+    'export_setting': (0.03, 0.15)
+}
+
+# What each action waited before settle detection existed
+FIXED_WAIT = {
+    'click': 0.5,
+    'slider': 0.0,
+    'export_setting': 0.0
+}
+
+
+class AnimatedCapture(FakeCapture):
+    """
+    Serves a frame that keeps changing until the current transition ends
+    """
+
+    def __init__(self, shape=(400, 600, 3)):
+        super().__init__([np.zeros(shape, dtype=np.uint8)])
+        self.starts_at = 0.0
+        self.ends_at = 0.0
+
+    def start_transition(self, duration, delay=0.0):
+        self.starts_at = time.perf_counter() + delay
+        self.ends_at = self.starts_at + duration
+
+    def _capture(self, region):
+        frame = self.frames_source[0]
+        if self.starts_at <= time.perf_counter() < self.ends_at:
+            frame = np.random.randint(0, 255, frame.shape, dtype=np.uint8)
+        return frame
+
+
+def summarize(latencies, races):
+    latencies.sort()
+    return (f"p50 {percentile(latencies, 0.5) * 1000:6.1f} ms  "
+            f"p95 {percentile(latencies, 0.95) * 1000:6.1f} ms  "
+            f"p99 {percentile(latencies, 0.99) * 1000:6.1f} ms  "
+            f"races {races}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--trials', type=int, default=100)
+    parser.add_argument('--repaint-delay', type=float, default=0.0, help='Seconds before each transition starts')
+    args = parser.parse_args()
+
+    capture = AnimatedCapture()
+    controller = LightroomController(capture_backend=capture)
+
+    for action, (median, upper) in TRANSITIONS.items():
+        durations = [min(random.lognormvariate(np.log(median), 0.6), upper) for _ in range(args.trials)]
+
+        fixed = FIXED_WAIT[action]
+        before_races = sum(1 for d in durations if d > fixed)
+        before = summarize([fixed] * len(durations), before_races)
+
+        latencies = []
+        races = 0
+        for duration in durations:
+            capture.start_transition(duration, args.repaint_delay)
+            start = time.perf_counter()
+            controller.wait_for_settled()
+            latencies.append(time.perf_counter() - start)
+            races += time.perf_counter() < capture.ends_at
+        after = summarize(latencies, races)
+
+        print(f"{action:>15} before: {before}")
+        print(f"{action:>15}  after: {after}")
+
+
+if __name__ == '__main__':
+    main()
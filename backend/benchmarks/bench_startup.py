@@ -0,0 +1,86 @@
+"""
+Measure backend cold start and GET /api/config latency.
+
+Cold start is the time to import app.py in a fresh interpreter. With --eager the
+controller is also built during the import, as it was before initialization
+became lazy. Config latency is measured in-process through Flask's test client,
+next to the cost of the Tesseract probe that the endpoint used to run per request.
+
+Usage (from the backend directory):
+    python benchmarks/bench_startup.py --runs 5 --requests 50
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import app
+if {eager}:
+    app.services()
+print(time.perf_counter() - start)
+app.health.stop()
+"""
+
+
+def cold_start(eager, runs):
+    timings = []
+    for _ in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, '-c', IMPORT_SNIPPET.format(eager=eager)],
+            cwd=BACKEND, stderr=subprocess.DEVNULL
+        )
+        timings.append(float(output.decode().strip().splitlines()[-1]) * 1000)
+    return timings
+
+
+def config_latency(requests):
+    import app
+    client = app.app.test_client()
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get('/api/config')
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200
+    app.health.stop()
+
+    # What each request paid before: a synchronous Tesseract run
+    probe = []
+    ocr = app.get_controller().ocr
+    for _ in range(min(requests, 5)):
+        start = time.perf_counter()
+        ocr.check_status()
+        probe.append((time.perf_counter() - start) * 1000)
+    return timings, probe
+
+
+def describe(name, timings):
+    timings = sorted(timings)
+    print(f"{name:>28}: median {statistics.median(timings):8.1f} ms, "
+          f"p95 {timings[max(int(len(timings) * 0.95) - 1, 0)]:8.1f} ms, max {timings[-1]:8.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    describe('cold start (lazy)', cold_start(False, args.runs))
+    describe('cold start (eager)', cold_start(True, args.runs))
+    os.chdir(BACKEND)
+    served, probe = config_latency(args.requests)
+    describe('GET /api/config (cached)', served)
+    describe('Tesseract probe per request', probe)
+
+
+if __name__ == '__main__':
+    main()
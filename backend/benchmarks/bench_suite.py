@@ -0,0 +1,282 @@
+"""
+Headless end-to-end benchmark on synthetic Lightroom screens.
+
+For each UI scale and theme, a SyntheticLightroom is injected into a real
+LightroomController through FakeCapture and FakeInput, then the suite measures:
+  - OCR accuracy: labels found (and located inside their true box), slider values read
+  - per-stage time of one full-frame pass: capture, gray, binary, tesseract, words, match
+  - end-to-end latency and verified success per ChatCommandProcessor command type
+Results are written as JSON; --compare flags regressions against an earlier run.
+
+Usage (from the backend directory; needs Tesseract, no display):
+    python benchmarks/bench_suite.py --scales 1 1.5 2 --themes dark light --output bench.json
+    python benchmarks/bench_suite.py --compare bench.json --threshold 0.2
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.chat_commands import ChatCommandProcessor  # noqa: E402
+from modules.lightroom_controller import LightroomController  # noqa: E402
+from synthetic_lightroom import DEFAULT_VALUES, SLIDERS, SyntheticLightroom, format_value  # noqa: E402
+
+# (command type, command, check against the simulated state afterwards)
+COMMANDS = [
+    ('adjustment', 'adjust exposure to 0.5', lambda screen: screen.current_values['exposure'] == 0.5),
+    ('adjustment', 'adjust contrast to 25', lambda screen: screen.current_values['contrast'] == 25),
+    ('adjustment', 'adjust temp to 6500', lambda screen: abs(screen.current_values['temp'] - 6500) <= 50),
+    ('undo', 'undo', lambda screen: abs(screen.current_values['temp'] - 5500) <= 50),
+    ('redo', 'redo', lambda screen: abs(screen.current_values['temp'] - 6500) <= 50),
+    ('scan_presets', 'scan presets', None),
+    ('preset', 'apply preset warm matte', lambda screen: screen.applied_presets[-1:] == ['Warm Matte']),
+    ('preset', 'apply preset astro night', lambda screen: screen.applied_presets[-1:] == ['Astro Night']),
+    ('export', 'export with quality 90', lambda screen: screen.exports[-1:] == [{'quality': '90'}]),
+    ('reset', 'reset', lambda screen: screen.current_values == DEFAULT_VALUES),
+    ('navigate', 'next photo', lambda screen: screen.photo == 1),
+    ('help', 'help', None)
+]
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        'mean_ms': statistics.mean(values),
+        'p50_ms': values[len(values) // 2],
+        'max_ms': values[-1]
+    }
+
+
+def measure_accuracy(controller, screen):
+    """
+    Share of rendered labels found by OCR and located inside their true box,
+    and share of slider value fields read back exactly
+    """
+    frame = controller.ocr.as_frame(screen.capture.capture())
+    labels = dict(screen.labels)
+    found = controller.ocr.find_many(frame, list(labels))
+    hits = located = 0
+    missed = []
+    for text, (left, top, right, bottom) in labels.items():
+        if not found[text]:
+            missed.append(text)
+            continue
+        hits += 1
+        box = found[text][0]
+        x, y = box['left'] + box['width'] / 2, box['top'] + box['height'] / 2
+        if left - 2 <= x <= right + 2 and top - 2 <= y <= bottom + 2:
+            located += 1
+
+    values_read = 0
+    for label in SLIDERS:
+        name = label.lower()
+        model = controller.sliders.get(name)
+        box = labels[label]
+        center = ((box[0] + box[2]) // 2, (box[1] + box[3]) // 2)
+        read = controller.read_slider_value(model, center)
+        expected = float(format_value(name, screen.current_values[name]))
+        values_read += read is not None and abs(read - expected) < 1e-6
+
+    return {
+        'labels': len(labels),
+        'label_recall': hits / len(labels),
+        'label_location_accuracy': located / len(labels),
+        'slider_value_accuracy': values_read / len(SLIDERS),
+        'missed': sorted(missed)
+    }
+
+
+def measure_stages(controller, screen, repeat):
+    """
+    Time each stage of one uncached full-frame lookup
+    """
+    stages = {name: [] for name in ('capture', 'gray', 'binary', 'tesseract', 'words', 'match', 'total')}
+    targets = list(screen.labels)
+    for _ in range(repeat):
+        # Each iteration starts from a fresh frame so no memoized layer is reused
+        pixels, capture_ms = timed(lambda: screen.capture.capture())
+        frame = controller.ocr.as_frame(pixels.copy())
+        _, gray_ms = timed(lambda: frame.gray)
+        _, binary_ms = timed(lambda: frame.binary)
+        _, tesseract_ms = timed(lambda: frame.data)
+        _, words_ms = timed(frame.line_words)
+        _, match_ms = timed(lambda: controller.ocr.find_many(frame, targets))
+        for name, value in zip(stages, (capture_ms, gray_ms, binary_ms, tesseract_ms, words_ms, match_ms)):
+            stages[name].append(value)
+        stages['total'].append(capture_ms + gray_ms + binary_ms + tesseract_ms + words_ms + match_ms)
+    return {name: summarize(values) for name, values in stages.items()}
+
+
+def measure_commands(processor, screen):
+    """
+    Run the command script once; latency and verified success per command type
+    """
+    per_type = {}
+    for command_type, command, check in COMMANDS:
+        result, elapsed_ms = timed(lambda: processor.process_command(command))
+        verified = bool(result.get('success')) and (check is None or bool(check(screen)))
+        entry = per_type.setdefault(command_type, {'latencies': [], 'runs': 0, 'verified': 0})
+        entry['latencies'].append(elapsed_ms)
+        entry['runs'] += 1
+        entry['verified'] += verified
+        if not verified:
+            entry.setdefault('failures', []).append(command)
+    for entry in per_type.values():
+        entry.update(summarize(entry.pop('latencies')))
+        entry['success_rate'] = entry.pop('verified') / entry['runs']
+    return per_type
+
+
+def run_scenario(scale, theme, args):
+    screen = SyntheticLightroom(scale=scale, theme=theme, font_path=args.font)
+    controller = LightroomController(capture_backend=screen.capture, input_backend=screen.input)
+    controller.update_config({
+        'ui_scale': scale,
+        'click_delay': 0,
+        'settle_interval': 0.0,
+        'settle_timeout': 0.5
+    })
+    controller.ocr.update_config({
+        'engine': args.engine,
+        'incremental': args.incremental,
+        'text_regions': args.text_regions
+    })
+    processor = ChatCommandProcessor(controller)
+    try:
+        result = {
+            'accuracy': measure_accuracy(controller, screen),
+            'stages': measure_stages(controller, screen, args.repeat),
+            'commands': measure_commands(processor, screen),
+            'actions': controller.action_latency_stats(),
+            'capture': controller.capture_stats(),
+            'element_cache': controller.element_cache_stats(),
+            'input_events': len(screen.input.events)
+        }
+    finally:
+        controller.ocr.close()
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def flatten(results, prefix=''):
+    """
+    Flatten nested results into {'dark@1.0x/stages/total/mean_ms': value}
+    """
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}/{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(current, baseline, threshold):
+    """
+    Report latencies that grew and accuracies/success rates that dropped by more
+    than threshold (a fraction). Returns the list of regressions.
+    """
+    now = flatten(current['scenarios'])
+    before = flatten(baseline['scenarios'])
+    regressions = []
+    for path, old in sorted(before.items()):
+        new = now.get(path)
+        if new is None:
+            continue
+        if path.endswith('_ms') and old > 0 and (new - old) / old > threshold:
+            regressions.append(f"{path}: {old:.1f} -> {new:.1f} ms")
+        elif (path.endswith('accuracy') or path.endswith('recall') or path.endswith('success_rate')) \
+                and old - new > threshold * old:
+            regressions.append(f"{path}: {old:.2f} -> {new:.2f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=float, nargs='+', default=[1.0, 1.5, 2.0])
+    parser.add_argument('--themes', nargs='+', default=['dark', 'light'])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--engine', default='subprocess')
+    parser.add_argument('--incremental', action='store_true')
+    parser.add_argument('--text-regions', action='store_true')
+    parser.add_argument('--font', help='TrueType font used to render the UI')
+    parser.add_argument('--output', default='bench_suite.json')
+    parser.add_argument('--compare', help='Earlier results file to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+    output = os.path.abspath(args.output)
+    baseline_path = os.path.abspath(args.compare) if args.compare else None
+
+    results = {
+        'meta': {
+            'timestamp': time.time(),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'engine': args.engine,
+            'incremental': args.incremental,
+            'text_regions': args.text_regions,
+            'repeat': args.repeat
+        },
+        'scenarios': {}
+    }
+    cwd = os.getcwd()
+    for theme in args.themes:
+        for scale in args.scales:
+            name = f"{theme}@{scale:g}x"
+            # Calibration, layout and catalog files persist under data/; keep each run isolated
+            with tempfile.TemporaryDirectory() as workdir:
+                os.chdir(workdir)
+                try:
+                    scenario = run_scenario(scale, theme, args)
+                finally:
+                    os.chdir(cwd)
+            results['scenarios'][name] = scenario
+            accuracy = scenario['accuracy']
+            print(f"{name:>10}: recall {accuracy['label_recall']:.0%}, "
+                  f"located {accuracy['label_location_accuracy']:.0%}, "
+                  f"values {accuracy['slider_value_accuracy']:.0%}, "
+                  f"frame {scenario['stages']['total']['mean_ms']:.0f} ms")
+            for command_type, entry in scenario['commands'].items():
+                print(f"{'':>12}{command_type:<13} {entry['mean_ms']:8.1f} ms  "
+                      f"success {entry['success_rate']:.0%}")
+
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {baseline_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Replay recorded controller traces offline at full speed.
+
+A trace is recorded with POST /api/trace {"enabled": true} (and stopped with
+{"enabled": false}); files land in data/traces/. Each replay rebuilds the
+controller from the recorded configuration and state and runs every recorded
+command again against the recorded frames. Per command it reports the replay
+time next to the recorded time, and whether the result and the input events
+still match the recording.
+
+--ocr recorded serves the recorded OCR results, so no Tesseract is needed
+and the timings cover everything else. --ocr run runs the configured OCR
+engine again and also reports word agreement with the recording.
+Pass OCR or controller settings to try a speedup against the same screens,
+e.g. --set incremental=true, and use --compare to catch regressions.
+
+Usage (from the backend directory):
+    python benchmarks/replay_trace.py data/traces/20261016-101500.lrtrace --repeat 3
+    python benchmarks/replay_trace.py trace.lrtrace --ocr run --set text_regions=true --compare before.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.replay import TraceReplayer  # noqa: E402
+
+
+def parse_setting(setting):
+    key, _, value = setting.partition('=')
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+
+def replay(path, ocr, overrides, repeat):
+    runs = []
+    for _ in range(repeat):
+        replayer = TraceReplayer(path, ocr=ocr, config_overrides=overrides)
+        try:
+            runs.append(replayer.run())
+        finally:
+            replayer.close()
+    report = runs[-1]
+    # Median replay time per command over the runs
+    for index, command in enumerate(report['commands']):
+        command['replayed_ms'] = statistics.median(run['commands'][index]['replayed_ms'] for run in runs)
+    report['total_ms'] = statistics.median(run['total_ms'] for run in runs)
+    return report
+
+
+def compare(current, baseline, threshold, min_ms=1.0):
+    """
+    Commands that got slower by more than threshold (a fraction, and at least
+    min_ms) or stopped matching the recording
+    """
+    regressions = []
+    for new, old in zip(current['commands'], baseline['commands']):
+        name = json.dumps(new['command'])
+        if new['replayed_ms'] - old['replayed_ms'] > max(threshold * old['replayed_ms'], min_ms):
+            regressions.append(f"{name}: {old['replayed_ms']:.1f} -> {new['replayed_ms']:.1f} ms")
+        for check in ('result_matches', 'inputs_match'):
+            if old[check] and not new[check]:
+                regressions.append(f"{name}: {check} no longer holds")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('trace')
+    parser.add_argument('--ocr', choices=['recorded', 'run'], default='recorded')
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                        help='Controller or OCR setting for the replay (JSON value)')
+    parser.add_argument('--repeat', type=int, default=1)
+    parser.add_argument('--output', default='replay.json')
+    parser.add_argument('--compare', help='Earlier replay report to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+
+    overrides = dict(parse_setting(setting) for setting in args.set)
+    report = replay(args.trace, args.ocr, overrides, args.repeat)
+    report['settings'] = overrides
+
+    for command in report['commands']:
+        flags = '' if command['result_matches'] and command['inputs_match'] else '  MISMATCH'
+        print(f"{json.dumps(command['command']):>40}: recorded {command['recorded_ms']:8.1f} ms, "
+              f"replayed {command['replayed_ms']:8.1f} ms{flags}")
+    print(f"{'total':>40}: recorded {report['recorded_total_ms']:8.1f} ms, replayed {report['total_ms']:8.1f} ms")
+    if args.ocr == 'run':
+        ocr = report['ocr_calls']
+        print(f"OCR words matched: {ocr['words_matched']} of {ocr['words_recorded']} recorded "
+              f"({ocr['words_replayed']} read)")
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, default=str)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,371 @@
+"""
+A simulated Lightroom window for headless benchmarks.
+
+Renders the develop view with PIL: a presets panel, the develop sliders with
+their value fields, a photo and, when opened, the export dialog. Input recorded
+by a FakeInput is applied to the simulated state and the window is re-rendered
+into a FakeCapture, so the real controller code runs end to end without a
+display. The layout follows the controller's panel fractions and slider geometry
+at any ui_scale.
+"""
+import os
+import sys
+import zlib
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.input_backend import FakeInput  # noqa: E402
+from modules.lightroom_controller import DEFAULT_HOTKEYS  # noqa: E402
+from modules.panel_layout import DEFAULT_PANELS  # noqa: E402
+from modules.screen_capture import FakeCapture  # noqa: E402
+from modules.slider_calibration import DEFAULT_SLIDERS, DEFAULT_TRACK  # noqa: E402
+
+BASE_SIZE = (1600, 1000)
+
+THEMES = {
+    'dark': {'background': (38, 38, 38), 'panel': (52, 52, 52), 'text': (215, 215, 215),
+             'header': (240, 240, 240), 'track': (110, 110, 110), 'thumb': (200, 200, 200),
+             'field': (30, 30, 30), 'dialog': (60, 60, 60), 'button': (85, 85, 85)},
+    'light': {'background': (205, 205, 205), 'panel': (228, 228, 228), 'text': (35, 35, 35),
+              'header': (0, 0, 0), 'track': (150, 150, 150), 'thumb': (60, 60, 60),
+              'field': (250, 250, 250), 'dialog': (238, 238, 238), 'button': (200, 200, 200)}
+}
+
+SLIDERS = ['Temp', 'Tint', 'Exposure', 'Contrast', 'Highlights', 'Shadows', 'Whites',
+           'Blacks', 'Texture', 'Clarity', 'Dehaze', 'Vibrance', 'Saturation']
+
+DEFAULT_VALUES = {name.lower(): 0.0 for name in SLIDERS}
+DEFAULT_VALUES['temp'] = 5500.0
+
+PRESET_GROUPS = [
+    ('Color', ['Vivid', 'Warm Matte', 'Cool Fade', 'Golden Hour', 'Soft Pastel', 'Teal Orange']),
+    ('Creative', ['Film Grain', 'Faded Print', 'Cross Process', 'Split Tone', 'Night Blue']),
+    ('Black and White', ['Classic Mono', 'High Contrast', 'Selenium', 'Sepia Tone', 'Infrared']),
+    ('Portrait', ['Skin Smooth', 'Bright Eyes', 'Warm Glow', 'Studio Light', 'Natural']),
+    ('Landscape', ['Dramatic Sky', 'Green Boost', 'Mountain Haze', 'Sunset Pop', 'Deep Shadows']),
+    ('Travel', ['Desert Light', 'Ocean Blue', 'City Lights', 'Old Town', 'Jungle Green', 'Snow Day']),
+    ('Vintage', ['Polaroid', 'Kodachrome', 'Faded Seventies', 'Cross Fade', 'Dusty Road']),
+    ('Food', ['Fresh Greens', 'Warm Table', 'Bright Plate', 'Dark Moody']),
+    ('User Presets', ['Wedding Base', 'Street Grit', 'Product White', 'Astro Night'])
+]
+
+EXPORT_SETTINGS = ['Location', 'Format', 'Quality', 'Resolution', 'Sharpening', 'Watermark']
+
+
+def load_font(size, path=None):
+    """
+    A scalable font for crisp text at every DPI; falls back to PIL's built-in font
+    """
+    for candidate in filter(None, [path, 'DejaVuSans.ttf', 'LiberationSans-Regular.ttf', 'Arial.ttf']):
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+def format_value(name, value):
+    if name == 'temp':
+        return str(int(round(value)))
+    if name == 'exposure':
+        return f"{value:+.2f}"
+    return f"{int(round(value)):+d}" if round(value) else '0'
+
+
+class SyntheticLightroom:
+    """
+    Simulated Lightroom develop view.
+    capture and input are the FakeCapture and FakeInput to hand to the controller;
+    labels maps every rendered UI label to its box (left, top, right, bottom).
+    """
+
+    def __init__(self, scale=1.0, theme='dark', font_path=None, scroll_clicks=5, seed=0):
+        self.scale = scale
+        self.theme = THEMES[theme]
+        self.width = int(BASE_SIZE[0] * scale)
+        self.height = int(BASE_SIZE[1] * scale)
+        self.font = load_font(int(13 * scale), font_path)
+        self.header_font = load_font(int(15 * scale), font_path)
+        self.scroll_clicks = scroll_clicks
+        self.seed = seed
+
+        self.photo = 0
+        self.values = {0: dict(DEFAULT_VALUES)}
+        self.history = []
+        self.future = []
+        self.applied_presets = []
+        self.exports = []
+        self.dialog_open = False
+        self.dialog_values = {}
+        self.preset_scroll = 0
+        self.focused_field = None
+        self.typed = ''
+        self.drag_from = None
+
+        self.labels = {}
+        self._targets = []
+        self._photos = {}
+        self.rows = []
+        for group, presets in PRESET_GROUPS:
+            self.rows.append((group, True))
+            self.rows.extend((preset, False) for preset in presets)
+
+        self.input = FakeInput(listener=self.handle)
+        self.capture = FakeCapture([self.render()])
+
+    # Geometry --------------------------------------------------------------
+
+    def s(self, value):
+        return int(round(value * self.scale))
+
+    def panel_rect(self, name):
+        left, top, right, bottom = DEFAULT_PANELS[name]['rect']
+        return (int(left * self.width), int(top * self.height),
+                int(right * self.width), int(bottom * self.height))
+
+    @property
+    def current_values(self):
+        return self.values.setdefault(self.photo, dict(DEFAULT_VALUES))
+
+    def slider_center(self, index):
+        left, top, _, _ = self.panel_rect('develop')
+        return left + self.s(45), top + self.s(60) + index * self.s(28)
+
+    def visible_rows(self):
+        _, top, _, bottom = self.panel_rect('presets')
+        first_y = top + self.s(40)
+        per_page = max((bottom - first_y) // self.s(22), 1)
+        return self.rows[self.preset_scroll:self.preset_scroll + per_page], first_y
+
+    # Rendering -------------------------------------------------------------
+
+    def _text(self, draw, xy, text, font=None, fill=None, anchor='la', target=None):
+        font = font or self.font
+        draw.text(xy, text, font=font, fill=fill or self.theme['text'], anchor=anchor)
+        box = draw.textbbox(xy, text, font=font, anchor=anchor)
+        self.labels[text] = box
+        if target is not None:
+            self._targets.append((box, target))
+        return box
+
+    def _photo(self):
+        values = self.current_values
+        key = (self.photo, values['exposure'], values['contrast'], values['temp'])
+        # Rendering the photo dominates a re-render; keep input handling cheap
+        if key not in self._photos:
+            self._photos = {key: self._render_photo()}
+        return self._photos[key]
+
+    def _render_photo(self):
+        rng = np.random.default_rng(self.seed + self.photo)
+        height, width = self.s(700), self.s(820)
+        y, x = np.mgrid[0:height, 0:width]
+        values = self.current_values
+        base = 90 + 40 * values['exposure'] + 0.3 * values['contrast'] * (x / width - 0.5)
+        pixels = base + 60 * np.sin(x / (37 * self.scale) + rng.uniform(0, 6)) * np.cos(y / (53 * self.scale))
+        pixels = np.clip(pixels + rng.normal(0, 6, pixels.shape), 0, 255).astype(np.uint8)
+        warmth = (values['temp'] - 5500) / 200
+        return np.stack([np.clip(pixels + warmth, 0, 255), pixels,
+                         np.clip(pixels - warmth, 0, 255)], axis=2).astype(np.uint8)
+
+    def render(self):
+        theme = self.theme
+        image = Image.new('RGB', (self.width, self.height), theme['background'])
+        draw = ImageDraw.Draw(image)
+        self.labels = {}
+        self._targets = []
+
+        # Module picker
+        for i, module in enumerate(['Library', 'Develop', 'Map', 'Print']):
+            self._text(draw, (self.width // 2 - self.s(200) + i * self.s(110), self.s(28)), module,
+                       font=self.header_font)
+
+        # Photo
+        photo = Image.fromarray(self._photo())
+        image.paste(photo, ((self.width - photo.width) // 2, self.s(120)))
+
+        # Presets panel
+        left, top, right, bottom = self.panel_rect('presets')
+        draw.rectangle((left, top, right, bottom), fill=theme['panel'])
+        self._text(draw, (left + self.s(12), top + self.s(10)), 'Presets', font=self.header_font,
+                   fill=theme['header'], target=('presets_header',))
+        rows, first_y = self.visible_rows()
+        for i, (name, is_group) in enumerate(rows):
+            x = left + (self.s(12) if is_group else self.s(34))
+            self._text(draw, (x, first_y + i * self.s(22)), name,
+                       fill=theme['header'] if is_group else theme['text'],
+                       target=None if is_group else ('preset', name))
+        self._text(draw, (left + self.s(12), bottom + self.s(12)), 'Export...', target=('export_dialog',))
+
+        # Develop panel
+        left, top, right, bottom = self.panel_rect('develop')
+        draw.rectangle((left, top, right, bottom), fill=theme['panel'])
+        values = self.current_values
+        for index, label in enumerate(SLIDERS):
+            name = label.lower()
+            cx, cy = self.slider_center(index)
+            self._text(draw, (cx, cy), label, anchor='mm')
+            track_left, track_right = cx + self.s(DEFAULT_TRACK['track_left']), cx + self.s(DEFAULT_TRACK['track_right'])
+            draw.line((track_left, cy, track_right, cy), fill=theme['track'], width=max(self.s(2), 1))
+            fraction = self._fraction(name, values[name])
+            thumb_x = track_left + fraction * (track_right - track_left)
+            draw.ellipse((thumb_x - self.s(5), cy - self.s(5), thumb_x + self.s(5), cy + self.s(5)),
+                         fill=theme['thumb'])
+            self._targets.append(((track_left, cy - self.s(8), track_right, cy + self.s(8)), ('track', name)))
+            field_x = cx + self.s(DEFAULT_TRACK['value_field'])
+            field = (field_x - self.s(26), cy - self.s(9), field_x + self.s(26), cy + self.s(9))
+            draw.rectangle(field, fill=theme['field'])
+            self._targets.append((field, ('field', name)))
+            text = self.typed if self.focused_field == name else format_value(name, values[name])
+            draw.text((field_x, cy), text, font=self.font, fill=theme['text'], anchor='mm')
+
+        # Export dialog
+        if self.dialog_open:
+            left, top, right, bottom = self.panel_rect('dialog')
+            draw.rectangle((left, top, right, bottom), fill=theme['dialog'], outline=theme['track'])
+            self._text(draw, (left + self.s(24), top + self.s(20)), 'One File to Hard Drive',
+                       font=self.header_font, fill=theme['header'])
+            for i, setting in enumerate(EXPORT_SETTINGS):
+                y = top + self.s(80) + i * self.s(40)
+                self._text(draw, (left + self.s(40), y), setting)
+                field = (left + self.s(240), y - self.s(4), left + self.s(480), y + self.s(20))
+                draw.rectangle(field, fill=theme['field'])
+                draw.text((field[0] + self.s(6), y), str(self.dialog_values.get(setting.lower(), '')),
+                          font=self.font, fill=theme['text'])
+                self._targets.append((field, ('setting', setting.lower())))
+                self._targets.append((self.labels[setting], ('setting', setting.lower())))
+            for i, button in enumerate(['Cancel', 'Export']):
+                x = right - self.s(230) + i * self.s(110)
+                box = (x, bottom - self.s(50), x + self.s(90), bottom - self.s(20))
+                draw.rectangle(box, fill=theme['button'])
+                self._text(draw, ((box[0] + box[2]) // 2, (box[1] + box[3]) // 2), button,
+                           anchor='mm', target=('dialog_button', button))
+        return np.array(image)
+
+    def _fraction(self, name, value):
+        mapping = DEFAULT_SLIDERS[name].get('mapping') or [
+            [DEFAULT_SLIDERS[name]['min'], 0.0], [DEFAULT_SLIDERS[name]['max'], 1.0]]
+        values = [point[0] for point in mapping]
+        fractions = [point[1] for point in mapping]
+        return float(np.interp(value, values, fractions))
+
+    def _value_at(self, name, fraction):
+        mapping = DEFAULT_SLIDERS[name].get('mapping') or [
+            [DEFAULT_SLIDERS[name]['min'], 0.0], [DEFAULT_SLIDERS[name]['max'], 1.0]]
+        value = float(np.interp(fraction, [p[1] for p in mapping], [p[0] for p in mapping]))
+        return round(value, 2) if name == 'exposure' else round(value)
+
+    # Input -----------------------------------------------------------------
+
+    def _target_at(self, x, y):
+        for (left, top, right, bottom), target in self._targets:
+            if left <= x <= right and top <= y <= bottom:
+                return target
+        return None
+
+    def _edit(self, changes):
+        self.history.append((self.photo, dict(self.current_values)))
+        self.future = []
+        self.current_values.update(changes)
+
+    def _hotkey_action(self, keys):
+        for action, binding in DEFAULT_HOTKEYS.items():
+            if binding and list(binding) == list(keys):
+                return action
+        return None
+
+    def handle(self, name, args):
+        """
+        Apply one recorded input event and re-render the window
+        """
+        if name == 'hotkey':
+            self._on_hotkey(self._hotkey_action(args))
+        elif name == 'click':
+            self._on_click(*args)
+        elif name == 'doubleClick':
+            target = self._target_at(*args)
+            if target and target[0] == 'field':
+                self.focused_field = target[1]
+                self.typed = ''
+        elif name == 'write':
+            if self.focused_field in self.dialog_values:
+                self.dialog_values[self.focused_field] += args[0]
+            elif self.focused_field:
+                self.typed += args[0]
+        elif name == 'press' and args[0] == 'enter':
+            self._commit_field()
+        elif name == 'mouseDown':
+            self.drag_from = self._target_at(*args)
+        elif name == 'mouseUp':
+            if self.drag_from and self.drag_from[0] == 'track':
+                self._set_from_track(self.drag_from[1], args[0])
+            self.drag_from = None
+        elif name == 'scroll':
+            clicks, x, y = args
+            rows = -clicks // self.scroll_clicks if self.scroll_clicks else -clicks
+            per_page = len(self.visible_rows()[0])
+            self.preset_scroll = max(0, min(self.preset_scroll + rows, max(len(self.rows) - per_page, 0)))
+        self.capture.set_frame(self.render())
+
+    def _commit_field(self):
+        if self.focused_field in self.dialog_values:
+            self.focused_field = None
+            return
+        if self.focused_field:
+            try:
+                value = float(self.typed)
+                model = DEFAULT_SLIDERS[self.focused_field]
+                self._edit({self.focused_field: max(model['min'], min(model['max'], value))})
+            except ValueError:
+                pass
+        self.focused_field = None
+        self.typed = ''
+
+    def _set_from_track(self, name, x):
+        index = [label.lower() for label in SLIDERS].index(name)
+        cx, _ = self.slider_center(index)
+        track_left = cx + self.s(DEFAULT_TRACK['track_left'])
+        track_right = cx + self.s(DEFAULT_TRACK['track_right'])
+        fraction = min(max((x - track_left) / float(track_right - track_left), 0.0), 1.0)
+        self._edit({name: self._value_at(name, fraction)})
+
+    def _on_hotkey(self, action):
+        if action == 'undo' and self.history:
+            photo, values = self.history.pop()
+            self.future.append((photo, dict(self.values[photo])))
+            self.values[photo] = values
+        elif action == 'redo' and self.future:
+            photo, values = self.future.pop()
+            self.history.append((photo, dict(self.values[photo])))
+            self.values[photo] = values
+        elif action == 'reset':
+            self._edit(dict(DEFAULT_VALUES))
+        elif action == 'export_dialog':
+            self.dialog_open = True
+            self.dialog_values = {}
+        elif action in ('next_photo', 'previous_photo'):
+            self.photo = max(self.photo + (1 if action == 'next_photo' else -1), 0)
+
+    def _on_click(self, x, y):
+        target = self._target_at(x, y)
+        if target is None:
+            return
+        kind = target[0]
+        if kind == 'preset':
+            rng = np.random.default_rng(zlib.crc32(target[1].encode()))
+            self._edit({'contrast': int(rng.integers(-40, 40)), 'vibrance': int(rng.integers(-30, 50))})
+            self.applied_presets.append(target[1])
+        elif kind == 'export_dialog':
+            self._on_hotkey('export_dialog')
+        elif kind == 'track':
+            self._set_from_track(target[1], x)
+        elif kind == 'setting':
+            self.focused_field = target[1]
+            self.dialog_values[target[1]] = ''
+        elif kind == 'dialog_button':
+            if target[1] == 'Export':
+                self.exports.append(dict(self.dialog_values))
+            self.dialog_open = False
@@ -1,37 +1,131 @@
 import logging
 import re
-from typing import Dict, Any, Tuple
+import time
+from typing import Dict, Any, List, Optional, Tuple
+from .edit_state import EditState
+from .metrics import metrics
 
 class ChatCommandProcessor:
     def __init__(self, lightroom_controller):
         self.logger = logging.getLogger(__name__)
         self.lightroom_controller = lightroom_controller
+        # What we believe the current photo's develop settings are
+        self.edit_state = EditState()
+        # TraceRecorder that wraps each command while a trace is being recorded
+        self.recorder = None
         
         # Define command patterns and their corresponding actions
         self.command_patterns = {
-            r'adjust\s+(?P<parameter>\w+)\s+to\s+(?P<value>-?\d+)': self._handle_adjustment,
+            r'adjust\s+(?P<parameter>\w+)\s+to\s+(?P<value>[-+]?\d+(?:\.\d+)?)': self._handle_adjustment,
             r'apply\s+preset\s+(?P<preset_name>[\w\s]+)': self._handle_preset,
+            r'(re)?scan\s+presets': self._handle_scan_presets,
             r'export(\s+with\s+(?P<settings>[\w\s,]+))?': self._handle_export,
             r'undo(\s+last)?': self._handle_undo,
             r'reset(\s+all)?': self._handle_reset,
+            r'redo(\s+last)?': self._handle_redo,
+            r'(?P<direction>next|previous)(\s+photo)?': self._handle_navigate,
             r'help': self._handle_help
         }
 
+        # UI elements each command needs from the screen it starts on, used by the batch planner
+        self.element_requirements = {
+            self._handle_adjustment: lambda params: [(params['parameter'], 'develop')],
+            self._handle_preset: lambda params: self._elements_unless_hotkey('presets_panel', 'Presets', 'presets'),
+            self._handle_export: lambda params: self._elements_unless_hotkey('export_dialog', 'Export'),
+            self._handle_undo: lambda params: self._elements_unless_hotkey('undo', 'Undo'),
+            self._handle_reset: lambda params: self._elements_unless_hotkey('reset', 'Reset'),
+            self._handle_redo: lambda params: self._elements_unless_hotkey('redo', 'Redo')
+        }
+
+    def _elements_unless_hotkey(self, action: str, element_name: str,
+                                panel: Optional[str] = None) -> List[Tuple[str, Optional[str]]]:
+        """
+        Actions with a keyboard binding need nothing from the screen
+        """
+        if self.lightroom_controller.has_hotkey(action):
+            return []
+        return [(element_name, panel)]
+
+    def _tolerance(self, parameter: str) -> float:
+        model = self.lightroom_controller.sliders.get(parameter)
+        return model.tolerance / 2 if model else 0.0
+
+    def coalesce_key(self, command: str) -> Optional[str]:
+        """
+        Key shared by commands where only the last one in a burst matters
+        (adjustments to the same parameter); None for everything else
+        """
+        handler, params = self.parse_command(command)
+        if handler == self._handle_adjustment:
+            return f"adjust:{params['parameter']}"
+        return None
+
+    def _coalesce(self, parsed: List[Tuple[str, Any, Dict[str, str]]]) -> Dict[int, int]:
+        """
+        Maps each adjustment superseded by a later adjustment to the same parameter
+        to the index of the adjustment that actually runs.
+        Any non-adjustment command is a barrier: nothing is merged across it.
+        """
+        superseded = {}
+        last_seen = {}
+        for i, (_, handler, params) in enumerate(parsed):
+            if handler != self._handle_adjustment:
+                last_seen = {}
+                continue
+            parameter = params['parameter']
+            if parameter in last_seen:
+                superseded[last_seen[parameter]] = i
+            last_seen[parameter] = i
+        # Point chains of merges at the final adjustment
+        for i in sorted(superseded, reverse=True):
+            superseded[i] = superseded.get(superseded[i], superseded[i])
+        return superseded
+
+    def parse_command(self, command: str) -> Tuple[Any, Dict[str, str]]:
+        """
+        Match a command against the known patterns without executing it
+        Returns the handler and its parameters, or (None, {}) if nothing matches
+        """
+        command = command.lower().strip()
+        for pattern, handler in self.command_patterns.items():
+            match = re.match(pattern, command)
+            if match:
+                return handler, match.groupdict()
+        return None, {}
+
+    def _run_handler(self, handler, params: Dict[str, str], command: str) -> Dict[str, Any]:
+        """
+        Run one command's handler, timing it per command type
+        """
+        command_type = handler.__name__[len('_handle_'):] if handler else 'custom'
+        status = 'error'
+        start = time.perf_counter()
+        try:
+            result = handler(params) if handler else self._handle_custom_command(command)
+            status = 'success' if result.get('success') else 'failure'
+            return result
+        finally:
+            metrics.observe('lightroom_command_seconds', time.perf_counter() - start, command=command_type)
+            metrics.increment('lightroom_commands_total', command=command_type, status=status)
+
     def process_command(self, command: str) -> Dict[str, Any]:
         """
         Process a natural language command and execute corresponding Lightroom actions
         """
+        if self.recorder is not None:
+            return self.recorder.record_command({'command': command}, lambda: self._process_command(command))
+        return self._process_command(command)
+
+    def _process_command(self, command: str) -> Dict[str, Any]:
         try:
             command = command.lower().strip()
             
             # Try to match command against known patterns
-            for pattern, handler in self.command_patterns.items():
-                match = re.match(pattern, command)
-                if match:
-                    return handler(match.groupdict())
-            
-            # If no pattern matches, try to interpret as a custom command
-            return self._handle_custom_command(command)
+            # Unmatched commands fall through to the custom command handler
+            handler, params = self.parse_command(command)
+            # The screen may have changed since the last command (user or Lightroom)
+            self.lightroom_controller.invalidate_frame()
+            return self._run_handler(handler, params, command)
             
         except Exception as e:
             self.logger.error(f"Error processing command '{command}': {str(e)}")
@@ -41,6 +135,101 @@ class ChatCommandProcessor:
                 'command': command
             }
 
+    def process_batch(self, commands: List[str], stop_on_error: bool = True,
+                      progress_callback=None) -> Dict[str, Any]:
+        """
+        Process a list of commands as one macro.
+        All commands are parsed up front and the UI elements they need are located
+        in a single pass over one frame; the actions then run in order.
+        progress_callback(done, total, result) is called after each command.
+        """
+        if self.recorder is not None:
+            return self.recorder.record_command(
+                {'batch': commands, 'stop_on_error': stop_on_error},
+                lambda: self._process_batch(commands, stop_on_error, progress_callback)
+            )
+        return self._process_batch(commands, stop_on_error, progress_callback)
+
+    def _process_batch(self, commands: List[str], stop_on_error: bool,
+                       progress_callback=None) -> Dict[str, Any]:
+        try:
+            parsed = []
+            for command in commands:
+                command = command.lower().strip()
+                handler, params = self.parse_command(command)
+                parsed.append((command, handler, params))
+
+            # Bursts of adjustments to one parameter only need their final value
+            superseded = self._coalesce(parsed)
+
+            # Plan: collect every element needed on the starting screen, in order
+            self.lightroom_controller.invalidate_frame()
+            elements = []
+            for i, (_, handler, params) in enumerate(parsed):
+                if i in superseded:
+                    continue
+                requirement = self.element_requirements.get(handler)
+                if requirement:
+                    for element in requirement(params):
+                        if element not in elements:
+                            elements.append(element)
+            located = self.lightroom_controller.locate_many(elements) if elements else {}
+
+            results = []
+            failed = False
+            for i, (command, handler, params) in enumerate(parsed):
+                if i in superseded:
+                    # Filled in with the outcome of the adjustment that replaced it
+                    results.append({
+                        'success': None,
+                        'command': command,
+                        'coalesced': True,
+                        'superseded_by': parsed[superseded[i]][0],
+                        'message': f"Merged into a later adjustment of {params['parameter']}"
+                    })
+                    if progress_callback:
+                        progress_callback(len(results), len(parsed), results[-1])
+                    continue
+                if failed and stop_on_error:
+                    results.append({
+                        'success': False,
+                        'command': command,
+                        'skipped': True,
+                        'error': 'Skipped after an earlier command failed'
+                    })
+                    if progress_callback:
+                        progress_callback(len(results), len(parsed), results[-1])
+                    continue
+                try:
+                    result = self._run_handler(handler, params, command)
+                except Exception as e:
+                    result = {'success': False, 'error': str(e)}
+                result['command'] = command
+                failed = failed or not result.get('success')
+                results.append(result)
+                if progress_callback:
+                    progress_callback(len(results), len(parsed), result)
+
+            for i, replacement in superseded.items():
+                outcome = results[replacement]
+                results[i]['success'] = bool(outcome.get('success'))
+                if not outcome.get('success'):
+                    results[i]['error'] = outcome.get('error') or 'The adjustment it was merged into failed'
+
+            return {
+                'success': not failed,
+                'action': 'batch',
+                'results': results,
+                'prefetched_elements': sorted(located)
+            }
+        except Exception as e:
+            self.logger.error(f"Error processing command batch: {str(e)}")
+            return {
+                'success': False,
+                'action': 'batch',
+                'error': f"Failed to process batch: {str(e)}"
+            }
+
     def _handle_adjustment(self, params: Dict[str, str]) -> Dict[str, Any]:
         """
         Handle adjustment commands like "adjust exposure to 1.5"
@@ -48,8 +237,29 @@ class ChatCommandProcessor:
         try:
             parameter = params['parameter']
             value = float(params['value'])
+            # Lightroom clamps out-of-range values, so record and report what the slider will hold
+            model = self.lightroom_controller.sliders.get(parameter)
+            if model is not None:
+                value = model.clamp(value)
+
+            # No-op elimination: skip the GUI entirely if we know it already holds
+            if self.edit_state.is_satisfied(parameter, value, self._tolerance(parameter)):
+                return {
+                    'success': True,
+                    'action': 'adjustment',
+                    'parameter': parameter,
+                    'value': value,
+                    'skipped': True,
+                    'message': f"{parameter} is already {value}"
+                }
             
             success = self.lightroom_controller.adjust_slider(parameter, value)
+            if success and model is not None:
+                self.edit_state.apply_adjustment(parameter, value)
+            else:
+                # Uncalibrated sliders are dragged open-loop and never read back, so a
+                # repeated command must not be skipped as already satisfied
+                self.edit_state.forget(parameter)
             
             return {
                 'success': success,
@@ -73,6 +283,8 @@ class ChatCommandProcessor:
         try:
             preset_name = params['preset_name']
             success = self.lightroom_controller.apply_preset(preset_name)
+            if success:
+                self.edit_state.apply_preset(preset_name)
             
             return {
                 'success': success,
@@ -88,6 +300,28 @@ class ChatCommandProcessor:
                 'error': str(e)
             }
 
+    def _handle_scan_presets(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Handle rebuilding the preset catalog
+        """
+        try:
+            success = self.lightroom_controller.scan_presets()
+            count = len(self.lightroom_controller.preset_catalog.presets)
+            
+            return {
+                'success': success,
+                'action': 'scan_presets',
+                'presets': count,
+                'message': f"Found {count} presets" if success else "Failed to scan presets"
+            }
+        except Exception as e:
+            self.logger.error(f"Error scanning presets: {str(e)}")
+            return {
+                'success': False,
+                'action': 'scan_presets',
+                'error': str(e)
+            }
+
     def _handle_export(self, params: Dict[str, str]) -> Dict[str, Any]:
         """
         Handle export commands with optional settings
@@ -122,8 +356,10 @@ class ChatCommandProcessor:
         Handle undo commands
         """
         try:
-            # Simulate Ctrl+Z or Command+Z
-            success = self.lightroom_controller.click_element("Undo")
+            # Ctrl+Z or Command+Z, clicking Undo only if no hotkey is bound
+            success = self.lightroom_controller.perform_action('undo', "Undo")
+            if success:
+                self.edit_state.undo()
             
             return {
                 'success': success,
@@ -143,8 +379,10 @@ class ChatCommandProcessor:
         Handle reset commands
         """
         try:
-            # Click reset button
-            success = self.lightroom_controller.click_element("Reset")
+            # Reset shortcut, clicking the Reset button only if no hotkey is bound
+            success = self.lightroom_controller.perform_action('reset', "Reset")
+            if success:
+                self.edit_state.reset()
             
             return {
                 'success': success,
@@ -159,6 +397,52 @@ class ChatCommandProcessor:
                 'error': str(e)
             }
 
+    def _handle_redo(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Handle redo commands
+        """
+        try:
+            success = self.lightroom_controller.perform_action('redo', "Redo")
+            if success:
+                self.edit_state.redo()
+            
+            return {
+                'success': success,
+                'action': 'redo',
+                'message': "Redo successful" if success else "Redo failed"
+            }
+        except Exception as e:
+            self.logger.error(f"Error handling redo: {str(e)}")
+            return {
+                'success': False,
+                'action': 'redo',
+                'error': str(e)
+            }
+
+    def _handle_navigate(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Handle moving to the next or previous photo
+        """
+        try:
+            direction = params['direction']
+            success = self.lightroom_controller.perform_action(f"{direction}_photo")
+            if success:
+                self.edit_state.clear()
+            
+            return {
+                'success': success,
+                'action': 'navigate',
+                'direction': direction,
+                'message': f"Moved to {direction} photo" if success else f"Failed to move to {direction} photo"
+            }
+        except Exception as e:
+            self.logger.error(f"Error handling navigation: {str(e)}")
+            return {
+                'success': False,
+                'action': 'navigate',
+                'error': str(e)
+            }
+
     def _handle_help(self, params: Dict[str, str]) -> Dict[str, Any]:
         """
         Handle help commands
@@ -167,10 +451,13 @@ class ChatCommandProcessor:
         Available commands:
         - adjust [parameter] to [value]: Adjust a slider (e.g., "adjust exposure to 1.5")
         - apply preset [name]: Apply a preset
+        - scan presets: Rebuild the preset catalog
         - export: Export the current photo
         - export with [settings]: Export with specific settings
         - undo: Undo last action
+        - redo: Redo last undone action
         - reset: Reset all adjustments
+        - next / previous: Move to the next or previous photo
         - help: Show this help message
         """
         
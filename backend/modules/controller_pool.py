@@ -0,0 +1,237 @@
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict, deque
+from .chat_commands import ChatCommandProcessor
+from .job_queue import JobQueue
+from .lightroom_controller import LightroomController
+from .metrics import metrics
+
+# Learned state copied from the shared data directory into a new worker's own
+SEEDED_STATE = ('slider_calibration.json', 'panel_layout.json', 'preset_catalog.json', 'templates')
+
+
+class PoolWorker:
+    """
+    One display with its own controller (capture and input backends,
+    OCRProcessor, element cache) and its own GUI executor, so workers never
+    share a screen or a mouse. Learned state is kept in the worker's own data
+    directory, seeded from the shared one on first start, so workers never
+    write the same files.
+    """
+
+    def __init__(self, index, display, utilisation_window=60.0, data_dir=os.path.join('data', 'workers'),
+                 seed_dir='data'):
+        self.logger = logging.getLogger(__name__)
+        self.index = index
+        self.name = f"worker-{index}"
+        self.display = display
+        self.data_dir = os.path.join(data_dir, self.name)
+        self.seed_dir = seed_dir
+        self.utilisation_window = utilisation_window
+        self.controller = None
+        self.chat_processor = None
+        self.queue = JobQueue(name=f"gui-executor-{index}")
+        self.sessions = 0
+        self.jobs_completed = 0
+        self.busy_seconds = 0.0
+        self.started_at = None
+        self._busy_since = None
+        # (start, end) of recent jobs, for utilisation over the window
+        self._intervals = deque()
+        self._lock = threading.Lock()
+
+    def _seed_data(self):
+        os.makedirs(self.data_dir, exist_ok=True)
+        for name in SEEDED_STATE:
+            source = os.path.join(self.seed_dir, name)
+            target = os.path.join(self.data_dir, name)
+            if os.path.exists(target) or not os.path.exists(source):
+                continue
+            if os.path.isdir(source):
+                shutil.copytree(source, target)
+            else:
+                shutil.copy2(source, target)
+
+    def start(self):
+        self.display.start()
+        self._seed_data()
+        self.controller = LightroomController(
+            capture_backend=self.display.capture_backend(),
+            input_backend=self.display.input_backend(),
+            data_dir=self.data_dir,
+            # The training dataset is only read, so all workers share it
+            dataset_dir=os.path.join(self.seed_dir, 'dataset')
+        )
+        self.chat_processor = ChatCommandProcessor(self.controller)
+        self.started_at = time.monotonic()
+
+    def stop(self):
+        if self.controller is not None:
+            self.controller.ocr.close()
+            self.controller.capture.close()
+            self.controller.input.close()
+        self.display.stop()
+
+    def run(self, job, func):
+        """
+        Run func(job, chat_processor) on this worker's executor thread, timing it as busy
+        """
+        start = time.monotonic()
+        with self._lock:
+            self._busy_since = start
+        try:
+            return func(job, self.chat_processor)
+        finally:
+            end = time.monotonic()
+            with self._lock:
+                self._busy_since = None
+                self.busy_seconds += end - start
+                self.jobs_completed += 1
+                self._intervals.append((start, end))
+                self._trim(end)
+            metrics.increment('lightroom_pool_busy_seconds_total', end - start, worker=self.name)
+            metrics.increment('lightroom_pool_jobs_total', worker=self.name)
+
+    def _trim(self, now):
+        while self._intervals and self._intervals[0][1] < now - self.utilisation_window:
+            self._intervals.popleft()
+
+    def utilisation(self):
+        """
+        Fraction of the last utilisation_window seconds spent running jobs
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            window_start = max(now - self.utilisation_window, self.started_at or now)
+            busy = sum(end - max(start, window_start) for start, end in self._intervals)
+            if self._busy_since is not None:
+                busy += now - max(self._busy_since, window_start)
+        elapsed = now - window_start
+        return min(busy / elapsed, 1.0) if elapsed > 0 else 0.0
+
+    def status(self):
+        with self._lock:
+            busy = self._busy_since is not None
+            uptime = time.monotonic() - self.started_at if self.started_at else 0.0
+            busy_seconds = self.busy_seconds
+        return {
+            'worker': self.name,
+            'display': self.display.describe(),
+            'busy': busy,
+            'load': self.queue.load(),
+            'sessions': self.sessions,
+            'jobs_completed': self.jobs_completed,
+            'busy_seconds': busy_seconds,
+            'utilisation': self.utilisation(),
+            'lifetime_utilisation': busy_seconds / uptime if uptime > 0 else 0.0
+        }
+
+
+class ControllerPool:
+    """
+    Runs commands and batches on several workers, one display each.
+
+    A job with a session always goes to the worker that served that session
+    first, since the state it depends on (open photo, edit history, dialogs)
+    lives in that worker's Lightroom. Jobs without a session, and new
+    sessions, go to the least loaded worker (queued plus running jobs),
+    breaking ties by the least busy time. Within a worker, jobs run in order
+    and adjustments coalesce as in the single-controller JobQueue.
+    Mirrors the JobQueue interface, so callers can use either.
+    """
+
+    def __init__(self, displays, max_sessions=1000, utilisation_window=60.0, data_dir=os.path.join('data', 'workers')):
+        self.logger = logging.getLogger(__name__)
+        self.workers = [PoolWorker(index, display, utilisation_window, data_dir)
+                        for index, display in enumerate(displays)]
+        if not self.workers:
+            raise ValueError('A controller pool needs at least one display')
+        self.max_sessions = max_sessions
+        self._affinity = OrderedDict()  # Session id -> worker, least recently used first
+        self._lock = threading.Lock()
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+        self.logger.info(f"Controller pool started with {len(self.workers)} workers")
+        return self
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
+
+    def _choose(self, session=None):
+        with self._lock:
+            if session is not None:
+                worker = self._affinity.get(session)
+                if worker is not None:
+                    self._affinity.move_to_end(session)
+                    return worker
+            worker = min(self.workers, key=lambda w: (w.queue.load(), w.busy_seconds))
+            if session is not None:
+                self._affinity[session] = worker
+                worker.sessions += 1
+                while len(self._affinity) > self.max_sessions:
+                    _, expired = self._affinity.popitem(last=False)
+                    expired.sessions -= 1
+            return worker
+
+    def worker_for(self, session):
+        """
+        The worker bound to a session, or None
+        """
+        with self._lock:
+            return self._affinity.get(session)
+
+    def submit(self, kind, payload, func, coalesce_key=None, session=None):
+        """
+        Queue func(job, chat_processor) on a worker and return the job immediately
+        """
+        worker = self._choose(session)
+        payload = dict(payload, worker=worker.name)
+        return worker.queue.submit(kind, payload, lambda job: worker.run(job, func), coalesce_key=coalesce_key)
+
+    def _owner(self, job):
+        # A handful of workers, each with a bounded history: a scan is cheap
+        return next((worker for worker in self.workers if worker.queue.get(job.id) is job), None)
+
+    def get(self, job_id):
+        for worker in self.workers:
+            job = worker.queue.get(job_id)
+            if job is not None:
+                return job
+        return None
+
+    def list(self):
+        jobs = [job for worker in self.workers for job in worker.queue.list()]
+        return sorted(jobs, key=lambda job: job['created_at'])
+
+    def queue_position(self, job):
+        worker = self._owner(job)
+        return worker.queue.queue_position(job) if worker else -1
+
+    def report(self, job, progress=None, message=None):
+        worker = self._owner(job)
+        if worker:
+            worker.queue.report(job, progress, message)
+
+    def wait_for_update(self, job, version, timeout=15.0):
+        worker = self._owner(job)
+        return worker.queue.wait_for_update(job, version, timeout) if worker else job.version
+
+    def coalesce_key(self, command):
+        # Parsing does not touch the screen, so any worker's processor will do
+        return self.workers[0].chat_processor.coalesce_key(command)
+
+    def status(self):
+        workers = [worker.status() for worker in self.workers]
+        return {
+            'workers': workers,
+            'sessions': len(self._affinity),
+            'utilisation': sum(worker['utilisation'] for worker in workers) / len(workers),
+            'queued': sum(worker['load'] - worker['busy'] for worker in workers)
+        }
@@ -0,0 +1,131 @@
+import copy
+import logging
+import threading
+
+# Develop settings Lightroom restores to zero on reset; white balance returns
+# to "As Shot", which we cannot know without reading the screen
+RESET_TO_ZERO = ['exposure', 'contrast', 'highlights', 'shadows', 'whites', 'blacks',
+                 'texture', 'clarity', 'dehaze', 'vibrance', 'saturation']
+
+
+class EditState:
+    """
+    Shadow model of the current photo's develop settings, as far as we know them.
+    A parameter missing from settings is unknown. Every change pushes the previous
+    snapshot so undo/redo can be mirrored without looking at the screen.
+    """
+
+    def __init__(self, max_history=100):
+        self.logger = logging.getLogger(__name__)
+        self.max_history = max_history
+        self.settings = {}
+        self.preset = None
+        self.undo_stack = []
+        self.redo_stack = []
+        self._lock = threading.Lock()
+
+    def _snapshot(self):
+        return {'settings': dict(self.settings), 'preset': self.preset}
+
+    def _push(self):
+        self.undo_stack.append(self._snapshot())
+        del self.undo_stack[:-self.max_history]
+        self.redo_stack.clear()
+
+    def get(self, parameter):
+        with self._lock:
+            return self.settings.get(parameter.lower())
+
+    def is_satisfied(self, parameter, value, tolerance=0.0):
+        """
+        Whether the parameter is already known to hold the value
+        """
+        current = self.get(parameter)
+        return current is not None and abs(current - value) <= tolerance
+
+    def apply_adjustment(self, parameter, value):
+        with self._lock:
+            self._push()
+            self.settings[parameter.lower()] = value
+
+    def forget(self, parameter):
+        """
+        Mark a parameter unknown, e.g. after an adjustment failed half way
+        """
+        with self._lock:
+            self.settings.pop(parameter.lower(), None)
+
+    def apply_preset(self, preset_name):
+        # A preset can change any setting, so everything becomes unknown
+        with self._lock:
+            self._push()
+            self.settings = {}
+            self.preset = preset_name
+
+    def reset(self):
+        with self._lock:
+            self._push()
+            self.settings = {name: 0 for name in RESET_TO_ZERO}
+            self.preset = None
+
+    def undo(self):
+        with self._lock:
+            if not self.undo_stack:
+                # Undoing something we never saw; we no longer know the state
+                self.settings = {}
+                self.preset = None
+                return
+            self.redo_stack.append(self._snapshot())
+            previous = self.undo_stack.pop()
+            self.settings = previous['settings']
+            self.preset = previous['preset']
+
+    def redo(self):
+        with self._lock:
+            if not self.redo_stack:
+                self.settings = {}
+                self.preset = None
+                return
+            self.undo_stack.append(self._snapshot())
+            following = self.redo_stack.pop()
+            self.settings = following['settings']
+            self.preset = following['preset']
+
+    def clear(self):
+        """
+        Forget everything, e.g. when switching to another photo
+        """
+        with self._lock:
+            self.settings = {}
+            self.preset = None
+            self.undo_stack.clear()
+            self.redo_stack.clear()
+
+    def export(self):
+        """
+        Full state including the undo and redo stacks, for restore()
+        """
+        with self._lock:
+            return copy.deepcopy({
+                'settings': self.settings,
+                'preset': self.preset,
+                'undo_stack': self.undo_stack,
+                'redo_stack': self.redo_stack
+            })
+
+    def restore(self, state):
+        with self._lock:
+            state = copy.deepcopy(state)
+            self.settings = state['settings']
+            self.preset = state['preset']
+            self.undo_stack = state['undo_stack']
+            self.redo_stack = state['redo_stack']
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                'settings': copy.deepcopy(self.settings),
+                'preset': self.preset,
+                'undo_depth': len(self.undo_stack),
+                'redo_depth': len(self.redo_stack)
+            }
@@ -0,0 +1,83 @@
+import logging
+import zlib
+import cv2
+from .frame import normalize_text
+
+
+def patch_hash(gray, location, size=(32, 16)):
+    """
+    Cheap fingerprint of the pixels around a location: the patch is shrunk to
+    16x8 and quantized to 16 levels, so only visible changes alter the hash
+    """
+    x, y = int(location[0]), int(location[1])
+    half_w, half_h = size[0] // 2, size[1] // 2
+    height, width = gray.shape[:2]
+    patch = gray[max(y - half_h, 0):min(y + half_h, height), max(x - half_w, 0):min(x + half_w, width)]
+    if patch.size == 0:
+        return None
+    small = cv2.resize(patch, (16, 8), interpolation=cv2.INTER_AREA)
+    return zlib.crc32((small >> 4).tobytes())
+
+
+class ElementCache:
+    """
+    Remembers where UI elements were found, keyed by element name, panel and
+    screenshot region, since one label can appear in several panels (e.g.
+    "Export" in the toolbar and in the export dialog). An entry is trusted only while the pixel patch at its location still
+    hashes the same as when it was stored.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    @staticmethod
+    def _key(element_name, region, panel=None):
+        return (normalize_text(element_name), panel, tuple(region) if region else None)
+
+    def get(self, element_name, region, gray, panel=None):
+        """
+        Return the cached frame location if its patch is visually unchanged
+        """
+        key = self._key(element_name, region, panel)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        location, stored_hash = entry
+        if patch_hash(gray, location) != stored_hash:
+            del self.entries[key]
+            self.stale += 1
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return location
+
+    def put(self, element_name, region, gray, location, panel=None):
+        self.entries[self._key(element_name, region, panel)] = (location, patch_hash(gray, location))
+
+    def invalidate(self, element_name=None):
+        """
+        Drop one element in every panel, or every entry when no name is given
+        """
+        if element_name is None:
+            self.entries.clear()
+            return
+        name = normalize_text(element_name)
+        for key in [key for key in self.entries if key[0] == name]:
+            del self.entries[key]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,169 @@
+import logging
+import cv2
+from .metrics import metrics
+
+
+class Frame:
+    """
+    A single captured screenshot with lazily memoized processing layers.
+
+    Every layer (gray, binary, OCR data, word lines) is computed at most once,
+    so any number of lookups against the same screen share one Tesseract run.
+    """
+
+    def __init__(self, pixels, ocr_processor, ocr_config=None, key=None, offset=(0, 0), gray=None):
+        self.logger = logging.getLogger(__name__)
+        self.pixels = pixels
+        self.ocr = ocr_processor
+        # Tesseract settings for this frame (None uses the processor default)
+        self.ocr_config = ocr_config
+        # Identifies the same screen area across captures, e.g. a panel name
+        self.key = key
+        # Position of this frame inside the full screenshot; boxes are reported in full-frame coordinates
+        self.offset = offset
+        self._gray = gray
+        self._binary = None
+        self._data = None
+        self._line_words = None
+        self._panels = {}
+
+    @property
+    def shape(self):
+        return self.pixels.shape
+
+    @property
+    def gray(self):
+        """
+        Grayscale layer of the raw pixels
+        """
+        if self._gray is None:
+            with metrics.stage('gray'):
+                self._gray = to_gray(self.pixels)
+        return self._gray
+
+    @property
+    def binary(self):
+        """
+        Otsu thresholded and median denoised layer used for OCR
+        """
+        if self._binary is None:
+            self._binary = self.ocr.preprocess_image(self.gray)
+        return self._binary
+
+    @property
+    def data(self):
+        """
+        OCRResult of the whole frame
+        """
+        if self._data is None:
+            if self.binary is None:
+                return None
+            self._data = self.ocr.ocr_frame(self)
+        return self._data
+
+    @property
+    def has_data(self):
+        """
+        Whether OCR has already run on this frame
+        """
+        return self._data is not None
+
+    def panel(self, name, rect, ocr_config=None):
+        """
+        Memoized sub-frame for a screen area (left, top, right, bottom) with its own
+        OCR settings, so each panel is OCR'd at most once per screenshot
+        """
+        key = (name, tuple(rect), ocr_config)
+        sub_frame = self._panels.get(key)
+        if sub_frame is None:
+            left, top, right, bottom = rect
+            sub_frame = Frame(
+                self.pixels[top:bottom, left:right],
+                self.ocr,
+                ocr_config=ocr_config,
+                key=name,
+                offset=(self.offset[0] + left, self.offset[1] + top),
+                gray=self.gray[top:bottom, left:right]
+            )
+            self._panels[key] = sub_frame
+        return sub_frame
+
+    def lookup(self, text, min_conf=None):
+        """
+        Return all boxes matching the given word, optionally above a confidence
+        """
+        data = self.data
+        if data is None:
+            return []
+        indices = data.find(text)
+        if min_conf is not None:
+            indices = indices[data.words['conf'][indices] >= min_conf]
+        return [self._word(data, index) for index in indices]
+
+    def _word(self, data, index):
+        word = data.words[index]
+        return {
+            'text': data.texts[word['text']],
+            'token': data.tokens[word['token']],
+            'left': int(word['left']) + self.offset[0],
+            'top': int(word['top']) + self.offset[1],
+            'width': int(word['width']),
+            'height': int(word['height']),
+            'conf': float(word['conf'])
+        }
+
+    def line_words(self):
+        """
+        Recognized words grouped into Tesseract lines, in reading order.
+        Each word is a dict with text, normalized token, left, top, width, height and conf.
+        """
+        if self._line_words is not None:
+            return self._line_words
+        data = self.data
+        if data is None:
+            return []
+        lines = [[self._word(data, index) for index in group] for group in data.line_groups()]
+        self._line_words = lines
+        return lines
+
+    def line_boxes(self):
+        """
+        Merged box, text and mean confidence of each recognized line, in reading order
+        """
+        boxes = []
+        for words in self.line_words():
+            left = min(word['left'] for word in words)
+            top = min(word['top'] for word in words)
+            boxes.append({
+                'text': ' '.join(word['text'] for word in words),
+                'left': left,
+                'top': top,
+                'width': max(word['left'] + word['width'] for word in words) - left,
+                'height': max(word['top'] + word['height'] for word in words) - top,
+                'conf': sum(word['conf'] for word in words) / len(words)
+            })
+        return boxes
+
+    def lines(self):
+        """
+        Reconstruct the recognized text as a list of lines in reading order
+        """
+        return [line['text'] for line in self.line_boxes()]
+
+
+def to_gray(pixels):
+    """
+    Convert captured pixels (gray, 3-channel or 4-channel) to a grayscale array
+    """
+    if len(pixels.shape) == 3 and pixels.shape[2] == 4:
+        return cv2.cvtColor(pixels, cv2.COLOR_BGRA2GRAY)
+    if len(pixels.shape) == 3:
+        return cv2.cvtColor(pixels, cv2.COLOR_BGR2GRAY)
+    return pixels
+
+
+def normalize_text(text):
+    """
+    Normalize an OCR token or lookup key for comparison
+    """
+    return str(text).strip().casefold()
@@ -0,0 +1,115 @@
+import logging
+import threading
+import time
+
+
+class HealthMonitor:
+    """
+    Runs health probes (e.g. Tesseract, Lightroom) on a background thread and
+    caches each result for ttl seconds, so status reads never block on a probe.
+    Probes must be read-only: they run outside the GUI executor.
+    """
+
+    def __init__(self, ttl=30.0):
+        self.logger = logging.getLogger(__name__)
+        self.ttl = ttl
+        self._probes = {}
+        self._results = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def register(self, name, probe):
+        """
+        Add a probe: a callable returning True when the component is healthy
+        """
+        self._probes[name] = probe
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='health-monitor', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+
+    def refresh(self):
+        """
+        Re-run every probe now instead of waiting for the TTL to expire
+        """
+        with self._lock:
+            self._results = {name: dict(result, expired=True) for name, result in self._results.items()}
+        self._wake.set()
+
+    def probe(self, name):
+        """
+        Run one probe synchronously and cache its result
+        """
+        start = time.perf_counter()
+        try:
+            ok, error = bool(self._probes[name]()), None
+        except Exception as e:
+            ok, error = False, str(e)
+            self.logger.warning(f"Health probe '{name}' failed: {error}")
+        result = {
+            'ok': ok,
+            'error': error,
+            'checked_at': time.time(),
+            'latency_ms': (time.perf_counter() - start) * 1000
+        }
+        with self._lock:
+            self._results[name] = result
+        return result
+
+    def _due(self):
+        """
+        Probes without a fresh result, and seconds until the next one falls due
+        """
+        now = time.time()
+        due = []
+        wait = self.ttl
+        with self._lock:
+            for name in self._probes:
+                result = self._results.get(name)
+                if result is None or result.get('expired'):
+                    due.append(name)
+                    continue
+                remaining = result['checked_at'] + self.ttl - now
+                if remaining <= 0:
+                    due.append(name)
+                else:
+                    wait = min(wait, remaining)
+        return due, wait
+
+    def _run(self):
+        while not self._stopped.is_set():
+            due, wait = self._due()
+            for name in due:
+                self.probe(name)
+            if due:
+                continue
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    def ok(self, name):
+        """
+        Cached result of a probe; None until it has run once
+        """
+        with self._lock:
+            result = self._results.get(name)
+        return result['ok'] if result else None
+
+    def status(self):
+        """
+        Cached result of every probe with its age in seconds
+        """
+        now = time.time()
+        with self._lock:
+            results = {name: dict(result) for name, result in self._results.items()}
+        for name in self._probes:
+            result = results.setdefault(name, {'ok': None, 'error': None, 'checked_at': None})
+            result['age_s'] = now - result['checked_at'] if result['checked_at'] else None
+            result.pop('expired', None)
+        return results
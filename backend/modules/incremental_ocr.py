@@ -0,0 +1,195 @@
+import cv2
+import numpy as np
+from .ocr_result import OCRResult
+
+
+def changed_tiles(previous, current, tile_size):
+    """
+    Compare two equally sized grayscale images tile by tile.
+    Returns a boolean grid with one cell per tile, True where any pixel differs.
+    """
+    height, width = current.shape[:2]
+    rows = -(-height // tile_size)
+    cols = -(-width // tile_size)
+    diff = previous != current
+    if diff.ndim == 3:
+        diff = diff.any(axis=2)
+
+    # Pad to a whole number of tiles so the grid can be reduced in one reshape
+    padded = np.zeros((rows * tile_size, cols * tile_size), dtype=bool)
+    padded[:height, :width] = diff
+    return padded.reshape(rows, tile_size, cols, tile_size).any(axis=(1, 3))
+
+
+def dirty_rects(grid, tile_size, shape):
+    """
+    Merge adjacent changed tiles into pixel rectangles (left, top, right, bottom)
+    """
+    height, width = shape[:2]
+    count, _, stats, _ = cv2.connectedComponentsWithStats(grid.astype(np.uint8), connectivity=8)
+    rects = []
+    for label in range(1, count):
+        col, row, cols, rows = stats[label][:4]
+        rects.append((
+            int(col * tile_size),
+            int(row * tile_size),
+            int(min((col + cols) * tile_size, width)),
+            int(min((row + rows) * tile_size, height))
+        ))
+    return rects
+
+
+def expand_to_lines(rects, data, shape, margin=4):
+    """
+    Grow each dirty rectangle to cover every previously recognized text line it
+    cuts through, so the re-OCR'd crop sees whole lines and multi-word labels stay
+    on one line. Repeats until merged rectangles cut no further lines.
+    """
+    height, width = shape[:2]
+    words = data.words
+    line_ids = _line_ids(words)
+    rects = list(rects)
+    while True:
+        expanded = []
+        for rect in rects:
+            left, top, right, bottom = rect
+            cut = np.isin(line_ids, np.unique(line_ids[data.intersecting(rect)]))
+            if cut.any():
+                lines = words[cut]
+                left = min(left, int(lines['left'].min()) - margin)
+                top = min(top, int(lines['top'].min()) - margin)
+                right = max(right, int((lines['left'] + lines['width']).max()) + margin)
+                bottom = max(bottom, int((lines['top'] + lines['height']).max()) + margin)
+            expanded.append((max(left, 0), max(top, 0), min(right, width), min(bottom, height)))
+        expanded = union_overlapping(expanded)
+        if expanded == rects:
+            return expanded
+        rects = expanded
+
+
+def _line_ids(words):
+    """
+    One integer per word identifying its (block, par, line)
+    """
+    if not len(words):
+        return np.zeros(0, dtype=np.int64)
+    keys = np.stack([words['block'], words['par'], words['line']], axis=1)
+    return np.unique(keys, axis=0, return_inverse=True)[1].reshape(-1)
+
+
+def union_overlapping(rects):
+    """
+    Merge rectangles that overlap after expansion so no region is OCR'd twice
+    """
+    rects = list(rects)
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(rects)):
+            for j in range(i + 1, len(rects)):
+                a, b = rects[i], rects[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    rects[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    del rects[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return rects
+
+
+def merge_data(previous, crops, rects):
+    """
+    Keep previous words outside every dirty rectangle and add the words found in
+    each re-OCR'd crop, shifted back to frame coordinates.
+    A crop line that sits on a previous line (usually the one it replaces) takes
+    its ids, one inside a previous block joins that block; otherwise it starts a
+    new block. Words are then put back in reading order: blocks in their previous
+    order (new ones by position), lines top to bottom within a block, words left
+    to right within a line.
+    """
+    keep = np.ones(len(previous), dtype=bool)
+    for rect in rects:
+        keep &= ~previous.intersecting(rect)
+    kept = previous.select(keep)
+
+    next_block = int(previous.words['block'].max()) + 1 if len(previous) else 1
+    parts = [kept]
+    for crop, (left, top, _, _) in zip(crops, rects):
+        parts.append(crop.shifted(left, top, next_block))
+        next_block += int(crop.words['block'].max()) + 1 if len(crop) else 1
+    merged = OCRResult.concatenate(parts)
+    if not len(merged):
+        return merged
+    words = merged.words.copy()
+    _attach_to_previous(words, len(kept), previous.words)
+    words = words[_reading_order(words, previous.words)]
+    result = OCRResult(words, merged.texts, merged.tokens)
+    result._token_ids = merged._token_ids
+    return result
+
+
+def _bounds(words):
+    return (int(words['left'].min()), int(words['top'].min()),
+            int((words['left'] + words['width']).max()), int((words['top'] + words['height']).max()))
+
+
+def _attach_to_previous(words, kept_count, previous):
+    """
+    Give each new line the ids of the previous line or block it overlaps
+    """
+    previous_lines = _line_ids(previous)
+    lines = [(previous[previous_lines == index][0], _bounds(previous[previous_lines == index]))
+             for index in range(int(previous_lines.max()) + 1 if len(previous) else 0)]
+    blocks = {}
+    for first, (left, top, right, bottom) in lines:
+        bounds = blocks.get(first['block'])
+        blocks[first['block']] = (left, top, right, bottom) if bounds is None else (
+            min(bounds[0], left), min(bounds[1], top), max(bounds[2], right), max(bounds[3], bottom))
+    next_line = {block: int(previous['line'][previous['block'] == block].max()) + 1 for block in blocks}
+
+    new = words[kept_count:]
+    new_lines = _line_ids(new)
+    for index in range(int(new_lines.max()) + 1 if len(new) else 0):
+        selection = kept_count + np.flatnonzero(new_lines == index)
+        left, top, right, bottom = _bounds(words[selection])
+        center_y = (top + bottom) / 2
+        line_height = bottom - top
+        target = None
+        for first, (l_left, l_top, l_right, l_bottom) in lines:
+            # Same row, and close enough horizontally to be the same line
+            if l_top <= center_y <= l_bottom and left <= l_right + line_height * 2 and right >= l_left - line_height * 2:
+                target = (first['block'], first['par'], first['line'])
+                break
+        if target is None:
+            for block, (b_left, b_top, b_right, b_bottom) in blocks.items():
+                if b_left <= (left + right) / 2 <= b_right and b_top <= center_y <= b_bottom:
+                    par = previous['par'][previous['block'] == block][0]
+                    target = (block, par, next_line[block])
+                    next_line[block] += 1
+                    break
+        if target is not None:
+            words['block'][selection], words['par'][selection], words['line'][selection] = target
+
+
+def _reading_order(words, previous):
+    """
+    Indices that sort words into blocks, lines and positions
+    """
+    line_ids = _line_ids(words)
+    line_top = np.full(int(line_ids.max()) + 1, np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(line_top, line_ids, words['top'].astype(np.int64))
+
+    # Previous blocks keep their order; new blocks follow, top to bottom
+    block_rank = {}
+    for block in previous['block']:
+        block_rank.setdefault(int(block), len(block_rank))
+    new_blocks = {}
+    for index in range(len(words)):
+        block = int(words['block'][index])
+        if block not in block_rank:
+            new_blocks[block] = min(new_blocks.get(block, np.iinfo(np.int64).max), int(words['top'][index]))
+    for block in sorted(new_blocks, key=lambda block: (new_blocks[block], block)):
+        block_rank[block] = len(block_rank)
+    ranks = np.array([block_rank[int(block)] for block in words['block']], dtype=np.int64)
+    return np.lexsort((words['left'], line_ids, line_top[line_ids], ranks))
@@ -0,0 +1,242 @@
+import ctypes
+import ctypes.util
+import logging
+import time
+from .metrics import metrics
+
+
+class InputBackend:
+    """
+    Base class for mouse and keyboard input.
+    Method names and arguments follow pyautogui, which the default backend wraps.
+    Every event goes through _send(name, *args), timed as the 'input' stage.
+    """
+
+    name = 'base'
+
+    def _timed(self, name, *args):
+        with metrics.stage('input'):
+            self._send(name, *args)
+
+    def _send(self, name, *args):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def click(self, x, y):
+        self._timed('click', x, y)
+
+    def doubleClick(self, x, y):
+        self._timed('doubleClick', x, y)
+
+    def moveTo(self, x, y):
+        self._timed('moveTo', x, y)
+
+    def mouseDown(self):
+        self._timed('mouseDown')
+
+    def mouseUp(self):
+        self._timed('mouseUp')
+
+    def scroll(self, clicks, x=None, y=None):
+        self._timed('scroll', clicks, x, y)
+
+    def write(self, text):
+        self._timed('write', text)
+
+    def press(self, key):
+        self._timed('press', key)
+
+    def hotkey(self, *keys):
+        self._timed('hotkey', *keys)
+
+
+class PyAutoGUIInput(InputBackend):
+    """
+    Real mouse and keyboard through pyautogui (imported on first use, since it
+    needs a display)
+    """
+
+    name = 'pyautogui'
+
+    def __init__(self):
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def _send(self, name, *args):
+        if name == 'scroll':
+            clicks, x, y = args
+            self._pyautogui.scroll(clicks, x=x, y=y)
+        else:
+            getattr(self._pyautogui, name)(*args)
+
+
+class FakeInput(InputBackend):
+    """
+    Records input events instead of sending them, for headless runs and tests.
+    Each event is (name, args, timestamp); an optional listener is called with
+    (name, args) so a simulated UI can react, e.g. by pushing a new frame.
+    Mouse buttons and scrolls without a position report the pointer position.
+    """
+
+    name = 'fake'
+
+    def __init__(self, listener=None):
+        self.events = []
+        self.listener = listener
+        self.position = (0, 0)
+
+    def _send(self, name, *args):
+        if name in ('click', 'doubleClick', 'moveTo'):
+            self.position = args
+        elif name in ('mouseDown', 'mouseUp'):
+            args = self.position
+        elif name == 'scroll':
+            clicks, x, y = args
+            if x is not None and y is not None:
+                self.position = (x, y)
+            args = (clicks,) + tuple(self.position)
+        self.events.append((name, tuple(args), time.perf_counter()))
+        if self.listener is not None:
+            self.listener(name, tuple(args))
+
+
+# pyautogui key names that differ from X keysym names
+X_KEYSYMS = {
+    'ctrl': 'Control_L', 'ctrlleft': 'Control_L', 'ctrlright': 'Control_R',
+    'shift': 'Shift_L', 'shiftleft': 'Shift_L', 'shiftright': 'Shift_R',
+    'alt': 'Alt_L', 'altleft': 'Alt_L', 'altright': 'Alt_R',
+    'command': 'Super_L', 'win': 'Super_L',
+    'enter': 'Return', 'return': 'Return', 'esc': 'Escape', 'escape': 'Escape',
+    'tab': 'Tab', 'backspace': 'BackSpace', 'delete': 'Delete', 'del': 'Delete',
+    'space': 'space', 'home': 'Home', 'end': 'End', 'pageup': 'Prior', 'pagedown': 'Next',
+    'left': 'Left', 'right': 'Right', 'up': 'Up', 'down': 'Down',
+    ' ': 'space', '.': 'period', ',': 'comma', '-': 'minus', '+': 'plus', '=': 'equal',
+    '/': 'slash', '\\': 'backslash', ':': 'colon', ';': 'semicolon', '_': 'underscore',
+    '%': 'percent', '(': 'parenleft', ')': 'parenright', "'": 'apostrophe', '"': 'quotedbl'
+}
+BUTTONS = {'left': 1, 'middle': 2, 'right': 3}
+SCROLL_UP, SCROLL_DOWN = 4, 5
+
+
+class XTestInput(InputBackend):
+    """
+    Sends input to a given X display through the XTEST extension, so several
+    controllers in one process can each drive their own (e.g. Xvfb) display.
+    pyautogui can only use the display of the process environment.
+    """
+
+    name = 'x11'
+
+    def __init__(self, display_name=None):
+        self.xlib = ctypes.CDLL(ctypes.util.find_library('X11'))
+        self.xtst = ctypes.CDLL(ctypes.util.find_library('Xtst'))
+        self._declare_functions()
+        self.display = self.xlib.XOpenDisplay(display_name.encode() if display_name else None)
+        if not self.display:
+            raise RuntimeError(f"Cannot open X display {display_name or ''}")
+        self.position = (0, 0)
+        self._keycodes = {}
+
+    def _declare_functions(self):
+        xlib, xtst = self.xlib, self.xtst
+        xlib.XOpenDisplay.restype = ctypes.c_void_p
+        xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        xlib.XStringToKeysym.restype = ctypes.c_ulong
+        xlib.XStringToKeysym.argtypes = [ctypes.c_char_p]
+        xlib.XKeysymToKeycode.restype = ctypes.c_ubyte
+        xlib.XKeysymToKeycode.argtypes = [ctypes.c_void_p, ctypes.c_ulong]
+        xlib.XKeycodeToKeysym.restype = ctypes.c_ulong
+        xlib.XKeycodeToKeysym.argtypes = [ctypes.c_void_p, ctypes.c_ubyte, ctypes.c_int]
+        xlib.XFlush.argtypes = [ctypes.c_void_p]
+        xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        xtst.XTestFakeMotionEvent.argtypes = [ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_ulong]
+        xtst.XTestFakeButtonEvent.argtypes = [ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_ulong]
+        xtst.XTestFakeKeyEvent.argtypes = [ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_ulong]
+
+    def _keycode(self, key):
+        """
+        Keycode for a pyautogui key name or character, and whether it needs Shift
+        """
+        entry = self._keycodes.get(key)
+        if entry is None:
+            name = X_KEYSYMS.get(key.lower() if len(key) > 1 else key, key)
+            keysym = self.xlib.XStringToKeysym(name.encode())
+            if not keysym:
+                raise ValueError(f"Unknown key '{key}'")
+            keycode = self.xlib.XKeysymToKeycode(self.display, keysym)
+            # The symbol is on the shifted level when the key's first level differs
+            shifted = self.xlib.XKeycodeToKeysym(self.display, keycode, 0) != keysym
+            entry = self._keycodes[key] = (keycode, shifted)
+        return entry
+
+    def _key(self, key, down):
+        keycode, _ = self._keycode(key)
+        self.xtst.XTestFakeKeyEvent(self.display, keycode, down, 0)
+
+    def _type(self, key):
+        keycode, shifted = self._keycode(key)
+        if shifted:
+            self._key('shift', True)
+        self.xtst.XTestFakeKeyEvent(self.display, keycode, True, 0)
+        self.xtst.XTestFakeKeyEvent(self.display, keycode, False, 0)
+        if shifted:
+            self._key('shift', False)
+
+    def _button(self, button, clicks=1):
+        for _ in range(clicks):
+            self.xtst.XTestFakeButtonEvent(self.display, button, True, 0)
+            self.xtst.XTestFakeButtonEvent(self.display, button, False, 0)
+
+    def _move(self, x, y):
+        self.position = (int(x), int(y))
+        self.xtst.XTestFakeMotionEvent(self.display, -1, self.position[0], self.position[1], 0)
+
+    def _send(self, name, *args):
+        if name in ('click', 'doubleClick', 'moveTo'):
+            self._move(*args)
+            if name != 'moveTo':
+                self._button(BUTTONS['left'], 2 if name == 'doubleClick' else 1)
+        elif name in ('mouseDown', 'mouseUp'):
+            self.xtst.XTestFakeButtonEvent(self.display, BUTTONS['left'], name == 'mouseDown', 0)
+        elif name == 'scroll':
+            clicks, x, y = args
+            if x is not None and y is not None:
+                self._move(x, y)
+            # Positive clicks scroll up, as in pyautogui
+            self._button(SCROLL_UP if clicks > 0 else SCROLL_DOWN, abs(int(clicks)))
+        elif name == 'write':
+            for char in args[0]:
+                self._type(char)
+        elif name == 'press':
+            self._type(args[0])
+        elif name == 'hotkey':
+            for key in args:
+                self._key(key, True)
+            for key in reversed(args):
+                self._key(key, False)
+        self.xlib.XFlush(self.display)
+
+    def close(self):
+        if self.display:
+            self.xlib.XCloseDisplay(self.display)
+            self.display = None
+
+
+INPUT_BACKENDS = {
+    'pyautogui': PyAutoGUIInput,
+    'x11': XTestInput,
+    'fake': FakeInput
+}
+
+
+def create_input_backend(name, **kwargs):
+    """
+    Build an input backend by name, falling back to pyautogui for unknown names
+    """
+    logger = logging.getLogger(__name__)
+    if name not in INPUT_BACKENDS:
+        logger.warning(f"Input backend '{name}' unknown, using pyautogui")
+        name = 'pyautogui'
+    return INPUT_BACKENDS[name](**kwargs)
@@ -0,0 +1,184 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class Job:
+    """
+    A unit of GUI work with status and progress that clients can poll or stream
+    """
+
+    def __init__(self, kind, payload, func, coalesce_key=None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.payload = payload
+        self.func = func
+        self.coalesce_key = coalesce_key
+        self.status = 'queued'
+        self.progress = 0.0
+        self.message = 'Queued'
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.version = 0
+        # Earlier jobs merged into this one; they finish with its outcome
+        self.superseded = []
+
+    @property
+    def done(self):
+        return self.status in ('succeeded', 'failed')
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.message,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class JobQueue:
+    """
+    FIFO job queue drained by a single GUI-executor thread.
+    The mouse and keyboard are one shared resource, so jobs never run concurrently.
+    """
+
+    def __init__(self, max_history=200, name='gui-executor'):
+        self.logger = logging.getLogger(__name__)
+        self.max_history = max_history
+        self.jobs = OrderedDict()
+        self._pending = []
+        self._current = None
+        self._condition = threading.Condition()
+        self._worker = threading.Thread(target=self._run, name=name, daemon=True)
+        self._worker.start()
+
+    def submit(self, kind, payload, func, coalesce_key=None):
+        """
+        Queue func(job) for execution and return the job immediately.
+        A queued job with the same coalesce_key is superseded by the new one, as long
+        as only other coalescible jobs were queued after it. It then waits with status
+        'superseded' and finishes with the outcome of the job that replaced it.
+        """
+        job = Job(kind, payload, func, coalesce_key)
+        with self._condition:
+            if coalesce_key is not None:
+                self._supersede(coalesce_key, job)
+            self.jobs[job.id] = job
+            self._pending.append(job)
+            self._trim_history()
+            self._condition.notify_all()
+        return job
+
+    def _supersede(self, coalesce_key, job):
+        for index in range(len(self._pending) - 1, -1, -1):
+            pending = self._pending[index]
+            if pending.coalesce_key is None:
+                # A barrier (e.g. undo or a preset): earlier jobs must still run
+                return
+            if pending.coalesce_key == coalesce_key:
+                del self._pending[index]
+                pending.status = 'superseded'
+                pending.message = f"Merged into job {job.id}"
+                pending.result = {'coalesced': True, 'superseded_by': job.id}
+                pending.version += 1
+                job.superseded = pending.superseded + [pending]
+                pending.superseded = []
+                return
+
+    def get(self, job_id):
+        with self._condition:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        with self._condition:
+            return [job.to_dict() for job in self.jobs.values()]
+
+    def queue_position(self, job):
+        with self._condition:
+            return self._pending.index(job) if job in self._pending else -1
+
+    def load(self):
+        """
+        Number of queued jobs plus the running one
+        """
+        with self._condition:
+            return len(self._pending) + (self._current is not None)
+
+    def report(self, job, progress=None, message=None):
+        """
+        Update a running job's progress and wake any streaming clients
+        """
+        with self._condition:
+            if progress is not None:
+                job.progress = progress
+            if message is not None:
+                job.message = message
+            job.version += 1
+            self._condition.notify_all()
+
+    def wait_for_update(self, job, version, timeout=15.0):
+        """
+        Block until the job changes past the given version or the timeout expires
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: job.version != version, timeout=timeout)
+            return job.version
+
+    def _trim_history(self):
+        # Forget the oldest finished jobs once the history limit is reached
+        for job_id in list(self.jobs):
+            if len(self.jobs) <= self.max_history:
+                break
+            if self.jobs[job_id].done:
+                del self.jobs[job_id]
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending)
+                job = self._pending.pop(0)
+                self._current = job
+                job.status = 'running'
+                job.message = 'Running'
+                job.started_at = time.time()
+                job.version += 1
+                self._condition.notify_all()
+
+            try:
+                result = job.func(job)
+                with self._condition:
+                    job.result = result
+                    job.status = 'succeeded' if not isinstance(result, dict) or result.get('success', True) else 'failed'
+                    job.message = 'Finished'
+            except Exception as e:
+                self.logger.error(f"Job {job.id} failed: {str(e)}")
+                with self._condition:
+                    job.status = 'failed'
+                    job.error = str(e)
+                    job.message = 'Failed'
+            with self._condition:
+                self._current = None
+                job.progress = 1.0
+                job.finished_at = time.time()
+                job.version += 1
+                for merged in job.superseded:
+                    merged.status = job.status
+                    merged.progress = 1.0
+                    merged.message = f"Merged into job {job.id}"
+                    merged.result = {'success': job.status == 'succeeded', 'coalesced': True, 'superseded_by': job.id}
+                    merged.error = job.error or (job.result.get('error') if isinstance(job.result, dict) else None)
+                    merged.finished_at = job.finished_at
+                    merged.version += 1
+                job.superseded = []
+                self._condition.notify_all()
@@ -0,0 +1,46 @@
+import threading
+from collections import defaultdict, deque
+
+
+class LatencyRecorder:
+    """
+    Keeps a bounded window of recent durations per key and reports percentiles
+    """
+
+    def __init__(self, window=500):
+        self.window = window
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+
+    def record(self, key, seconds):
+        with self._lock:
+            self._samples[key].append(seconds)
+
+    def summary(self):
+        """
+        Count and p50/p95/p99/max in milliseconds for every key
+        """
+        with self._lock:
+            samples = {key: sorted(values) for key, values in self._samples.items()}
+        report = {}
+        for key, values in samples.items():
+            if not values:
+                continue
+            report[key] = {
+                'count': len(values),
+                'p50_ms': percentile(values, 0.50) * 1000,
+                'p95_ms': percentile(values, 0.95) * 1000,
+                'p99_ms': percentile(values, 0.99) * 1000,
+                'max_ms': values[-1] * 1000
+            }
+        return report
+
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
@@ -1,20 +1,88 @@
 import logging
-import pyautogui
 import cv2
 import numpy as np
 from PIL import Image
+import os
+import sys
 import time
 from .ocr_processor import OCRProcessor
+from .screen_capture import create_capture_backend
+from .input_backend import create_input_backend
+from .template_store import TemplateStore
+from .training_dataset import TrainingDataset
+from .element_cache import ElementCache
+from .frame import normalize_text, to_gray
+from .latency import LatencyRecorder
+from .metrics import metrics
+from .slider_calibration import DEFAULT_SLIDERS, SliderCalibration
+from .panel_layout import PanelLayout
+from .preset_catalog import PresetCatalog, normalize_name
+
+# Lightroom Classic shortcuts; Command replaces Ctrl on macOS
+MODIFIER = 'command' if sys.platform == 'darwin' else 'ctrl'
+DEFAULT_HOTKEYS = {
+    'undo': [MODIFIER, 'z'],
+    'redo': [MODIFIER, 'shift', 'z'],
+    'reset': [MODIFIER, 'shift', 'r'],
+    'export_dialog': [MODIFIER, 'shift', 'e'],
+    'presets_panel': None,  # No dedicated shortcut; bind e.g. ['f7'] to toggle the left panel
+    'next_photo': [MODIFIER, 'right'],
+    'previous_photo': [MODIFIER, 'left']
+}
+
+# Elements counted under their own name in lightroom_element_lookups_total; preset
+# names, export settings and anything else a command names share element="other"
+METRIC_ELEMENTS = frozenset(DEFAULT_SLIDERS) | {'presets', 'export', 'undo', 'redo', 'reset'}
+
+
+def metric_element(element_name):
+    name = normalize_text(element_name)
+    return name if name in METRIC_ELEMENTS else 'other'
+
 
 class LightroomController:
-    def __init__(self):
+    def __init__(self, capture_backend=None, input_backend=None, data_dir='data', dataset_dir=None):
         self.logger = logging.getLogger(__name__)
+        # Learned state (calibration, layout, presets, templates) lives in data_dir
+        self.data_dir = data_dir
+        self.dataset_dir = dataset_dir or os.path.join(data_dir, 'dataset')
         self.ocr = OCRProcessor()
         self.config = {
             'confidence_threshold': 0.8,
             'click_delay': 0.5,
-            'screenshot_region': None  # Full screen by default
+            'screenshot_region': None,  # Full screen by default
+            'capture_backend': 'pyautogui',  # 'pyautogui', 'x11' or 'fake'
+            'input_backend': 'pyautogui',  # 'pyautogui' or 'fake' (records events only)
+            'template_matching': True,  # Try learned element templates before OCR
+            'dataset_min_conf': 80,  # Training dataset crops below this OCR confidence are not used as templates
+            'ui_scale': 1.0,  # Display scaling of the Lightroom UI
+            'frame_max_age': 1.0,  # Seconds a memoized frame is reused without an input action
+            'settle_detection': True,  # Wait for the UI to stop changing instead of click_delay
+            'settle_timeout': 2.0,
+            'settle_interval': 0.015,
+            'settle_stable_samples': 3,  # Consecutive unchanged samples that count as settled
+            'settle_change_timeout': 0.25,  # Wait this long for the UI to start changing before trusting stability
+            'settle_downsample': 4,
+            'settle_tolerance': 0.002,  # Fraction of sampled pixels allowed to differ
+            'hotkeys': dict(DEFAULT_HOTKEYS),  # Action -> key combination, None to click instead
+            'slider_input': 'type',  # 'type' into the value field first, or always 'drag'
+            'slider_max_steps': 3,  # Bounded drag corrections after the first drag
+            'preset_scroll_clicks': 5,  # Mouse wheel clicks per preset panel scroll step
+            'preset_scan_max_pages': 50
         }
+        self.sliders = SliderCalibration(os.path.join(data_dir, 'slider_calibration.json'))
+        self.layout = PanelLayout(os.path.join(data_dir, 'panel_layout.json'))
+        self.preset_catalog = PresetCatalog(os.path.join(data_dir, 'preset_catalog.json'))
+        self.latencies = LatencyRecorder()
+        self.templates = TemplateStore(os.path.join(data_dir, 'templates'))
+        self.load_dataset()
+        self.element_cache = ElementCache()
+        # An injected backend (e.g. FakeCapture) takes precedence over the configured one
+        self.capture = capture_backend or create_capture_backend(self.config['capture_backend'])
+        self.input = input_backend or create_input_backend(self.config['input_backend'])
+        # Frame shared by all lookups until the next input action changes the screen
+        self._frame = None
+        self._frame_time = 0.0
 
     def check_connection(self):
         """
@@ -28,12 +96,55 @@ class LightroomController:
             self.logger.error(f"Error checking Lightroom connection: {str(e)}")
             return False
 
+    def load_dataset(self, dataset=None):
+        """
+        Seed element templates from the ingested training dataset. The crops are
+        memory-mapped, so this reads no images and runs no OCR.
+        """
+        try:
+            dataset = dataset or TrainingDataset(self.dataset_dir)
+            added = self.templates.extend(dataset.best_crops(min_conf=self.config['dataset_min_conf']))
+            if added:
+                self.logger.info(f"Seeded {added} element templates from the training dataset")
+            return added
+        except Exception as e:
+            self.logger.error(f"Error loading training dataset: {str(e)}")
+            return 0
+
     def update_config(self, new_config):
         """
         Update controller configuration
         """
         try:
+            backend_changed = new_config.get('capture_backend', self.config['capture_backend']) != self.config['capture_backend']
+            input_changed = new_config.get('input_backend', self.config['input_backend']) != self.config['input_backend']
+            geometry_changed = any(
+                key in new_config and new_config[key] != self.config.get(key)
+                for key in ('screenshot_region', 'ui_scale')
+            )
+            new_config = dict(new_config)
+            # Merge hotkey bindings so a partial map does not drop the other actions
+            hotkeys = new_config.pop('hotkeys', None)
+            if hotkeys:
+                self.config['hotkeys'].update(hotkeys)
+            if new_config.pop('reset_panel_layout', False):
+                self.layout.reset()
+            panels = new_config.pop('panels', None)
+            if panels:
+                self.layout.update_panels(panels)
+            # OCR settings (engine, pool, incremental, text regions) belong to the OCR processor
+            ocr_config = {key: new_config.pop(key) for key in list(new_config) if key in self.ocr.config}
+            if ocr_config and not self.ocr.update_config(ocr_config):
+                return False
             self.config.update(new_config)
+            if geometry_changed:
+                self.element_cache.invalidate()
+            if backend_changed:
+                self.capture.close()
+                self.capture = create_capture_backend(self.config['capture_backend'])
+            if input_changed:
+                self.input = create_input_backend(self.config['input_backend'])
+            self.invalidate_frame()
             return True
         except Exception as e:
             self.logger.error(f"Error updating config: {str(e)}")
@@ -44,87 +155,494 @@ class LightroomController:
         Capture screenshot of Lightroom interface
         """
         try:
-            screenshot = pyautogui.screenshot(region=self.config['screenshot_region'])
-            return np.array(screenshot)
+            return self.capture.capture(self.config['screenshot_region'])
         except Exception as e:
             self.logger.error(f"Error taking screenshot: {str(e)}")
             return None
 
-    def locate_ui_element(self, element_name):
+    def to_screen(self, location):
         """
-        Locate a UI element using OCR and image processing
+        Convert frame coordinates to screen coordinates using the capture region offset
         """
-        try:
+        region = self.config['screenshot_region']
+        if not region:
+            return location
+        x, y = location
+        return (x + region[0], y + region[1])
+
+    def capture_stats(self):
+        """
+        Capture time and allocation figures for the active backend
+        """
+        return self.capture.stats()
+
+    def element_cache_stats(self):
+        """
+        Hit/miss counters of the element location cache
+        """
+        return self.element_cache.stats()
+
+    def current_frame(self):
+        """
+        Return the frame for the current screen, capturing one if needed.
+        A frame older than frame_max_age is recaptured, since the screen can change
+        without any input from the controller.
+        """
+        now = time.monotonic()
+        if self._frame is not None and now - self._frame_time > self.config['frame_max_age']:
+            self._frame = None
+        if self._frame is None:
             screenshot = self.take_screenshot()
             if screenshot is None:
                 return None
+            self._frame = self.ocr.as_frame(screenshot)
+            self._frame_time = now
+        return self._frame
 
-            # Convert screenshot to grayscale for OCR
-            gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY)
-            
-            # Use OCR to find text elements
-            element_location = self.ocr.find_text(gray, element_name)
-            
-            if element_location:
-                return element_location
-            else:
-                self.logger.warning(f"UI element '{element_name}' not found")
-                return None
+    def invalidate_frame(self):
+        """
+        Drop the cached frame after anything that may have changed the screen
+        """
+        self._frame = None
+
+    def _find_text_in_panels(self, frame, elements):
+        """
+        OCR each panel once for all of its elements; on a miss, search the whole frame
+        once for the rest and widen a panel if one of its elements turns up outside it.
+        Returns {element_name: box}
+        """
+        boxes = {}
+        by_panel = {}
+        for element_name, panel in elements:
+            by_panel.setdefault(panel, []).append(element_name)
+
+        for panel, names in by_panel.items():
+            rect = self.layout.rect(panel, frame.shape) if panel else None
+            if rect:
+                panel_frame = frame.panel(panel, rect, self.layout.ocr_config(panel))
+                for name, matches in self.ocr.find_many(panel_frame, names).items():
+                    if matches:
+                        boxes[name] = matches[0]
+
+        missing = [(name, panel) for name, panel in elements if name not in boxes]
+        if missing:
+            found = self.ocr.find_many(frame, [name for name, _ in missing])
+            for name, panel in missing:
+                if found.get(name):
+                    boxes[name] = found[name][0]
+                    # Only an unambiguous hit says where the panel really is
+                    if panel and len(found[name]) == 1:
+                        self.layout.learn(panel, boxes[name], frame.shape)
+        return boxes
+
+    def locate_ui_element(self, element_name, panel=None):
+        """
+        Locate a UI element from the location cache, a learned template, or OCR.
+        With a panel, OCR reads only that panel's crop before trying the whole frame.
+        """
+        location = self.locate_many([(element_name, panel)]).get(element_name)
+        if location is None:
+            self.logger.warning(f"UI element '{element_name}' not found")
+        return location
+
+    def locate_many(self, elements):
+        """
+        Locate several UI elements against a single frame.
+        Each element is a name or a (name, panel) pair. Cached locations and template
+        matches are tried per element; the rest share one phrase-matching OCR pass.
+        Found locations also warm the element cache for the actions that follow.
+        """
+        try:
+            frame = self.current_frame()
+            if frame is None:
+                return {}
+
+            region = self.config['screenshot_region']
+            locations = {}
+            pending = []
+            for element in elements:
+                element_name, panel = element if isinstance(element, tuple) else (element, None)
+                location = self.element_cache.get(element_name, region, frame.gray, panel)
+                source = 'cache'
+                if location is None and self.config['template_matching']:
+                    # Fast path: match a template learned from an earlier OCR hit, inside the panel if one is named
+                    rect = self.layout.rect(panel, frame.shape) if panel else None
+                    left, top, right, bottom = rect or (0, 0, frame.shape[1], frame.shape[0])
+                    with metrics.stage('template'):
+                        match = self.templates.match(element_name, frame.gray[top:bottom, left:right], panel)
+                    if match and match[1] >= self.config['confidence_threshold']:
+                        location = (match[0][0] + left, match[0][1] + top)
+                        source = 'template'
+                        self.element_cache.put(element_name, region, frame.gray, location, panel)
+                if location is None:
+                    pending.append((element_name, panel))
+                else:
+                    locations[element_name] = self.to_screen(location)
+                    metrics.increment('lightroom_element_lookups_total', element=metric_element(element_name),
+                                      source=source)
+
+            if pending:
+                # Use OCR to find text elements
+                panels = dict(pending)
+                for element_name, box in self._find_text_in_panels(frame, pending).items():
+                    if self.config['template_matching']:
+                        self.templates.add(element_name, frame.gray, box, panel=panels[element_name])
+                    location = (box['left'] + box['width'] // 2, box['top'] + box['height'] // 2)
+                    self.element_cache.put(element_name, region, frame.gray, location, panels[element_name])
+                    locations[element_name] = self.to_screen(location)
+                for element_name, _ in pending:
+                    source = 'ocr' if element_name in locations else 'miss'
+                    metrics.increment('lightroom_element_lookups_total', element=metric_element(element_name),
+                                      source=source)
+            return locations
         except Exception as e:
-            self.logger.error(f"Error locating UI element: {str(e)}")
-            return None
+            self.logger.error(f"Error locating UI elements: {str(e)}")
+            return {}
 
-    def click_element(self, element_name):
+    def _settle_sample(self, region):
+        pixels = self.capture.capture(region)
+        step = self.config['settle_downsample']
+        return to_gray(np.ascontiguousarray(pixels[::step, ::step]))
+
+    def region_around(self, x, y, width, height):
+        """
+        Screen region of the given size centered on a point, clipped to the capture region
+        """
+        left = max(int(x - width // 2), 0)
+        top = max(int(y - height // 2), 0)
+        screen = self.config['screenshot_region']
+        if screen:
+            left = max(left, screen[0])
+            top = max(top, screen[1])
+            width = min(width, screen[0] + screen[2] - left)
+            height = min(height, screen[1] + screen[3] - top)
+        return (left, top, int(width), int(height))
+
+    def wait_for_settled(self, region=None, timeout=None):
+        """
+        Poll low-resolution samples of a screen region until it stops changing.
+        Lightroom may not have started repainting when sampling begins, so stable
+        samples only count once a change has been seen, or once settle_change_timeout
+        has passed without any (an action with no visible effect).
+        Returns True once settle_stable_samples consecutive samples match, or False on timeout.
+        """
+        if region is None:
+            region = self.config['screenshot_region']
+        timeout = self.config['settle_timeout'] if timeout is None else timeout
+        start = time.perf_counter()
+        previous = None
+        stable = 0
+        changed_seen = False
+        try:
+            while True:
+                sample = self._settle_sample(region)
+                if previous is not None and previous.shape == sample.shape:
+                    changed = np.count_nonzero(cv2.absdiff(sample, previous) > 8) / sample.size
+                    if changed > self.config['settle_tolerance']:
+                        changed_seen = True
+                        stable = 0
+                    elif changed_seen or time.perf_counter() - start >= self.config['settle_change_timeout']:
+                        stable += 1
+                    if stable >= self.config['settle_stable_samples']:
+                        self.latencies.record('settle', time.perf_counter() - start)
+                        return True
+                previous = sample
+
+                if time.perf_counter() - start >= timeout:
+                    self.logger.warning(f"UI did not settle within {timeout:.2f}s")
+                    self.latencies.record('settle', time.perf_counter() - start)
+                    return False
+                with metrics.stage('sleep'):
+                    time.sleep(self.config['settle_interval'])
+        except Exception as e:
+            self.logger.error(f"Error waiting for UI to settle: {str(e)}")
+            with metrics.stage('sleep'):
+                time.sleep(self.config['click_delay'])
+            return False
+
+    def _after_input(self, region=None, fixed_delay=0):
+        """
+        Invalidate the frame and wait until the UI reacts to an input action
+        """
+        self.invalidate_frame()
+        if self.config['settle_detection']:
+            with metrics.stage('settle'):
+                self.wait_for_settled(region)
+        elif fixed_delay:
+            with metrics.stage('sleep'):
+                time.sleep(fixed_delay)
+
+    def action_latency_stats(self):
+        """
+        Tail latency per action type, including settle waits
+        """
+        return self.latencies.summary()
+
+    def has_hotkey(self, action):
+        """
+        Whether an action has a keyboard binding
+        """
+        return bool(self.config['hotkeys'].get(action))
+
+    def press_hotkey(self, action):
+        """
+        Press the key combination bound to an action
+        Returns False when the action has no binding
+        """
+        start = time.perf_counter()
+        keys = self.config['hotkeys'].get(action)
+        if not keys:
+            return False
+        try:
+            self.input.hotkey(*keys)
+            self._after_input()
+            return True
+        except Exception as e:
+            self.logger.error(f"Error pressing hotkey for {action}: {str(e)}")
+            return False
+        finally:
+            self.latencies.record('hotkey', time.perf_counter() - start)
+
+    def perform_action(self, action, element_name=None, panel=None):
+        """
+        Run an action through its hotkey, falling back to clicking its UI element
+        """
+        if self.has_hotkey(action):
+            return self.press_hotkey(action)
+        if element_name is None:
+            self.logger.warning(f"No hotkey or UI element for action '{action}'")
+            return False
+        return self.click_element(element_name, panel)
+
+    def click_element(self, element_name, panel=None):
         """
         Click on a UI element
         """
+        start = time.perf_counter()
         try:
-            location = self.locate_ui_element(element_name)
+            location = self.locate_ui_element(element_name, panel)
             if location:
                 x, y = location
-                pyautogui.click(x, y)
-                time.sleep(self.config['click_delay'])
+                self.input.click(x, y)
+                # Clicks can open panels or dialogs anywhere, so watch the whole capture region
+                self._after_input(fixed_delay=self.config['click_delay'])
                 return True
             return False
         except Exception as e:
             self.logger.error(f"Error clicking element: {str(e)}")
             return False
+        finally:
+            self.latencies.record('click', time.perf_counter() - start)
+
+    def read_slider_value(self, model, label_location):
+        """
+        OCR only the slider's numeric value field
+        """
+        x, y = label_location
+        scale = self.config['ui_scale']
+        width = int(60 * scale)
+        height = int(model.row_height * scale)
+        region = (int(x + model.value_field * scale - width // 2), int(y - height // 2), width, height)
+        return self.ocr.read_number(self.capture.capture(region))
+
+    def _slider_row(self, model, label_location):
+        x, y = label_location
+        scale = self.config['ui_scale']
+        return self.region_around(x + model.value_field * scale / 2, y,
+                                  (model.value_field + 80) * scale, model.row_height * scale * 2)
+
+    def _type_slider_value(self, model, label_location, value):
+        """
+        Type the value straight into the slider's value field and verify it
+        """
+        x, y = label_location
+        field_x = x + model.value_field * self.config['ui_scale']
+        text = f"{value:.2f}" if model.tolerance < 1 else str(int(round(value)))
+        self.input.doubleClick(field_x, y)
+        self.input.write(text)
+        self.input.press('enter')
+        self._after_input(self._slider_row(model, label_location))
+
+        read = self.read_slider_value(model, label_location)
+        return read is not None and abs(read - value) <= model.tolerance
+
+    def _drag_slider(self, model, label_location, value):
+        """
+        Drag the thumb to the calibrated position, then read the value back and
+        correct in at most slider_max_steps further drags
+        """
+        x, y = label_location
+        scale = self.config['ui_scale']
+        current = self.read_slider_value(model, label_location)
+        thumb_offset = model.offset_for(current) if current is not None else None
+        target_offset = model.offset_for(value)
+
+        for _ in range(1 + self.config['slider_max_steps']):
+            if thumb_offset is None:
+                # Thumb position unknown: click the track at the target instead of dragging
+                self.input.click(x + target_offset * scale, y)
+            else:
+                self.input.moveTo(x + thumb_offset * scale, y)
+                self.input.mouseDown()
+                self.input.moveTo(x + target_offset * scale, y)
+                self.input.mouseUp()
+            self._after_input(self._slider_row(model, label_location))
+
+            read = self.read_slider_value(model, label_location)
+            if read is None:
+                self.logger.warning(f"Could not read back {model.name} value")
+                return False
+            model.observe(target_offset, read)
+            if abs(read - value) <= model.tolerance:
+                self.sliders.save()
+                return True
+
+            # The thumb now sits where it was dropped; shift by the residual error
+            thumb_offset = target_offset
+            target_offset += (value - read) * model.pixels_per_unit(read)
+
+        self.sliders.save()
+        self.logger.warning(f"{model.name} settled at {read}, wanted {value}")
+        return False
 
     def adjust_slider(self, slider_name, value):
         """
         Adjust a slider control to a specific value
         """
+        start = time.perf_counter()
         try:
             # Locate the slider
-            slider_location = self.locate_ui_element(slider_name)
+            slider_location = self.locate_ui_element(slider_name, 'develop')
             if not slider_location:
                 return False
 
-            # Calculate target position based on value
-            x, y = slider_location
-            target_x = x + (value * 100)  # Simplified calculation - needs calibration
-            
-            # Move slider
-            pyautogui.moveTo(x, y)
-            pyautogui.mouseDown()
-            pyautogui.moveTo(target_x, y)
-            pyautogui.mouseUp()
-            
-            return True
+            model = self.sliders.get(slider_name)
+            if model is None:
+                # Uncalibrated slider: single open-loop drag
+                x, y = slider_location
+                target_x = x + (value * 100)
+                self.input.moveTo(x, y)
+                self.input.mouseDown()
+                self.input.moveTo(target_x, y)
+                self.input.mouseUp()
+                self._after_input(self.region_around((x + target_x) / 2, y, abs(target_x - x) + 400, 80))
+                return True
+
+            value = model.clamp(value)
+            if self.config['slider_input'] == 'type' and self._type_slider_value(model, slider_location, value):
+                return True
+            return self._drag_slider(model, slider_location, value)
         except Exception as e:
             self.logger.error(f"Error adjusting slider: {str(e)}")
             return False
+        finally:
+            self.latencies.record('slider', time.perf_counter() - start)
+
+    def _presets_panel_rect(self):
+        frame = self.current_frame()
+        if frame is None:
+            return None
+        return self.layout.rect('presets', frame.shape)
+
+    def _scroll_presets(self, rect, steps):
+        """
+        Scroll the presets panel by a number of steps (positive is down)
+        """
+        left, top, right, bottom = rect
+        x, y = self.to_screen(((left + right) // 2, (top + bottom) // 2))
+        self.input.scroll(-steps * self.config['preset_scroll_clicks'], x=x, y=y)
+        self.preset_catalog.scroll_offset += steps
+        self._after_input(self.region_around(x, y, right - left, bottom - top))
+
+    def _scroll_presets_to_top(self, rect):
+        self._scroll_presets(rect, -self.config['preset_scan_max_pages'])
+        self.preset_catalog.scroll_offset = 0
+
+    def _scroll_presets_to(self, rect, offset):
+        delta = offset - self.preset_catalog.scroll_offset
+        if delta:
+            self._scroll_presets(rect, delta)
+
+    def scan_presets(self):
+        """
+        Build the preset catalog by scrolling through the presets panel once
+        """
+        try:
+            rect = self._presets_panel_rect()
+            if rect is None:
+                return False
+            catalog = self.preset_catalog
+            catalog.begin_scan(rect)
+            self._scroll_presets_to_top(rect)
+
+            previous_gray = None
+            for offset in range(self.config['preset_scan_max_pages']):
+                frame = self.current_frame()
+                panel = frame.panel('presets', rect, self.layout.ocr_config('presets'))
+                # The panel stops moving once the end of the list is reached
+                if previous_gray is not None and np.array_equal(panel.gray, previous_gray):
+                    break
+                catalog.add_page(panel.line_boxes(), offset, rect)
+                previous_gray = panel.gray.copy()
+                self._scroll_presets(rect, 1)
+
+            self._scroll_presets_to_top(rect)
+            catalog.finish_scan()
+            return True
+        except Exception as e:
+            self.logger.error(f"Error scanning presets: {str(e)}")
+            return False
+
+    def _verify_preset_row(self, entry, rect, x, y):
+        """
+        Cheap re-verify: OCR just the catalogued row as a single text line
+        """
+        frame = self.current_frame()
+        half = max(entry['row_height'], 10)
+        row = (rect[0], max(y - half, 0), rect[2], min(y + half, frame.shape[0]))
+        text = ' '.join(frame.panel('preset_row', row, '--psm 7').lines())
+        return normalize_name(entry['name']) in normalize_name(text)
+
+    def _apply_from_catalog(self, preset_name):
+        """
+        Scroll to and click a preset straight from the catalog
+        """
+        rect = self._presets_panel_rect()
+        catalog = self.preset_catalog
+        entry = catalog.get(preset_name)
+        if rect is None or entry is None or not catalog.is_valid_for(rect):
+            return False
+
+        x, y = rect[0] + entry['row_x'], rect[1] + entry['row_y']
+        self._scroll_presets_to(rect, entry['scroll_offset'])
+        if not self._verify_preset_row(entry, rect, x, y):
+            # The panel may have been scrolled by hand; retry from the top once
+            self._scroll_presets_to_top(rect)
+            self._scroll_presets_to(rect, entry['scroll_offset'])
+            if not self._verify_preset_row(entry, rect, x, y):
+                return False
+
+        self.input.click(*self.to_screen((x, y)))
+        self._after_input(fixed_delay=self.config['click_delay'])
+        return True
 
     def apply_preset(self, preset_name):
         """
         Apply a Lightroom preset
         """
+        start = time.perf_counter()
         try:
-            # Click presets panel if not already open
-            self.click_element("Presets")
+            # Open presets panel if not already open
+            self.perform_action('presets_panel', "Presets", 'presets')
             
+            # Click the preset from the catalog, rescanning the panel once on a miss
+            if self._apply_from_catalog(preset_name) or (
+                    self.scan_presets() and self._apply_from_catalog(preset_name)):
+                self.logger.info(f"Applied preset: {preset_name}")
+                return True
+
             # Locate and click the specific preset
-            if self.click_element(preset_name):
+            if self.click_element(preset_name, 'presets'):
                 self.logger.info(f"Applied preset: {preset_name}")
                 return True
             
@@ -133,14 +651,17 @@ class LightroomController:
         except Exception as e:
             self.logger.error(f"Error applying preset: {str(e)}")
             return False
+        finally:
+            self.latencies.record('preset', time.perf_counter() - start)
 
     def export_photo(self, export_settings=None):
         """
         Export the current photo with specified settings
         """
+        start = time.perf_counter()
         try:
-            # Click export button
-            if not self.click_element("Export"):
+            # Open the export dialog
+            if not self.perform_action('export_dialog', "Export"):
                 return False
 
             if export_settings:
@@ -150,25 +671,31 @@ class LightroomController:
                         return False
 
             # Confirm export
-            return self.click_element("Export")
+            return self.click_element("Export", 'dialog')
         except Exception as e:
             self.logger.error(f"Error exporting photo: {str(e)}")
             return False
+        finally:
+            self.latencies.record('export', time.perf_counter() - start)
 
     def adjust_export_setting(self, setting_name, value):
         """
         Adjust an export setting
         """
+        start = time.perf_counter()
         try:
             # Locate and adjust the specific setting
-            setting_location = self.locate_ui_element(setting_name)
+            setting_location = self.locate_ui_element(setting_name, 'dialog')
             if setting_location:
                 x, y = setting_location
-                pyautogui.click(x, y)
-                pyautogui.write(str(value))
-                pyautogui.press('enter')
+                self.input.click(x, y)
+                self.input.write(str(value))
+                self.input.press('enter')
+                self._after_input(self.region_around(x, y, 400, 80))
                 return True
             return False
         except Exception as e:
             self.logger.error(f"Error adjusting export setting: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+        finally:
+            self.latencies.record('export_setting', time.perf_counter() - start)
@@ -0,0 +1,170 @@
+import threading
+import time
+from bisect import bisect_left
+
+# Upper bounds in seconds, from sub-millisecond stages (gray conversion) to slow commands
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+DESCRIPTIONS = {
+    'lightroom_stage_seconds': 'Time spent in one hot-path stage (stages may nest, e.g. settle includes capture)',
+    'lightroom_command_seconds': 'End-to-end time of a chat command, by command type',
+    'lightroom_commands_total': 'Chat commands processed, by command type and outcome',
+    'lightroom_element_lookups_total': 'UI element lookups, by element and where it was found'
+}
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram: counts per bucket plus sum and count
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def quantile(self, fraction):
+        """
+        Upper bound of the bucket holding the given quantile (an estimate)
+        """
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+
+class _Span:
+    __slots__ = ('registry', 'name', 'labels', 'start')
+
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class MetricsRegistry:
+    """
+    Process-wide histograms and counters keyed by metric name and labels.
+    Recording is a lock, a dict lookup and a bisect, cheap enough to leave on.
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def increment(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def span(self, name, **labels):
+        """
+        Context manager that observes its own duration
+        """
+        return _Span(self, name, labels)
+
+    def stage(self, stage):
+        return self.span('lightroom_stage_seconds', stage=stage)
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+            self._counters = {}
+
+    def snapshot(self):
+        """
+        JSON-friendly summary: count, mean and estimated p50/p95 per histogram,
+        and every counter value
+        """
+        with self._lock:
+            histograms = [(name, dict(labels), histogram.count, histogram.sum,
+                           histogram.quantile(0.5), histogram.quantile(0.95))
+                          for (name, labels), histogram in self._histograms.items()]
+            counters = [(name, dict(labels), value) for (name, labels), value in self._counters.items()]
+        return {
+            'histograms': [{
+                'name': name,
+                'labels': labels,
+                'count': count,
+                'mean_ms': total / count * 1000 if count else 0.0,
+                'p50_ms': p50 * 1000,
+                'p95_ms': p95 * 1000
+            } for name, labels, count, total, p50, p95 in histograms],
+            'counters': [{'name': name, 'labels': labels, 'value': value} for name, labels, value in counters]
+        }
+
+    def render_prometheus(self):
+        """
+        All metrics in the Prometheus text exposition format
+        """
+        with self._lock:
+            histograms = sorted((key, list(h.counts), h.sum, h.count, h.buckets)
+                                for key, h in self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        lines = []
+        described = set()
+
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                if name in DESCRIPTIONS:
+                    lines.append(f"# HELP {name} {DESCRIPTIONS[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), counts, total, count, buckets in histograms:
+            describe(name, 'histogram')
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ['+Inf'], counts):
+                cumulative += bucket_count
+                le = bound if bound == '+Inf' else repr(float(bound))
+                lines.append(f"{name}_bucket{_labels(labels, le=le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {total}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        for (name, labels), value in counters:
+            describe(name, 'counter')
+            lines.append(f"{name}{_labels(labels)} {value}")
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+# Shared by the controller, OCR and command processing of this process
+metrics = MetricsRegistry()
@@ -0,0 +1,192 @@
+import logging
+import queue
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pytesseract
+from PIL import Image
+from .ocr_result import OCRResult
+
+try:
+    import tesserocr
+except ImportError:  # Optional: only needed for the worker pool engine
+    tesserocr = None
+
+
+def parse_tesseract_config(config):
+    """
+    Split a Tesseract CLI config string into a PSM value and -c variables
+    """
+    psm = None
+    variables = {}
+    match = re.search(r'--psm\s+(\d+)', config or '')
+    if match:
+        psm = int(match.group(1))
+    for key, value in re.findall(r'-c\s+(\w+)=(\S+)', config or ''):
+        variables[key] = value
+    return psm, variables
+
+
+class SubprocessEngine:
+    """
+    Default engine: one pytesseract call (and one tesseract process) per request
+    """
+
+    name = 'subprocess'
+
+    def image_to_data(self, image, lang, config):
+        # Parse the raw TSV directly rather than building pytesseract's dict of lists
+        tsv = pytesseract.image_to_data(
+            image,
+            lang=lang,
+            config=config,
+            output_type=pytesseract.Output.STRING
+        )
+        return OCRResult.from_tsv(tsv, has_header=True)
+
+    def image_to_string(self, image, lang, config):
+        return pytesseract.image_to_string(image, lang=lang, config=config)
+
+    def close(self):
+        pass
+
+
+# Per-worker state for the pool engine; lives in the worker processes only
+_worker_api = None
+_worker_segments = {}
+_worker_variables = {}
+
+
+def _init_worker(lang):
+    global _worker_api
+    _worker_api = tesserocr.PyTessBaseAPI(lang=lang)
+
+
+def _attach_segment(name):
+    segment = _worker_segments.get(name)
+    if segment is None:
+        segment = shared_memory.SharedMemory(name=name)
+        try:
+            # The parent owns the segment; keep the worker's tracker from unlinking it
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(segment._name, 'shared_memory')
+        except Exception:
+            pass
+        _worker_segments[name] = segment
+    return segment
+
+
+def _run_job(segment_name, shape, dtype, mode, psm, variables):
+    segment = _attach_segment(segment_name)
+    image = np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+
+    # Reset variables set by a previous job that this job does not use
+    for key in list(_worker_variables):
+        if key not in variables:
+            _worker_api.SetVariable(key, '')
+            del _worker_variables[key]
+    for key, value in variables.items():
+        if _worker_variables.get(key) != value:
+            _worker_api.SetVariable(key, value)
+            _worker_variables[key] = value
+    if psm is not None:
+        _worker_api.SetPageSegMode(psm)
+
+    _worker_api.SetImage(Image.fromarray(image))
+    if mode == 'data':
+        return OCRResult.from_tsv(_worker_api.GetTSVText(0))
+    return _worker_api.GetUTF8Text()
+
+
+class TesseractPoolEngine:
+    """
+    Keeps N warm worker processes with the language model already loaded.
+    Images are handed over through reusable shared-memory buffers, and the
+    number of in-flight jobs is bounded by the number of buffers.
+    Requires the optional tesserocr package.
+    """
+
+    name = 'pool'
+
+    def __init__(self, lang='eng', workers=2, queue_size=4):
+        if tesserocr is None:
+            raise RuntimeError('tesserocr is not installed')
+        self.logger = logging.getLogger(__name__)
+        self.lang = lang
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(lang,)
+        )
+        # Free shared-memory slots; taking one blocks once queue_size jobs are in flight
+        self._slots = queue.Queue()
+        for _ in range(queue_size):
+            self._slots.put(None)
+        self._segments = []
+        self._lock = threading.Lock()
+
+    def _acquire_buffer(self, nbytes):
+        segment = self._slots.get()
+        if segment is None or segment.size < nbytes:
+            if segment is not None:
+                self._release_segment(segment)
+            segment = shared_memory.SharedMemory(create=True, size=max(nbytes, 1))
+            with self._lock:
+                self._segments.append(segment)
+        return segment
+
+    def _release_segment(self, segment):
+        with self._lock:
+            if segment in self._segments:
+                self._segments.remove(segment)
+        segment.close()
+        segment.unlink()
+
+    def _submit(self, image, config, mode):
+        image = np.ascontiguousarray(image)
+        if image.dtype != np.uint8:
+            image = image.astype(np.uint8)
+        psm, variables = parse_tesseract_config(config)
+        segment = self._acquire_buffer(image.nbytes)
+        try:
+            buffer = np.ndarray(image.shape, dtype=image.dtype, buffer=segment.buf)
+            buffer[...] = image
+            future = self.executor.submit(
+                _run_job, segment.name, image.shape, image.dtype.str, mode, psm, variables
+            )
+            return future.result()
+        finally:
+            self._slots.put(segment)
+
+    def image_to_data(self, image, lang, config):
+        if lang != self.lang:
+            return SubprocessEngine().image_to_data(image, lang, config)
+        return self._submit(image, config, 'data')
+
+    def image_to_string(self, image, lang, config):
+        if lang != self.lang:
+            return SubprocessEngine().image_to_string(image, lang, config)
+        return self._submit(image, config, 'string')
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        with self._lock:
+            segments, self._segments = self._segments, []
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+
+
+def create_engine(config):
+    """
+    Build the OCR engine selected by an OCRProcessor config dict
+    """
+    if config.get('engine') == 'pool':
+        return TesseractPoolEngine(
+            lang=config.get('lang', 'eng'),
+            workers=config.get('pool_workers', 2),
+            queue_size=config.get('pool_queue_size', 4)
+        )
+    return SubprocessEngine()
@@ -1,16 +1,71 @@
 import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
 import pytesseract
 import cv2
 import numpy as np
 from PIL import Image
+from .frame import Frame, to_gray
+from .ocr_engine import SubprocessEngine, create_engine
+from .ocr_result import OCRResult
+from .metrics import metrics
+from .phrase_matcher import PhraseMatcher
+from .incremental_ocr import changed_tiles, dirty_rects, expand_to_lines, merge_data
+from .text_regions import coverage, detect_text_regions
+
+ENGINE_CONFIG_KEYS = ('engine', 'lang', 'pool_workers', 'pool_queue_size')
 
 class OCRProcessor:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
         self.config = {
             'lang': 'eng',
-            'config': '--psm 11'  # Page segmentation mode: Sparse text
+            'config': '--psm 11',  # Page segmentation mode: Sparse text
+            'engine': 'subprocess',  # 'subprocess' or 'pool' (warm tesserocr workers)
+            'pool_workers': 2,
+            'pool_queue_size': 4,
+            'incremental': False,  # Re-OCR only tiles that changed since the last frame
+            'tile_size': 64,
+            'incremental_max_changed': 0.35,  # Changed-tile fraction above which a full pass runs
+            # Single text line restricted to digits, for slider value fields
+            'numeric_config': '--psm 7 -c tessedit_char_whitelist=0123456789.-+',
+            'text_regions': False,  # Detect text boxes first and OCR only those crops
+            'region_scale': 0.5,  # Downscale factor for region detection
+            'region_min_height': 6,  # Text line height bounds in full-resolution pixels
+            'region_max_height': 80,
+            'region_max_coverage': 0.5,  # Above this frame fraction a single full pass is cheaper
+            'region_workers': 4,
+            'region_config': '--psm 6'  # Each crop holds one line or a small block of text (panels use their own)
         }
+        self._engine = None
+        self._region_executor = None
+        self._fallback_engine = SubprocessEngine()
+        # Last OCR'd frame per screen area (full frame or panel), for incremental mode
+        self._previous_frames = {}
+
+    @property
+    def engine(self):
+        """
+        OCR engine selected by configuration, falling back to per-call subprocesses
+        """
+        if self._engine is None:
+            try:
+                self._engine = create_engine(self.config)
+            except Exception as e:
+                self.logger.warning(f"OCR engine '{self.config['engine']}' unavailable, using subprocess: {str(e)}")
+                self._engine = self._fallback_engine
+        return self._engine
+
+    def close(self):
+        """
+        Shut down the OCR engine and any worker processes it owns
+        """
+        if self._engine is not None:
+            self._engine.close()
+            self._engine = None
+        if self._region_executor is not None:
+            self._region_executor.shutdown(wait=True)
+            self._region_executor = None
 
     def check_status(self):
         """
@@ -29,9 +84,15 @@ class OCRProcessor:
         """
         Preprocess image for better OCR results
         """
+        with metrics.stage('preprocess'):
+            return self._preprocess(image)
+
+    def _preprocess(self, image):
         try:
             # Convert to grayscale if not already
-            if len(image.shape) == 3:
+            if len(image.shape) == 3 and image.shape[2] == 4:
+                gray = cv2.cvtColor(image, cv2.COLOR_BGRA2GRAY)
+            elif len(image.shape) == 3:
                 gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
             else:
                 gray = image
@@ -47,62 +108,172 @@ class OCRProcessor:
             self.logger.error(f"Error preprocessing image: {str(e)}")
             return None
 
-    def find_text(self, image, target_text):
+    def as_frame(self, image):
         """
-        Find the location of specific text in the image
-        Returns the center coordinates of the found text
+        Wrap a raw image in a Frame so its OCR layers are computed only once
+        """
+        if isinstance(image, Frame):
+            return image
+        return Frame(image, self)
+
+    def run_ocr(self, processed_image, config=None):
+        """
+        Run a single Tesseract pass and return the parsed image_to_data result
+        """
+        config = self.config['config'] if config is None else config
+        with metrics.stage('tesseract'):
+            try:
+                return self.engine.image_to_data(processed_image, self.config['lang'], config)
+            except Exception as e:
+                if self.engine is self._fallback_engine:
+                    raise
+                self.logger.warning(f"OCR engine failed, retrying with subprocess: {str(e)}")
+                return self._fallback_engine.image_to_data(processed_image, self.config['lang'], config)
+
+    def read_number(self, image):
+        """
+        Read a single numeric value (e.g. a slider's value field) from a small crop
+        Returns a float, or None if no number was recognized
         """
         try:
-            # Preprocess the image
-            processed_image = self.preprocess_image(image)
+            gray = to_gray(image)
+            # Small UI digits OCR far better when enlarged before thresholding
+            gray = cv2.resize(gray, None, fx=3, fy=3, interpolation=cv2.INTER_CUBIC)
+            processed_image = self.preprocess_image(gray)
             if processed_image is None:
                 return None
 
-            # Get detailed OCR data including bounding boxes
-            data = pytesseract.image_to_data(
-                processed_image,
-                lang=self.config['lang'],
-                config=self.config['config'],
-                output_type=pytesseract.Output.DICT
-            )
+            data = self.run_ocr(processed_image, self.config['numeric_config'])
+            text = ''.join(data.all_texts())
+            match = re.search(r'[-+]?\d+(?:\.\d+)?', text)
+            return float(match.group(0)) if match else None
+        except Exception as e:
+            self.logger.error(f"Error reading number: {str(e)}")
+            return None
+
+    def ocr_frame(self, frame):
+        """
+        Produce OCR data for a frame, reusing results from the previous frame of the
+        same screen area for unchanged tiles when incremental mode is enabled
+        """
+        data = None
+        previous = self._previous_frames.get(frame.key)
+        if (self.config['incremental'] and previous is not None and previous is not frame
+                and previous.has_data and previous.shape == frame.shape
+                and previous.ocr_config == frame.ocr_config):
+            data = self._incremental_ocr(previous, frame)
 
-            # Search for target text
-            for i, text in enumerate(data['text']):
-                if text.lower() == target_text.lower():
-                    # Calculate center of bounding box
-                    x = data['left'][i]
-                    y = data['top'][i]
-                    w = data['width'][i]
-                    h = data['height'][i]
-                    
-                    center_x = x + w // 2
-                    center_y = y + h // 2
-                    
-                    return (center_x, center_y)
+        if data is None and self.config['text_regions']:
+            data = self._region_ocr(frame)
 
+        if data is None:
+            if frame.binary is None:
+                return None
+            data = self.run_ocr(frame.binary, frame.ocr_config)
+
+        if self.config['incremental']:
+            self._previous_frames[frame.key] = frame
+        return data
+
+    def _incremental_ocr(self, previous, frame):
+        """
+        OCR only the dirty rectangles between two frames and merge with the previous
+        word data. Returns None when a full pass is needed instead.
+        """
+        tile_size = self.config['tile_size']
+        grid = changed_tiles(previous.gray, frame.gray, tile_size)
+        changed = grid.mean() if grid.size else 1.0
+        if changed > self.config['incremental_max_changed']:
+            return None
+        if frame.binary is None:
             return None
+
+        rects = expand_to_lines(dirty_rects(grid, tile_size, frame.shape), previous.data, frame.shape)
+        crops = [
+            self.run_ocr(frame.binary[top:bottom, left:right], frame.ocr_config)
+            for left, top, right, bottom in rects
+        ]
+        self.logger.debug(f"Incremental OCR: {changed:.1%} of tiles changed, {len(rects)} regions re-read")
+        return merge_data(previous.data, crops, rects)
+
+    def _region_ocr(self, frame):
+        """
+        Detect candidate text boxes on a downscaled frame and OCR only those crops,
+        in parallel. Returns None when a single full pass is expected to be cheaper.
+        """
+        if frame.binary is None:
+            return None
+        rects = detect_text_regions(
+            frame.gray,
+            scale=self.config['region_scale'],
+            min_height=self.config['region_min_height'],
+            max_height=self.config['region_max_height']
+        )
+        if coverage(rects, frame.shape) > self.config['region_max_coverage']:
+            return None
+
+        if self._region_executor is None:
+            self._region_executor = ThreadPoolExecutor(
+                max_workers=self.config['region_workers'],
+                thread_name_prefix='ocr-region'
+            )
+        # A panel's own Tesseract settings (e.g. --psm 4 for the preset list) also suit its crops
+        config = frame.ocr_config if frame.ocr_config is not None else self.config['region_config']
+        # Threads only wait on Tesseract (a subprocess or a pool worker), so they overlap fully
+        crops = list(self._region_executor.map(
+            lambda rect: self.run_ocr(frame.binary[rect[1]:rect[3], rect[0]:rect[2]], config),
+            rects
+        ))
+        self.logger.debug(f"Region OCR: {len(rects)} text regions, {coverage(rects, frame.shape):.1%} of frame")
+        return merge_data(OCRResult.empty(), crops, rects)
+
+    def find_many(self, image, targets):
+        """
+        Find every target phrase (single or multi-word) in one pass over the OCR words
+        Returns {target: [match, ...]} in reading order; each match has the merged
+        left, top, width, height and mean conf of its words
+        """
+        try:
+            lines = self.as_frame(image).line_words()
+            with metrics.stage('match'):
+                return PhraseMatcher(dict.fromkeys(targets)).find_all(lines)
         except Exception as e:
             self.logger.error(f"Error finding text: {str(e)}")
+            return {target: [] for target in targets}
+
+    def find_text_box(self, image, target_text):
+        """
+        Find the bounding box of specific text in the image
+        Returns a dict with left, top, width, height and conf, or None
+        """
+        matches = self.find_many(image, [target_text])[target_text]
+        return matches[0] if matches else None
+
+    def find_text(self, image, target_text):
+        """
+        Find the location of specific text in the image
+        Returns the center coordinates of the found text
+        """
+        box = self.find_text_box(image, target_text)
+        if box is None:
             return None
 
+        # Calculate center of bounding box
+        center_x = box['left'] + box['width'] // 2
+        center_y = box['top'] + box['height'] // 2
+
+        return (center_x, center_y)
+
     def extract_all_text(self, image):
         """
         Extract all text from the image
         """
         try:
-            # Preprocess the image
-            processed_image = self.preprocess_image(image)
-            if processed_image is None:
+            frame = self.as_frame(image)
+            if frame.data is None:
                 return None
 
-            # Perform OCR
-            text = pytesseract.image_to_string(
-                processed_image,
-                lang=self.config['lang'],
-                config=self.config['config']
-            )
-
-            return text.strip()
+            return '\n'.join(frame.lines()).strip()
         except Exception as e:
             self.logger.error(f"Error extracting text: {str(e)}")
             return None
@@ -112,25 +283,9 @@ class OCRProcessor:
         Get confidence score for specific text in the image
         """
         try:
-            # Preprocess the image
-            processed_image = self.preprocess_image(image)
-            if processed_image is None:
-                return 0
-
-            # Get OCR data with confidence scores
-            data = pytesseract.image_to_data(
-                processed_image,
-                lang=self.config['lang'],
-                config=self.config['config'],
-                output_type=pytesseract.Output.DICT
-            )
-
             # Find highest confidence score for target text
-            max_conf = 0
-            for i, word in enumerate(data['text']):
-                if word.lower() == text.lower():
-                    conf = float(data['conf'][i])
-                    max_conf = max(max_conf, conf)
+            matches = self.find_many(image, [text])[text]
+            max_conf = max((match['conf'] for match in matches), default=0)
 
             return max_conf / 100.0  # Convert to 0-1 range
         except Exception as e:
@@ -142,7 +297,15 @@ class OCRProcessor:
         Update OCR configuration
         """
         try:
+            engine_changed = any(
+                key in new_config and new_config[key] != self.config.get(key)
+                for key in ENGINE_CONFIG_KEYS
+            )
             self.config.update(new_config)
+            if engine_changed or 'region_workers' in new_config:
+                self.close()
+            if not self.config['incremental']:
+                self._previous_frames = {}
             return True
         except Exception as e:
             self.logger.error(f"Error updating config: {str(e)}")
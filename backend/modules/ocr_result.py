@@ -0,0 +1,209 @@
+import sys
+import numpy as np
+from .phrase_matcher import normalize_token
+
+# Tesseract TSV columns: level page block par line word left top width height conf text
+WORD_LEVEL = 5
+TSV_FIELDS = 12
+
+WORD_DTYPE = np.dtype([
+    ('block', np.int32),
+    ('par', np.int32),
+    ('line', np.int32),
+    ('word', np.int32),
+    ('left', np.int32),
+    ('top', np.int32),
+    ('width', np.int32),
+    ('height', np.int32),
+    ('conf', np.float32),
+    ('text', np.int32),  # Index into texts
+    ('token', np.int32)  # Index into tokens
+])
+
+
+class OCRResult:
+    """
+    Words recognized in one Tesseract pass, stored as a numpy structured array
+    (box, confidence, block/paragraph/line ids) plus interned string tables.
+
+    Only word-level rows with text are kept. Raw texts and their normalized
+    tokens are stored once each and referenced by index, so repeated labels
+    cost one string and token lookups compare integers.
+    """
+
+    def __init__(self, words=None, texts=None, tokens=None):
+        self.words = np.zeros(0, dtype=WORD_DTYPE) if words is None else words
+        self.texts = texts if texts is not None else []
+        self.tokens = tokens if tokens is not None else []
+        self._token_ids = None
+
+    @classmethod
+    def empty(cls):
+        return cls()
+
+    @classmethod
+    def from_tsv(cls, tsv, has_header=False):
+        """
+        Parse Tesseract TSV output (image_to_data / GetTSVText)
+        """
+        lines = tsv.splitlines()
+        if has_header:
+            lines = lines[1:]
+
+        numbers = []
+        text_ids = []
+        texts, text_ids_by_value = [], {}
+        tokens, token_ids = [], {}
+        token_of_text = []
+        for line in lines:
+            fields = line.split('\t', TSV_FIELDS - 1)
+            if len(fields) < TSV_FIELDS or fields[0] != '5':
+                continue
+            text = fields[-1].strip()
+            if not text:
+                continue
+            text_id = text_ids_by_value.get(text)
+            if text_id is None:
+                text_id = len(texts)
+                text_ids_by_value[text] = text_id
+                texts.append(sys.intern(text))
+                token = normalize_token(text)
+                token_id = token_ids.get(token)
+                if token_id is None:
+                    token_id = len(tokens)
+                    token_ids[token] = token_id
+                    tokens.append(sys.intern(token))
+                token_of_text.append(token_id)
+            numbers.append(fields[2:11])
+            text_ids.append(text_id)
+
+        words = np.zeros(len(numbers), dtype=WORD_DTYPE)
+        if numbers:
+            values = np.array(numbers, dtype=np.float64)
+            for column, name in enumerate(('block', 'par', 'line', 'word', 'left', 'top', 'width', 'height')):
+                words[name] = values[:, column]
+            words['conf'] = values[:, 8]
+            words['text'] = text_ids
+            words['token'] = np.asarray(token_of_text, dtype=np.int32)[words['text']]
+        result = cls(words, texts, tokens)
+        result._token_ids = token_ids
+        return result
+
+    def __len__(self):
+        return len(self.words)
+
+    @property
+    def nbytes(self):
+        """
+        Approximate memory held by the array and string tables
+        """
+        return self.words.nbytes + sum(sys.getsizeof(s) for s in self.texts) + \
+            sum(sys.getsizeof(s) for s in self.tokens)
+
+    def token_id(self, token):
+        """
+        Index of a normalized token in this result's table, or -1 if it never occurs
+        """
+        if self._token_ids is None:
+            self._token_ids = {token: index for index, token in enumerate(self.tokens)}
+        return self._token_ids.get(token, -1)
+
+    def text(self, index):
+        return self.texts[self.words['text'][index]]
+
+    def all_texts(self):
+        return [self.texts[index] for index in self.words['text']]
+
+    def find(self, text):
+        """
+        Indices of words whose normalized token equals that of text
+        """
+        token_id = self.token_id(normalize_token(text))
+        if token_id < 0:
+            return np.zeros(0, dtype=np.intp)
+        return np.flatnonzero(self.words['token'] == token_id)
+
+    def mask(self, min_conf=None, region=None):
+        """
+        Boolean mask of words at or above a confidence and/or overlapping a
+        (left, top, right, bottom) region
+        """
+        keep = np.ones(len(self.words), dtype=bool)
+        if min_conf is not None:
+            keep &= self.words['conf'] >= min_conf
+        if region is not None:
+            keep &= self.intersecting(region)
+        return keep
+
+    def intersecting(self, rect):
+        left, top, right, bottom = rect
+        words = self.words
+        return ~((words['left'] + words['width'] <= left) | (words['left'] >= right) |
+                 (words['top'] + words['height'] <= top) | (words['top'] >= bottom))
+
+    def filter(self, min_conf=None, region=None):
+        return self.select(self.mask(min_conf, region))
+
+    def select(self, selection):
+        """
+        Subset by mask or indices; the string tables are shared, not copied
+        """
+        result = OCRResult(self.words[selection], self.texts, self.tokens)
+        result._token_ids = self._token_ids
+        return result
+
+    def shifted(self, dx=0, dy=0, block_offset=0):
+        """
+        Copy with boxes moved by (dx, dy) and block ids renumbered from block_offset
+        """
+        words = self.words.copy()
+        words['left'] += dx
+        words['top'] += dy
+        words['block'] += block_offset
+        result = OCRResult(words, self.texts, self.tokens)
+        result._token_ids = self._token_ids
+        return result
+
+    def line_groups(self):
+        """
+        Index arrays of the words on each Tesseract line, in reading order
+        """
+        words = self.words
+        if not len(words):
+            return []
+        keys = np.stack([words['block'], words['par'], words['line']], axis=1)
+        starts = np.flatnonzero(np.any(keys[1:] != keys[:-1], axis=1)) + 1
+        return np.split(np.arange(len(words)), starts)
+
+    @classmethod
+    def concatenate(cls, results):
+        """
+        Join results in order, merging their string tables
+        """
+        results = [result for result in results if len(result)]
+        if not results:
+            return cls.empty()
+        if len(results) == 1:
+            return results[0]
+        texts, text_ids = [], {}
+        tokens, token_ids = [], {}
+        parts = []
+        for result in results:
+            # Map this result's table indices onto the merged tables
+            text_map = np.empty(len(result.texts), dtype=np.int32)
+            for index, text in enumerate(result.texts):
+                text_map[index] = text_ids.setdefault(text, len(texts))
+                if text_map[index] == len(texts):
+                    texts.append(text)
+            token_map = np.empty(len(result.tokens), dtype=np.int32)
+            for index, token in enumerate(result.tokens):
+                token_map[index] = token_ids.setdefault(token, len(tokens))
+                if token_map[index] == len(tokens):
+                    tokens.append(token)
+            words = result.words.copy()
+            words['text'] = text_map[words['text']]
+            words['token'] = token_map[words['token']]
+            parts.append(words)
+        merged = cls(np.concatenate(parts), texts, tokens)
+        merged._token_ids = token_ids
+        return merged
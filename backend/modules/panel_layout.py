@@ -0,0 +1,140 @@
+import copy
+import json
+import logging
+import os
+
+# Panel rectangles as fractions (left, top, right, bottom) of the captured window,
+# with the Tesseract settings that suit the text each panel holds
+DEFAULT_PANELS = {
+    'presets': {
+        'rect': [0.0, 0.08, 0.22, 0.95],
+        'config': '--psm 4'  # A single column of list rows
+    },
+    'develop': {
+        'rect': [0.76, 0.08, 1.0, 0.95],
+        'config': '--psm 11'
+    },
+    'dialog': {
+        'rect': [0.12, 0.05, 0.88, 0.95],
+        'config': '--psm 11'
+    }
+}
+
+
+class PanelLayout:
+    """
+    Maps Lightroom panels to screen crops so each lookup OCRs only the panel its
+    element lives in. Pixel rectangles are recalculated whenever the captured
+    window size changes, and panels grow when an element of theirs is found
+    outside them, by at most max_growth of the window past their configured
+    bounds per side. Learned bounds persist to data/panel_layout.json until reset().
+    """
+
+    def __init__(self, path=os.path.join('data', 'panel_layout.json'), max_growth=0.1):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.max_growth = max_growth
+        self.panels = copy.deepcopy(DEFAULT_PANELS)
+        # Configured bounds, which learning grows from and reset() returns to
+        self.base = copy.deepcopy(DEFAULT_PANELS)
+        self.geometry = None
+        self.rects = {}
+        self.load()
+
+    def load(self):
+        try:
+            if os.path.exists(self.path):
+                with open(self.path) as f:
+                    stored = json.load(f)
+                for name, spec in stored.items():
+                    self.panels.setdefault(name, {}).update(spec)
+                    self.base.setdefault(name, copy.deepcopy(spec))
+        except Exception as e:
+            self.logger.error(f"Error loading panel layout: {str(e)}")
+
+    def save(self):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.panels, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            self.logger.error(f"Error saving panel layout: {str(e)}")
+
+    def update_panels(self, panels):
+        """
+        Merge panel definitions from configuration
+        """
+        for name, spec in panels.items():
+            self.panels.setdefault(name, {}).update(spec)
+            self.base.setdefault(name, {}).update(copy.deepcopy(spec))
+        self.geometry = None
+
+    def reset(self):
+        """
+        Forget learned bounds and go back to the configured panels
+        """
+        self.panels = copy.deepcopy(self.base)
+        self.geometry = None
+        try:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        except Exception as e:
+            self.logger.error(f"Error resetting panel layout: {str(e)}")
+
+    def recalibrate(self, shape):
+        """
+        Recompute pixel rectangles for a new window geometry
+        """
+        height, width = shape[:2]
+        self.rects = {}
+        for name, spec in self.panels.items():
+            left, top, right, bottom = spec['rect']
+            self.rects[name] = (
+                int(left * width), int(top * height),
+                int(round(right * width)), int(round(bottom * height))
+            )
+        self.geometry = (height, width)
+        self.logger.info(f"Panel layout calibrated for {width}x{height}")
+
+    def rect(self, panel, shape):
+        """
+        Pixel rectangle (left, top, right, bottom) of a panel in a frame of this shape
+        """
+        if panel not in self.panels:
+            return None
+        if self.geometry != tuple(shape[:2]):
+            self.recalibrate(shape)
+        return self.rects[panel]
+
+    def ocr_config(self, panel):
+        return self.panels.get(panel, {}).get('config')
+
+    def learn(self, panel, box, shape, margin=10):
+        """
+        Grow a panel to include an element of it that was found outside its bounds.
+        A hit further than max_growth outside the configured bounds is more likely
+        the same word elsewhere on screen, so it is ignored. Returns True if learned.
+        """
+        if panel not in self.panels:
+            return False
+        height, width = shape[:2]
+        left, top, right, bottom = self.panels[panel]['rect']
+        rect = [
+            min(left, max(box['left'] - margin, 0) / width),
+            min(top, max(box['top'] - margin, 0) / height),
+            max(right, min(box['left'] + box['width'] + margin, width) / width),
+            max(bottom, min(box['top'] + box['height'] + margin, height) / height)
+        ]
+        base_left, base_top, base_right, base_bottom = self.base.get(panel, self.panels[panel])['rect']
+        if (rect[0] < base_left - self.max_growth or rect[1] < base_top - self.max_growth
+                or rect[2] > base_right + self.max_growth or rect[3] > base_bottom + self.max_growth):
+            self.logger.warning(f"Not growing panel '{panel}' to {rect}: too far outside its bounds")
+            return False
+        self.panels[panel]['rect'] = rect
+        self.recalibrate(shape)
+        self.save()
+        return True
@@ -0,0 +1,100 @@
+from collections import deque
+import re
+
+_EDGE_PUNCTUATION = re.compile(r'^[^\w]+|[^\w]+$')
+
+
+def normalize_token(token):
+    """
+    Case-fold an OCR word and strip punctuation from its ends ("Export..." -> "export")
+    """
+    token = str(token).strip().casefold()
+    stripped = _EDGE_PUNCTUATION.sub('', token)
+    return stripped or token
+
+
+def tokenize(phrase):
+    return [normalize_token(token) for token in str(phrase).split() if normalize_token(token)]
+
+
+class PhraseMatcher:
+    """
+    Aho-Corasick automaton over word tokens, so any number of target phrases
+    (single or multi-word) are found in one pass over the OCR word stream
+    """
+
+    def __init__(self, phrases):
+        self.phrases = list(phrases)
+        # Node 0 is the root; each node has goto edges, a failure link and outputs
+        self._goto = [{}]
+        self._fail = [0]
+        self._outputs = [[]]
+        for index, phrase in enumerate(self.phrases):
+            tokens = tokenize(phrase)
+            if tokens:
+                self._insert(tokens, index)
+        self._build_failure_links()
+
+    def _insert(self, tokens, index):
+        node = 0
+        for token in tokens:
+            following = self._goto[node].get(token)
+            if following is None:
+                following = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+                self._goto[node][token] = following
+            node = following
+        self._outputs[node].append((index, len(tokens)))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(token, 0)
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+
+    def scan(self, tokens):
+        """
+        Yield (phrase_index, start, end) for every phrase occurring in a token sequence;
+        end is exclusive
+        """
+        node = 0
+        for position, token in enumerate(tokens):
+            while node and token not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(token, 0)
+            for index, length in self._outputs[node]:
+                yield index, position - length + 1, position + 1
+
+    def find_all(self, lines):
+        """
+        Match phrases line by line (phrases never span lines).
+        lines is a list of word lists; each word is a dict with a 'token' plus
+        left, top, width, height and conf. Returns {phrase: [match, ...]} in reading
+        order, where each match has the merged box and mean confidence of its words.
+        """
+        results = {phrase: [] for phrase in self.phrases}
+        for words in lines:
+            tokens = [word['token'] for word in words]
+            for index, start, end in self.scan(tokens):
+                matched = words[start:end]
+                left = min(word['left'] for word in matched)
+                top = min(word['top'] for word in matched)
+                right = max(word['left'] + word['width'] for word in matched)
+                bottom = max(word['top'] + word['height'] for word in matched)
+                results[self.phrases[index]].append({
+                    'left': left,
+                    'top': top,
+                    'width': right - left,
+                    'height': bottom - top,
+                    'conf': sum(word['conf'] for word in matched) / len(matched),
+                    'text': ' '.join(word['text'] for word in matched)
+                })
+        return results
@@ -0,0 +1,120 @@
+import json
+import logging
+import os
+import time
+from .frame import normalize_text
+
+# Rows whose left edge is within this many pixels of the leftmost row are group headers;
+# presets are indented under them
+GROUP_INDENT_TOLERANCE = 6
+
+
+def normalize_name(name):
+    """
+    Normalize a preset name for lookup: case-folded, single-spaced
+    """
+    return ' '.join(normalize_text(name).split())
+
+
+class PresetCatalog:
+    """
+    Index of every preset in the presets panel: its group, the scroll offset
+    (in scroll steps from the top) at which it is visible, and its row position
+    relative to the panel. Persisted to data/preset_catalog.json.
+    """
+
+    def __init__(self, path=os.path.join('data', 'preset_catalog.json')):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.presets = {}
+        self.geometry = None
+        self.scanned_at = None
+        # Scroll steps from the top the panel is believed to be at
+        self.scroll_offset = 0
+        self._group_indent = None
+        self._group = None
+        self.load()
+
+    def load(self):
+        try:
+            if not os.path.exists(self.path):
+                return
+            with open(self.path) as f:
+                stored = json.load(f)
+            self.presets = stored.get('presets', {})
+            self.geometry = tuple(stored['geometry']) if stored.get('geometry') else None
+            self.scanned_at = stored.get('scanned_at')
+            self.logger.info(f"Loaded preset catalog with {len(self.presets)} presets")
+        except Exception as e:
+            self.logger.error(f"Error loading preset catalog: {str(e)}")
+
+    def save(self):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump({
+                    'presets': self.presets,
+                    'geometry': list(self.geometry) if self.geometry else None,
+                    'scanned_at': self.scanned_at
+                }, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            self.logger.error(f"Error saving preset catalog: {str(e)}")
+
+    def get(self, preset_name):
+        return self.presets.get(normalize_name(preset_name))
+
+    def is_valid_for(self, panel_rect):
+        """
+        Whether the stored row positions were recorded for this panel geometry
+        """
+        return bool(self.presets) and self.geometry == tuple(panel_rect)
+
+    def begin_scan(self, panel_rect):
+        self.presets = {}
+        self.geometry = tuple(panel_rect)
+        self.scroll_offset = 0
+        self._group_indent = None
+        self._group = None
+
+    def add_page(self, lines, scroll_offset, panel_rect):
+        """
+        Record the rows visible at one scroll offset.
+        lines are Frame.line_boxes() of the panel, in screenshot coordinates.
+        Returns the number of presets not seen on earlier pages.
+        """
+        if not lines:
+            return 0
+        left_edge = min(line['left'] for line in lines)
+        if self._group_indent is None:
+            self._group_indent = left_edge
+
+        added = 0
+        for line in sorted(lines, key=lambda l: l['top']):
+            name = normalize_name(line['text'])
+            if not name:
+                continue
+            if line['left'] <= self._group_indent + GROUP_INDENT_TOLERANCE:
+                self._group = line['text']
+                continue
+            if name in self.presets:
+                continue
+            self.presets[name] = {
+                'name': line['text'],
+                'group': self._group,
+                'scroll_offset': scroll_offset,
+                # Row center relative to the panel's top-left corner
+                'row_x': line['left'] + line['width'] // 2 - panel_rect[0],
+                'row_y': line['top'] + line['height'] // 2 - panel_rect[1],
+                'row_height': line['height']
+            }
+            added += 1
+        return added
+
+    def finish_scan(self):
+        self.scanned_at = time.time()
+        self.save()
+        self.logger.info(f"Preset catalog scanned: {len(self.presets)} presets")
@@ -0,0 +1,236 @@
+import logging
+import os
+import tempfile
+import time
+from collections import Counter
+from .chat_commands import ChatCommandProcessor
+from .input_backend import FakeInput
+from .lightroom_controller import LightroomController
+from .metrics import metrics
+from .ocr_result import OCRResult
+from .screen_capture import CaptureBackend
+from .trace import TraceReader
+
+# Backend choices are replaced during a replay; waits are dropped to run at full speed
+REPLAY_CONFIG_OVERRIDES = {'settle_interval': 0, 'click_delay': 0}
+IGNORED_CONFIG_KEYS = ('capture_backend', 'input_backend')
+
+
+class ReplayCapture(CaptureBackend):
+    """
+    Serves the frames recorded for the current command, in order. Each capture
+    returns the next recorded frame of the same region; when the replay asks for
+    more frames than were recorded, the last one is served again.
+    """
+
+    name = 'replay'
+
+    def __init__(self, reader):
+        super().__init__()
+        self.reader = reader
+        self.queue = []
+        self.position = 0
+        self.misses = 0
+        self._regions = {}
+        self._last = {}
+
+    def seek(self, offsets):
+        self.queue = offsets
+        self.position = 0
+
+    def _region(self, offset):
+        region = self._regions.get(offset)
+        if region is None:
+            recorded = self.reader.meta(offset)['region']
+            region = self._regions[offset] = tuple(recorded) if recorded else ()
+        return region
+
+    def _capture(self, region):
+        wanted = tuple(region) if region else ()
+        for index in range(self.position, len(self.queue)):
+            if self._region(self.queue[index]) == wanted:
+                self.position = index + 1
+                pixels = self.reader.frame(self.queue[index])
+                self._last[wanted] = pixels
+                return pixels
+        self.misses += 1
+        if wanted in self._last:
+            return self._last[wanted]
+        raise RuntimeError(f"No recorded frame for region {region}")
+
+
+class ReplayEngine:
+    """
+    OCR engine for replays. Without an inner engine it returns the recorded
+    result of the next OCR call with the same settings and image shape, so no
+    Tesseract runs at all; with one, it runs real OCR and compares the words
+    against the recording. Calls with no recorded counterpart go to fallback.
+    """
+
+    name = 'replay'
+
+    def __init__(self, reader, inner=None, fallback=None):
+        self.reader = reader
+        self.inner = inner
+        self.fallback = fallback
+        self.queue = []
+        self.position = 0
+        self.misses = 0
+        self.words_recorded = 0
+        self.words_replayed = 0
+        self.words_matched = 0
+
+    def seek(self, offsets):
+        self.queue = offsets
+        self.position = 0
+
+    def _next_recorded(self, shape, lang, config):
+        for index in range(self.position, len(self.queue)):
+            result, meta = self.reader.ocr(self.queue[index])
+            if tuple(meta['shape']) == tuple(shape) and meta['config'] == config and meta['lang'] == lang:
+                self.position = index + 1
+                return result
+        return None
+
+    def image_to_data(self, image, lang, config):
+        recorded = self._next_recorded(image.shape, lang, config)
+        if recorded is None:
+            self.misses += 1
+            engine = self.inner or self.fallback
+            return engine.image_to_data(image, lang, config) if engine else OCRResult.empty()
+        if self.inner is None:
+            return recorded
+
+        result = self.inner.image_to_data(image, lang, config)
+        expected = Counter(recorded.all_texts())
+        actual = Counter(result.all_texts())
+        self.words_recorded += sum(expected.values())
+        self.words_replayed += sum(actual.values())
+        self.words_matched += sum((expected & actual).values())
+        return result
+
+    def image_to_string(self, image, lang, config):
+        engine = self.inner or self.fallback
+        return engine.image_to_string(image, lang, config) if engine else ''
+
+    def stats(self):
+        return {
+            'misses': self.misses,
+            'words_recorded': self.words_recorded,
+            'words_replayed': self.words_replayed,
+            'words_matched': self.words_matched
+        }
+
+    def close(self):
+        if self.inner is not None:
+            self.inner.close()
+
+
+class TraceReplayer:
+    """
+    Replays a recorded trace offline at full speed: a controller with the
+    recorded configuration and state is fed the recorded frames, and every
+    command is run again through ChatCommandProcessor. Reports per-command
+    timing next to the recorded timing, whether results and input events still
+    match, and (with ocr='run') how well fresh OCR agrees with the recording.
+
+    ocr='recorded' serves recorded OCR results to profile and regression-test
+    everything but Tesseract; ocr='run' runs the configured OCR engine.
+    State files written during the replay go to workdir (a temporary directory
+    by default), never to the live data directory.
+    """
+
+    def __init__(self, path, ocr='recorded', workdir=None, config_overrides=None):
+        self.logger = logging.getLogger(__name__)
+        self.reader = TraceReader(path)
+        self.ocr_mode = ocr
+        self.workdir = workdir or tempfile.mkdtemp(prefix='lightroom-replay-')
+        self.config_overrides = dict(REPLAY_CONFIG_OVERRIDES, **(config_overrides or {}))
+        self.capture = ReplayCapture(self.reader)
+        self.input = FakeInput()
+        self.controller, self.chat_processor = self._build()
+
+    def _build(self):
+        session, files, templates = self.reader.session()
+        for name, data in files.items():
+            with open(os.path.join(self.workdir, name), 'wb') as f:
+                f.write(data)
+
+        # State is loaded from the session copy; the live data directory is never read or written
+        controller = LightroomController(capture_backend=self.capture, input_backend=self.input, data_dir=self.workdir)
+        controller.templates.extend(templates)
+
+        # Overrides go to the controller or the OCR processor, whichever has the key
+        config = {key: value for key, value in session['controller_config'].items() if key not in IGNORED_CONFIG_KEYS}
+        ocr_config = dict(session['ocr_config'])
+        for key, value in self.config_overrides.items():
+            (ocr_config if key in ocr_config else config)[key] = value
+        controller.update_config(config)
+        controller.ocr.update_config(ocr_config)
+        inner = controller.ocr.engine if self.ocr_mode == 'run' else None
+        controller.ocr._engine = ReplayEngine(self.reader, inner=inner, fallback=controller.ocr._fallback_engine)
+
+        chat_processor = ChatCommandProcessor(controller)
+        if session.get('edit_state'):
+            chat_processor.edit_state.restore(session['edit_state'])
+        return controller, chat_processor
+
+    def run(self):
+        """
+        Replay every command once and return the report
+        """
+        metrics.reset()
+        engine = self.controller.ocr._engine
+        commands = []
+        start = time.perf_counter()
+        for recorded in self.reader.commands():
+            # Every command starts from its own recorded frames, so one divergence does not cascade
+            self.capture.seek(recorded['frames'])
+            engine.seek(recorded['ocr'])
+            self.controller.invalidate_frame()
+            self.input.events = []
+
+            command_start = time.perf_counter()
+            if 'batch' in recorded:
+                result = self.chat_processor.process_batch(recorded['batch'], recorded.get('stop_on_error', True))
+            else:
+                result = self.chat_processor.process_command(recorded['command'])
+            elapsed = time.perf_counter() - command_start
+
+            expected = recorded['result'] or {}
+            recorded_inputs = [self.reader.meta(offset) for offset in recorded['inputs']]
+            replayed_inputs = [{'name': name, 'args': list(args)} for name, args, _ in self.input.events]
+            commands.append({
+                'command': recorded.get('command') or recorded['batch'],
+                'recorded_ms': expected.get('elapsed', 0) * 1000,
+                'replayed_ms': elapsed * 1000,
+                'success': result.get('success'),
+                'result_matches': (expected.get('result') or {}).get('success') == result.get('success'),
+                'inputs_match': _normalize_events(recorded_inputs) == _normalize_events(replayed_inputs),
+                'frames_recorded': len(recorded['frames']),
+                'frames_used': self.capture.position
+            })
+
+        return {
+            'trace': self.reader.path,
+            'ocr': self.ocr_mode,
+            'commands': commands,
+            'total_ms': (time.perf_counter() - start) * 1000,
+            'recorded_total_ms': sum(command['recorded_ms'] for command in commands),
+            'mismatched_results': sum(not command['result_matches'] for command in commands),
+            'mismatched_inputs': sum(not command['inputs_match'] for command in commands),
+            'capture_misses': self.capture.misses,
+            'ocr_calls': engine.stats(),
+            'stages': metrics.snapshot()['histograms']
+        }
+
+    def close(self):
+        self.controller.ocr.close()
+        self.reader.close()
+
+
+def _normalize_events(events):
+    # JSON turns tuples into lists and ints may come back as floats
+    return [(event['name'], [round(v, 3) if isinstance(v, float) else v for v in event['args']])
+            for event in events]
+
@@ -0,0 +1,384 @@
+import ctypes
+import ctypes.util
+import logging
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from .metrics import metrics
+
+ZPIXMAP = 2
+ALL_PLANES = 0xFFFFFFFF
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+
+
+class _XErrorEvent(ctypes.Structure):
+    _fields_ = [
+        ('type', ctypes.c_int),
+        ('display', ctypes.c_void_p),
+        ('resourceid', ctypes.c_ulong),
+        ('serial', ctypes.c_ulong),
+        ('error_code', ctypes.c_ubyte),
+        ('request_code', ctypes.c_ubyte),
+        ('minor_code', ctypes.c_ubyte)
+    ]
+
+
+_X_ERROR_HANDLER_TYPE = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(_XErrorEvent))
+# Last X protocol error per display connection, set by the handler below
+_x_errors = {}
+_x_error_handler = None
+_x_error_lock = threading.Lock()
+
+
+@_X_ERROR_HANDLER_TYPE
+def _record_x_error(display, event):
+    # Xlib's default handler exits the process; remember the error so the caller can raise instead
+    _x_errors[display] = (event.contents.error_code, event.contents.request_code)
+    return 0
+
+
+def install_x_error_handler(xlib):
+    """
+    Replace Xlib's process-wide error handler (once) with one that records errors
+    """
+    global _x_error_handler
+    with _x_error_lock:
+        if _x_error_handler is None:
+            xlib.XSetErrorHandler.restype = ctypes.c_void_p
+            xlib.XSetErrorHandler.argtypes = [_X_ERROR_HANDLER_TYPE]
+            xlib.XSetErrorHandler(_record_x_error)
+            _x_error_handler = _record_x_error
+
+
+def raise_x_error(display, action):
+    """
+    Raise a RuntimeError for an X error recorded on this display since the last check
+    """
+    error = _x_errors.pop(display, None)
+    if error is not None:
+        raise RuntimeError(f"{action} failed with X error {error[0]} (request {error[1]})")
+
+
+class CaptureBackend:
+    """
+    Base class for screen capture backends.
+
+    capture(region) returns an HxWxC uint8 array for region (left, top, width, height),
+    or the full screen when region is None. Backends that reuse a buffer return a
+    view that stays valid only until the next capture.
+    """
+
+    name = 'base'
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self.frames = 0
+        self.total_time = 0.0
+        self.bytes_allocated = 0
+
+    def capture(self, region=None):
+        start = time.perf_counter()
+        image = self._capture(region)
+        elapsed = time.perf_counter() - start
+        self.total_time += elapsed
+        self.frames += 1
+        metrics.observe('lightroom_stage_seconds', elapsed, stage='capture')
+        return image
+
+    def _capture(self, region):
+        raise NotImplementedError
+
+    def stats(self):
+        """
+        Per-frame capture time and bytes this backend allocated
+        """
+        frames = max(self.frames, 1)
+        return {
+            'backend': self.name,
+            'frames': self.frames,
+            'avg_capture_ms': self.total_time / frames * 1000,
+            'avg_bytes_allocated': self.bytes_allocated / frames
+        }
+
+    def close(self):
+        pass
+
+
+class PyAutoGUICapture(CaptureBackend):
+    """
+    Original path: pyautogui.screenshot -> PIL image -> np.array (two full copies)
+    """
+
+    name = 'pyautogui'
+
+    def _capture(self, region):
+        import pyautogui
+        screenshot = pyautogui.screenshot(region=region)
+        image = np.array(screenshot)
+        self.bytes_allocated += 2 * image.nbytes
+        return image
+
+
+class X11Capture(CaptureBackend):
+    """
+    Captures the X11 root window straight into a reused buffer.
+    Uses MIT-SHM (XShmGetImage, zero copy) when the server supports it, otherwise
+    XGetImage with one copy into the reused numpy buffer. Pixels are BGRA.
+    """
+
+    name = 'x11'
+
+    class _ShmSegmentInfo(ctypes.Structure):
+        _fields_ = [
+            ('shmseg', ctypes.c_ulong),
+            ('shmid', ctypes.c_int),
+            ('shmaddr', ctypes.c_void_p),
+            ('readOnly', ctypes.c_int)
+        ]
+
+    class _XImage(ctypes.Structure):
+        # Only the leading fields are read; the struct is always used through a pointer
+        _fields_ = [
+            ('width', ctypes.c_int),
+            ('height', ctypes.c_int),
+            ('xoffset', ctypes.c_int),
+            ('format', ctypes.c_int),
+            ('data', ctypes.c_void_p),
+            ('byte_order', ctypes.c_int),
+            ('bitmap_unit', ctypes.c_int),
+            ('bitmap_bit_order', ctypes.c_int),
+            ('bitmap_pad', ctypes.c_int),
+            ('depth', ctypes.c_int),
+            ('bytes_per_line', ctypes.c_int),
+            ('bits_per_pixel', ctypes.c_int)
+        ]
+
+    def __init__(self, display_name=None, use_shm=True):
+        super().__init__()
+        self.xlib = ctypes.CDLL(ctypes.util.find_library('X11'))
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'))
+        self._declare_functions()
+        install_x_error_handler(self.xlib)
+
+        self.display = self.xlib.XOpenDisplay(display_name.encode() if display_name else None)
+        if not self.display:
+            raise RuntimeError(f"Cannot open X display {display_name or ''}")
+        screen = self.xlib.XDefaultScreen(self.display)
+        self.root = self.xlib.XRootWindow(self.display, screen)
+        self.visual = self.xlib.XDefaultVisual(self.display, screen)
+        self.depth = self.xlib.XDefaultDepth(self.display, screen)
+        self.screen_size = (
+            self.xlib.XDisplayWidth(self.display, screen),
+            self.xlib.XDisplayHeight(self.display, screen)
+        )
+
+        self.xext = None
+        if use_shm:
+            try:
+                self.xext = ctypes.CDLL(ctypes.util.find_library('Xext'))
+                self._declare_shm_functions()
+                if not self.xext.XShmQueryExtension(self.display):
+                    self.xext = None
+            except (OSError, TypeError):
+                self.xext = None
+        if self.xext is not None:
+            self.name = 'x11-shm'
+
+        # Reused buffers per region size, so alternating full-frame and small-region
+        # captures (e.g. settle polling) do not reallocate every time
+        self.max_buffers = 4
+        self._buffers = OrderedDict()
+
+    def _declare_functions(self):
+        xlib = self.xlib
+        xlib.XOpenDisplay.restype = ctypes.c_void_p
+        xlib.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        xlib.XDefaultScreen.argtypes = [ctypes.c_void_p]
+        xlib.XRootWindow.restype = ctypes.c_ulong
+        xlib.XRootWindow.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XDefaultVisual.restype = ctypes.c_void_p
+        xlib.XDefaultVisual.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XDefaultDepth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XDisplayWidth.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XDisplayHeight.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XGetImage.restype = ctypes.POINTER(self._XImage)
+        xlib.XGetImage.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_int, ctypes.c_int,
+                                   ctypes.c_uint, ctypes.c_uint, ctypes.c_ulong, ctypes.c_int]
+        xlib.XDestroyImage.argtypes = [ctypes.POINTER(self._XImage)]
+        xlib.XSync.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        xlib.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        self.libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+        self.libc.shmat.restype = ctypes.c_void_p
+        self.libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+        self.libc.shmdt.argtypes = [ctypes.c_void_p]
+        self.libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+    def _declare_shm_functions(self):
+        xext = self.xext
+        xext.XShmQueryExtension.argtypes = [ctypes.c_void_p]
+        xext.XShmCreateImage.restype = ctypes.POINTER(self._XImage)
+        xext.XShmCreateImage.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int,
+                                         ctypes.c_void_p, ctypes.POINTER(self._ShmSegmentInfo),
+                                         ctypes.c_uint, ctypes.c_uint]
+        xext.XShmAttach.argtypes = [ctypes.c_void_p, ctypes.POINTER(self._ShmSegmentInfo)]
+        xext.XShmDetach.argtypes = [ctypes.c_void_p, ctypes.POINTER(self._ShmSegmentInfo)]
+        xext.XShmGetImage.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.POINTER(self._XImage),
+                                      ctypes.c_int, ctypes.c_int, ctypes.c_ulong]
+
+    def _resolve_region(self, region):
+        if region is None:
+            return 0, 0, self.screen_size[0], self.screen_size[1]
+        # Clip to the root window: an out-of-bounds request is a BadMatch error
+        left, top, width, height = (int(v) for v in region)
+        right = min(left + width, self.screen_size[0])
+        bottom = min(top + height, self.screen_size[1])
+        left, top = max(left, 0), max(top, 0)
+        if right <= left or bottom <= top:
+            raise ValueError(f"Capture region {region} is outside the screen")
+        return left, top, right - left, bottom - top
+
+    def _allocate(self, width, height):
+        """
+        Create a reused capture buffer for a region size, evicting the least recently used one
+        """
+        while len(self._buffers) >= self.max_buffers:
+            _, entry = self._buffers.popitem(last=False)
+            self._release(entry)
+
+        image = info = None
+        if self.xext is not None:
+            info = self._ShmSegmentInfo()
+            image = self.xext.XShmCreateImage(self.display, self.visual, self.depth, ZPIXMAP,
+                                              None, ctypes.byref(info), width, height)
+            nbytes = image.contents.bytes_per_line * height
+            info.shmid = self.libc.shmget(IPC_PRIVATE, nbytes, IPC_CREAT | 0o600)
+            info.shmaddr = self.libc.shmat(info.shmid, None, 0)
+            info.readOnly = 0
+            image.contents.data = info.shmaddr
+            self.xext.XShmAttach(self.display, ctypes.byref(info))
+            self.xlib.XSync(self.display, 0)
+            # Mark for removal now; the segment lives until both sides detach
+            self.libc.shmctl(info.shmid, IPC_RMID, None)
+            raw = (ctypes.c_uint8 * nbytes).from_address(info.shmaddr)
+            stride = image.contents.bytes_per_line // 4
+            buffer = np.ctypeslib.as_array(raw).reshape(height, stride, 4)[:, :width]
+        else:
+            buffer = np.empty((height, width, 4), dtype=np.uint8)
+        self.bytes_allocated += buffer.nbytes
+        entry = (image, info, buffer)
+        self._buffers[(width, height)] = entry
+        return entry
+
+    def _capture(self, region):
+        left, top, width, height = self._resolve_region(region)
+        entry = self._buffers.get((width, height))
+        if entry is None:
+            entry = self._allocate(width, height)
+        else:
+            self._buffers.move_to_end((width, height))
+        shm_image, _, buffer = entry
+
+        if shm_image is not None:
+            ok = self.xext.XShmGetImage(self.display, self.root, shm_image, left, top, ALL_PLANES)
+            raise_x_error(self.display, 'XShmGetImage')
+            if not ok:
+                raise RuntimeError('XShmGetImage failed')
+            return buffer
+
+        image = self.xlib.XGetImage(self.display, self.root, left, top, width, height,
+                                    ALL_PLANES, ZPIXMAP)
+        raise_x_error(self.display, 'XGetImage')
+        if not image:
+            raise RuntimeError('XGetImage failed')
+        try:
+            contents = image.contents
+            raw = (ctypes.c_uint8 * (contents.bytes_per_line * height)).from_address(contents.data)
+            source = np.ctypeslib.as_array(raw).reshape(height, contents.bytes_per_line // 4, 4)
+            np.copyto(buffer, source[:, :width])
+        finally:
+            self.xlib.XDestroyImage(image)
+        return buffer
+
+    def _release(self, entry):
+        shm_image, info, _ = entry
+        if shm_image is not None:
+            self.xext.XShmDetach(self.display, ctypes.byref(info))
+            self.xlib.XDestroyImage(shm_image)
+            self.libc.shmdt(info.shmaddr)
+
+    def close(self):
+        if self.display:
+            while self._buffers:
+                _, entry = self._buffers.popitem()
+                self._release(entry)
+            self.xlib.XCloseDisplay(self.display)
+            self.display = None
+
+
+class FakeCapture(CaptureBackend):
+    """
+    Serves frames from arrays or image files, for headless runs and tests.
+    Each capture returns the current frame (cropped to the region, as a view);
+    with advance=True every capture moves on to the next frame.
+    """
+
+    name = 'fake'
+
+    def __init__(self, frames=None, advance=False):
+        super().__init__()
+        self.frames_source = [self._load(frame) for frame in (frames or [])]
+        self.advance = advance
+        self.position = 0
+
+    @staticmethod
+    def _load(frame):
+        if isinstance(frame, np.ndarray):
+            return frame
+        from PIL import Image
+        return np.array(Image.open(frame).convert('RGB'))
+
+    def set_frame(self, frame):
+        """
+        Replace the frame list with a single frame
+        """
+        self.frames_source = [self._load(frame)]
+        self.position = 0
+
+    def push_frame(self, frame):
+        """
+        Append a frame to be served later
+        """
+        self.frames_source.append(self._load(frame))
+
+    def _capture(self, region):
+        if not self.frames_source:
+            raise RuntimeError('FakeCapture has no frames')
+        frame = self.frames_source[min(self.position, len(self.frames_source) - 1)]
+        if self.advance and self.position < len(self.frames_source) - 1:
+            self.position += 1
+        if region is None:
+            return frame
+        left, top, width, height = (int(v) for v in region)
+        return frame[top:top + height, left:left + width]
+
+
+CAPTURE_BACKENDS = {
+    'pyautogui': PyAutoGUICapture,
+    'x11': X11Capture,
+    'fake': FakeCapture
+}
+
+
+def create_capture_backend(name, **kwargs):
+    """
+    Build a capture backend by name, falling back to pyautogui if it cannot start
+    """
+    logger = logging.getLogger(__name__)
+    try:
+        return CAPTURE_BACKENDS[name](**kwargs)
+    except Exception as e:
+        logger.warning(f"Capture backend '{name}' unavailable, using pyautogui: {str(e)}")
+        return PyAutoGUICapture()
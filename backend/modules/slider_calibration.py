@@ -0,0 +1,165 @@
+import json
+import logging
+import os
+from bisect import bisect_left
+
+# Offsets are pixels relative to the center of the slider's label, at ui_scale 1.0.
+# 'mapping' lists (value, track fraction) points; sliders with a nonlinear scale
+# (like white balance temperature) use more than two points.
+DEFAULT_TRACK = {
+    'track_left': 70,
+    'track_right': 250,
+    'value_field': 290,
+    'row_height': 20
+}
+
+DEFAULT_SLIDERS = {
+    'exposure': {'min': -5.0, 'max': 5.0, 'tolerance': 0.05},
+    'contrast': {'min': -100, 'max': 100, 'tolerance': 1},
+    'highlights': {'min': -100, 'max': 100, 'tolerance': 1},
+    'shadows': {'min': -100, 'max': 100, 'tolerance': 1},
+    'whites': {'min': -100, 'max': 100, 'tolerance': 1},
+    'blacks': {'min': -100, 'max': 100, 'tolerance': 1},
+    'texture': {'min': -100, 'max': 100, 'tolerance': 1},
+    'clarity': {'min': -100, 'max': 100, 'tolerance': 1},
+    'dehaze': {'min': -100, 'max': 100, 'tolerance': 1},
+    'vibrance': {'min': -100, 'max': 100, 'tolerance': 1},
+    'saturation': {'min': -100, 'max': 100, 'tolerance': 1},
+    'tint': {'min': -150, 'max': 150, 'tolerance': 1},
+    'temp': {
+        'min': 2000, 'max': 50000, 'tolerance': 50,
+        'mapping': [[2000, 0.0], [3000, 0.18], [4000, 0.32], [5500, 0.47],
+                    [7500, 0.6], [10000, 0.71], [20000, 0.88], [50000, 1.0]]
+    }
+}
+DEFAULT_SLIDERS['temperature'] = DEFAULT_SLIDERS['temp']
+
+MAX_OBSERVATIONS = 20
+
+
+class SliderModel:
+    """
+    Geometry and value scale of one develop slider
+    """
+
+    def __init__(self, name, spec):
+        self.name = name
+        self.min = spec['min']
+        self.max = spec['max']
+        self.tolerance = spec.get('tolerance', 1)
+        self.mapping = spec.get('mapping') or [[self.min, 0.0], [self.max, 1.0]]
+        self.track_left = spec.get('track_left', DEFAULT_TRACK['track_left'])
+        self.track_right = spec.get('track_right', DEFAULT_TRACK['track_right'])
+        self.value_field = spec.get('value_field', DEFAULT_TRACK['value_field'])
+        self.row_height = spec.get('row_height', DEFAULT_TRACK['row_height'])
+        self.observations = spec.get('observations', [])
+
+    def clamp(self, value):
+        return max(self.min, min(self.max, value))
+
+    def fraction(self, value):
+        """
+        Position along the track (0-1) for a slider value, interpolating the mapping
+        """
+        value = self.clamp(value)
+        values = [point[0] for point in self.mapping]
+        i = bisect_left(values, value)
+        if i <= 0:
+            return self.mapping[0][1]
+        if i >= len(values):
+            return self.mapping[-1][1]
+        (v0, f0), (v1, f1) = self.mapping[i - 1], self.mapping[i]
+        return f0 + (f1 - f0) * (value - v0) / (v1 - v0)
+
+    def offset_for(self, value):
+        """
+        Thumb x offset from the label center for a value
+        """
+        return self.track_left + self.fraction(value) * (self.track_right - self.track_left)
+
+    def pixels_per_unit(self, value):
+        """
+        Local track resolution around a value, used to size correction steps
+        """
+        delta = max(self.tolerance, 1e-6)
+        low, high = self.clamp(value - delta), self.clamp(value + delta)
+        if high == low:
+            return 0.0
+        return (self.offset_for(high) - self.offset_for(low)) / (high - low)
+
+    def observe(self, offset, value):
+        """
+        Record where the thumb ended up for a read-back value and refit the track extents
+        """
+        self.observations.append([float(offset), float(self.fraction(value))])
+        self.observations = self.observations[-MAX_OBSERVATIONS:]
+        fractions = [f for _, f in self.observations]
+        if len(self.observations) < 2 or max(fractions) - min(fractions) < 0.05:
+            return False
+
+        # Least squares fit of offset = left + fraction * (right - left)
+        n = len(self.observations)
+        mean_f = sum(fractions) / n
+        mean_x = sum(x for x, _ in self.observations) / n
+        cov = sum((f - mean_f) * (x - mean_x) for x, f in self.observations)
+        var = sum((f - mean_f) ** 2 for f in fractions)
+        span = cov / var
+        if span <= 0:
+            return False
+        self.track_left = mean_x - span * mean_f
+        self.track_right = self.track_left + span
+        return True
+
+    def to_dict(self):
+        return {
+            'min': self.min,
+            'max': self.max,
+            'tolerance': self.tolerance,
+            'mapping': self.mapping,
+            'track_left': self.track_left,
+            'track_right': self.track_right,
+            'value_field': self.value_field,
+            'row_height': self.row_height,
+            'observations': self.observations
+        }
+
+
+class SliderCalibration:
+    """
+    Per-slider calibration models, persisted to data/slider_calibration.json
+    """
+
+    def __init__(self, path=os.path.join('data', 'slider_calibration.json')):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.models = {}
+        self.load()
+
+    def load(self):
+        try:
+            stored = {}
+            if os.path.exists(self.path):
+                with open(self.path) as f:
+                    stored = json.load(f)
+            for name, spec in DEFAULT_SLIDERS.items():
+                self.models[name] = SliderModel(name, {**spec, **stored.get(name, {})})
+            for name, spec in stored.items():
+                if name not in self.models:
+                    self.models[name] = SliderModel(name, spec)
+        except Exception as e:
+            self.logger.error(f"Error loading slider calibration: {str(e)}")
+
+    def save(self):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump({name: model.to_dict() for name, model in self.models.items()}, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            self.logger.error(f"Error saving slider calibration: {str(e)}")
+
+    def get(self, slider_name):
+        return self.models.get(slider_name.lower())
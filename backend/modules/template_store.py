@@ -0,0 +1,186 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import cv2
+import numpy as np
+from .frame import normalize_text
+
+
+class TemplateStore:
+    """
+    Pixel templates of UI elements learned from successful OCR lookups,
+    persisted as PNG files plus a JSON index so warm restarts can skip OCR.
+    Templates learned for a panel are stored as 'panel/name', so the same label
+    in two panels keeps two templates.
+    """
+
+    def __init__(self, directory=os.path.join('data', 'templates')):
+        self.logger = logging.getLogger(__name__)
+        self.directory = directory
+        self.index_path = os.path.join(directory, 'index.json')
+        self.templates = {}
+        self._files = {}  # Name -> PNG filename of the persisted templates
+        self.load()
+
+    def load(self):
+        """
+        Load all persisted templates from disk
+        """
+        try:
+            if not os.path.exists(self.index_path):
+                return
+            with open(self.index_path) as f:
+                index = json.load(f)
+            for name, filename in index.items():
+                template = cv2.imread(os.path.join(self.directory, filename), cv2.IMREAD_GRAYSCALE)
+                if template is not None:
+                    self.templates[name] = template
+                    self._files[name] = filename
+            self.logger.info(f"Loaded {len(self.templates)} UI element templates")
+        except Exception as e:
+            self.logger.error(f"Error loading templates: {str(e)}")
+
+    def _save_index(self):
+        index = {name: filename for name, filename in self._files.items() if name in self.templates}
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    @staticmethod
+    def _filename(name):
+        # The hash keeps names that slug alike ('presets/x', 'presets x') apart
+        digest = hashlib.sha1(name.encode('utf-8')).hexdigest()[:8]
+        return f"{re.sub(r'[^a-z0-9]+', '_', name)}_{digest}.png"
+
+    @staticmethod
+    def _key(element_name, panel=None):
+        name = normalize_text(element_name)
+        return f"{panel}/{name}" if panel else name
+
+    def has(self, element_name, panel=None):
+        """
+        Whether match() has a template for the element: the panel's own, or a panel-less one
+        """
+        return (bool(panel) and self._key(element_name, panel) in self.templates) \
+            or self._key(element_name) in self.templates
+
+    def __contains__(self, element):
+        # Either an element name or an (element name, panel) pair
+        if isinstance(element, tuple):
+            return self.has(*element)
+        return self.has(element)
+
+    def add(self, element_name, gray, box, margin=4, panel=None):
+        """
+        Crop and persist the template for an element found at box in a gray frame
+        """
+        try:
+            name = self._key(element_name, panel)
+            height, width = gray.shape[:2]
+            left = max(box['left'] - margin, 0)
+            top = max(box['top'] - margin, 0)
+            right = min(box['left'] + box['width'] + margin, width)
+            bottom = min(box['top'] + box['height'] + margin, height)
+            template = np.ascontiguousarray(gray[top:bottom, left:right])
+            if template.size == 0:
+                return False
+
+            self.templates[name] = template
+            filename = self._files.setdefault(name, self._filename(name))
+            os.makedirs(self.directory, exist_ok=True)
+            cv2.imwrite(os.path.join(self.directory, filename), template)
+            self._save_index()
+            return True
+        except Exception as e:
+            self.logger.error(f"Error saving template for '{element_name}': {str(e)}")
+            return False
+
+    def extend(self, templates):
+        """
+        Use templates from another source (e.g. the training dataset) for elements
+        without a learned one; they are kept in memory only
+        """
+        added = 0
+        for name, template in templates.items():
+            name = normalize_text(name)
+            if name not in self.templates:
+                self.templates[name] = template
+                added += 1
+        return added
+
+    def remove(self, element_name, panel=None):
+        """
+        Forget a template, e.g. after it matched the wrong place
+        """
+        name = self._key(element_name, panel)
+        if self.templates.pop(name, None) is None:
+            return
+        filename = self._files.pop(name, None)
+        if filename is None:
+            return  # Memory-only template from another source
+        try:
+            path = os.path.join(self.directory, filename)
+            if os.path.exists(path):
+                os.remove(path)
+            self._save_index()
+        except Exception as e:
+            self.logger.error(f"Error removing template for '{element_name}': {str(e)}")
+
+    def match(self, element_name, gray, panel=None, scales=(1.0, 0.9, 1.1, 0.8, 1.25), downsample=0.5):
+        """
+        Multi-scale template match: search a downsampled copy of the frame first,
+        then refine the best candidate at full resolution. With a panel, gray is
+        that panel's crop and its own template is preferred over a panel-less one.
+        Returns ((center_x, center_y), score) or None when no template is known.
+        """
+        template = self.templates.get(self._key(element_name, panel)) if panel else None
+        if template is None:
+            template = self.templates.get(self._key(element_name))
+        if template is None:
+            return None
+
+        # Coarse search on the pyramid level
+        small = cv2.resize(gray, None, fx=downsample, fy=downsample, interpolation=cv2.INTER_AREA)
+        best = None
+        for scale in scales:
+            factor = scale * downsample
+            th = int(round(template.shape[0] * factor))
+            tw = int(round(template.shape[1] * factor))
+            if th < 6 or tw < 6 or th > small.shape[0] or tw > small.shape[1]:
+                continue
+            scaled = cv2.resize(template, (tw, th), interpolation=cv2.INTER_AREA)
+            result = cv2.matchTemplate(small, scaled, cv2.TM_CCOEFF_NORMED)
+            _, score, _, loc = cv2.minMaxLoc(result)
+            if best is None or score > best[0]:
+                best = (score, scale, loc)
+
+        if best is None:
+            # Template too small for the pyramid level; search at full resolution
+            return self._match_region(gray, template, 1.0, (0, 0, gray.shape[1], gray.shape[0]))
+
+        # Refine around the coarse hit at full resolution
+        _, scale, (cx, cy) = best
+        th = int(round(template.shape[0] * scale))
+        tw = int(round(template.shape[1] * scale))
+        pad = int(round(2 / downsample)) + 2
+        left = max(int(cx / downsample) - pad, 0)
+        top = max(int(cy / downsample) - pad, 0)
+        right = min(left + tw + 2 * pad, gray.shape[1])
+        bottom = min(top + th + 2 * pad, gray.shape[0])
+        return self._match_region(gray, template, scale, (left, top, right, bottom))
+
+    @staticmethod
+    def _match_region(gray, template, scale, region):
+        left, top, right, bottom = region
+        th = max(int(round(template.shape[0] * scale)), 1)
+        tw = max(int(round(template.shape[1] * scale)), 1)
+        roi = gray[top:bottom, left:right]
+        if th > roi.shape[0] or tw > roi.shape[1]:
+            return None
+        scaled = template if scale == 1.0 else cv2.resize(template, (tw, th))
+        result = cv2.matchTemplate(roi, scaled, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (x, y) = cv2.minMaxLoc(result)
+        return (left + x + tw // 2, top + y + th // 2), float(score)
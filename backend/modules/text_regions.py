@@ -0,0 +1,55 @@
+import cv2
+import numpy as np
+from .incremental_ocr import union_overlapping
+
+
+def detect_text_regions(gray, scale=0.5, min_height=6, max_height=80, margin=4):
+    """
+    Find candidate text boxes without running OCR.
+    Works on a downscaled copy: a morphological gradient highlights glyph edges,
+    a wide closing joins the glyphs of a line into one blob, and connected components
+    become boxes. Components too small to be text or too tall to be a line (photo
+    content, large icons) are dropped. Sizes are in full-resolution pixels.
+    Returns rectangles (left, top, right, bottom) in the coordinates of gray.
+    """
+    height, width = gray.shape[:2]
+    if scale != 1.0:
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    else:
+        small = gray
+
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+    gradient = cv2.morphologyEx(small, cv2.MORPH_GRADIENT, kernel)
+    _, edges = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    # Join characters and words on a line, but not neighbouring lines
+    line_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(int(12 * scale), 3), 1))
+    joined = cv2.morphologyEx(edges, cv2.MORPH_CLOSE, line_kernel)
+
+    count, _, stats, _ = cv2.connectedComponentsWithStats(joined, connectivity=8)
+    if count <= 1:
+        return []
+    boxes = stats[1:, :4].astype(np.float64) / scale
+    heights = boxes[:, 3]
+    keep = (heights >= min_height) & (heights <= max_height) & (boxes[:, 2] >= min_height)
+
+    rects = []
+    for left, top, box_width, box_height in boxes[keep]:
+        rects.append((
+            max(int(left) - margin, 0),
+            max(int(top) - margin, 0),
+            min(int(np.ceil(left + box_width)) + margin, width),
+            min(int(np.ceil(top + box_height)) + margin, height)
+        ))
+    # Margins can make neighbouring boxes overlap; OCR each area once
+    rects = union_overlapping(rects)
+    rects.sort(key=lambda rect: (rect[1], rect[0]))
+    return rects
+
+
+def coverage(rects, shape):
+    """
+    Fraction of the frame area covered by the rectangles
+    """
+    height, width = shape[:2]
+    area = sum((right - left) * (bottom - top) for left, top, right, bottom in rects)
+    return area / float(max(height * width, 1))
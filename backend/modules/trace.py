@@ -0,0 +1,454 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+import cv2
+import numpy as np
+from .input_backend import InputBackend
+from .ocr_result import OCRResult, WORD_DTYPE
+from .screen_capture import CaptureBackend
+
+MAGIC = b'LRTRACE1'
+# kind, payload length, timestamp; the payload is a JSON meta block plus an optional binary blob
+RECORD_HEADER = struct.Struct('<B3xId')
+META_LENGTH = struct.Struct('<I')
+
+SESSION = 1
+FRAME = 2
+INPUT = 3
+OCR = 4
+COMMAND = 5
+RESULT = 6
+
+
+class TraceWriter:
+    """
+    Append-only trace file. Each record is a fixed header, a JSON meta block and
+    a binary blob; records are only ever added at the end, so a crash can at
+    worst leave a torn last record, which readers ignore.
+
+    Frames are XOR-ed against the previous frame of the same region and shape
+    and zlib-compressed, with a full keyframe every keyframe_interval frames.
+    An unchanged UI compresses to almost nothing, and an identical frame is
+    stored as a reference to its base. Records refer to each other by byte offset.
+    Only the max_regions most recently captured regions keep a previous frame;
+    the next frame of an evicted region is written as a keyframe.
+    """
+
+    def __init__(self, path, keyframe_interval=100, compress_level=1, max_regions=32):
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.max_regions = max_regions
+        self.compress_level = compress_level
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'ab')
+        if new:
+            self._file.write(MAGIC)
+        self._lock = threading.Lock()
+        # (region, shape, dtype) -> [offset of the last frame, its pixels, frames since the keyframe]
+        self._last_frames = OrderedDict()
+        self.frames = 0
+        self.raw_bytes = 0
+
+    def write(self, kind, meta, blob=b''):
+        """
+        Append one record and return its offset, or None once the writer is closed
+        """
+        meta_bytes = json.dumps(meta, separators=(',', ':'), default=str).encode()
+        payload_length = META_LENGTH.size + len(meta_bytes) + len(blob)
+        with self._lock:
+            if self._file.closed:
+                # Recording stopped while a command was still running
+                return None
+            offset = self._file.tell()
+            self._file.write(RECORD_HEADER.pack(kind, payload_length, time.time()))
+            self._file.write(META_LENGTH.pack(len(meta_bytes)))
+            self._file.write(meta_bytes)
+            if blob:
+                self._file.write(blob)
+        return offset
+
+    def frame(self, pixels, region=None):
+        """
+        Append a captured frame, delta-encoded against the last one of the same region
+        """
+        pixels = np.ascontiguousarray(pixels)
+        key = (tuple(region) if region else None, pixels.shape, pixels.dtype.str)
+        meta = {'region': list(region) if region else None, 'shape': list(pixels.shape),
+                'dtype': pixels.dtype.str, 'base': None}
+        last = self._last_frames.get(key)
+        if last is not None and last[2] < self.keyframe_interval:
+            delta = np.bitwise_xor(pixels, last[1])
+            meta['base'] = last[0]
+            if not delta.any():
+                meta['same'] = True
+                blob = b''
+            else:
+                blob = zlib.compress(delta, self.compress_level)
+            since_keyframe = last[2] + 1
+        else:
+            blob = zlib.compress(pixels, self.compress_level)
+            since_keyframe = 0
+        offset = self.write(FRAME, meta, blob)
+        # Identical frames point at the same base, so the chain does not grow
+        base_offset = last[0] if meta.get('same') else offset
+        self._last_frames[key] = [base_offset, pixels.copy(), since_keyframe]
+        self._last_frames.move_to_end(key)
+        while len(self._last_frames) > self.max_regions:
+            self._last_frames.popitem(last=False)
+        self.frames += 1
+        self.raw_bytes += pixels.nbytes
+        return offset
+
+    def ocr(self, image_shape, lang, config, result, elapsed):
+        meta = {
+            'shape': list(image_shape),
+            'lang': lang,
+            'config': config,
+            'texts': result.texts,
+            'tokens': result.tokens,
+            'elapsed': elapsed
+        }
+        return self.write(OCR, meta, result.words.tobytes())
+
+    def flush(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    @property
+    def size(self):
+        return os.path.getsize(self.path)
+
+
+class TraceReader:
+    """
+    Memory-maps a trace file and indexes its records without copying payloads.
+    Decoded frames are cached (a few per region), so reading frames in order
+    decodes each delta once.
+    """
+
+    def __init__(self, path, frame_cache_size=8):
+        self.path = path
+        self._file = open(path, 'rb')
+        size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b''
+        if self._map[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a trace file")
+        self.records = []  # (kind, offset, timestamp)
+        self._frames = OrderedDict()
+        self._frame_cache_size = frame_cache_size
+        self._index()
+
+    def _index(self):
+        position = len(MAGIC)
+        end = len(self._map)
+        while position + RECORD_HEADER.size <= end:
+            kind, length, timestamp = RECORD_HEADER.unpack_from(self._map, position)
+            if position + RECORD_HEADER.size + length > end:
+                break  # Torn last record
+            self.records.append((kind, position, timestamp))
+            position += RECORD_HEADER.size + length
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._file.close()
+
+    def __len__(self):
+        return len(self.records)
+
+    def _payload(self, offset):
+        _, length, _ = RECORD_HEADER.unpack_from(self._map, offset)
+        start = offset + RECORD_HEADER.size
+        meta_length, = META_LENGTH.unpack_from(self._map, start)
+        meta_start = start + META_LENGTH.size
+        meta = json.loads(bytes(self._map[meta_start:meta_start + meta_length]))
+        blob = memoryview(self._map)[meta_start + meta_length:start + length]
+        return meta, blob
+
+    def meta(self, offset):
+        return self._payload(offset)[0]
+
+    def select(self, *kinds):
+        """
+        (kind, offset, timestamp) of the records of the given kinds, in order
+        """
+        return [record for record in self.records if not kinds or record[0] in kinds]
+
+    def frame(self, offset):
+        """
+        Decoded pixels of the frame record at offset (read-only)
+        """
+        pixels = self._frames.get(offset)
+        if pixels is not None:
+            self._frames.move_to_end(offset)
+            return pixels
+
+        # Walk back to the nearest cached frame or keyframe, then apply the deltas forward
+        chain = []
+        current = offset
+        while True:
+            meta, blob = self._payload(current)
+            chain.append((current, meta, blob))
+            if meta['base'] is None or meta['base'] in self._frames:
+                break
+            current = meta['base']
+
+        pixels = self._frames.get(chain[-1][1]['base']) if chain[-1][1]['base'] is not None else None
+        for current, meta, blob in reversed(chain):
+            if meta.get('same'):
+                decoded = pixels
+            else:
+                data = np.frombuffer(zlib.decompress(blob), dtype=np.dtype(meta['dtype'])).reshape(meta['shape'])
+                decoded = data if pixels is None or meta['base'] is None else np.bitwise_xor(data, pixels)
+            decoded.flags.writeable = False
+            self._cache_frame(current, decoded)
+            pixels = decoded
+        return pixels
+
+    def _cache_frame(self, offset, pixels):
+        self._frames[offset] = pixels
+        self._frames.move_to_end(offset)
+        while len(self._frames) > self._frame_cache_size:
+            self._frames.popitem(last=False)
+
+    def session(self):
+        """
+        Meta of the first session record and the bytes of each state file and
+        template it holds
+        """
+        sessions = self.select(SESSION)
+        if not sessions:
+            raise ValueError(f"{self.path} has no session record")
+        meta, blob = self._payload(sessions[0][1])
+        files = {name: bytes(blob[start:start + length]) for name, (start, length) in meta['files'].items()}
+        templates = {
+            name: cv2.imdecode(np.frombuffer(blob[start:start + length], dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+            for name, (start, length) in meta['templates'].items()
+        }
+        return meta, files, templates
+
+    def ocr(self, offset):
+        """
+        Recorded OCRResult of the OCR record at offset, and its meta
+        """
+        meta, blob = self._payload(offset)
+        # Copied so no view into the map outlives close()
+        words = np.frombuffer(blob, dtype=WORD_DTYPE).copy()
+        return OCRResult(words, meta['texts'], meta['tokens']), meta
+
+    def commands(self):
+        """
+        Each recorded command or batch with its result, and the offsets of the
+        frames, input events and OCR calls made while it ran
+        """
+        commands = []
+        current = None
+        for kind, offset, timestamp in self.records:
+            if kind == COMMAND:
+                current = dict(self.meta(offset), offset=offset, started_at=timestamp,
+                               frames=[], inputs=[], ocr=[], result=None)
+                commands.append(current)
+            elif current is None:
+                continue
+            elif kind == FRAME:
+                current['frames'].append(offset)
+            elif kind == INPUT:
+                current['inputs'].append(offset)
+            elif kind == OCR:
+                current['ocr'].append(offset)
+            elif kind == RESULT:
+                current.update(result=self.meta(offset))
+                current = None
+        return commands
+
+
+def session_files(controller):
+    """
+    Persisted controller state captured with each trace, by name
+    """
+    return {
+        'slider_calibration.json': controller.sliders.path,
+        'panel_layout.json': controller.layout.path,
+        'preset_catalog.json': controller.preset_catalog.path
+    }
+
+
+class RecordingCapture(CaptureBackend):
+    """
+    Wraps a capture backend and appends every captured frame to a trace
+    """
+
+    def __init__(self, inner, writer):
+        super().__init__()
+        self.inner = inner
+        self.writer = writer
+        self.name = inner.name
+
+    def capture(self, region=None):
+        # The inner backend already times the capture
+        image = self.inner.capture(region)
+        if image is not None:
+            self.writer.frame(image, region)
+        return image
+
+    def stats(self):
+        return self.inner.stats()
+
+    def close(self):
+        self.inner.close()
+
+
+class RecordingInput(InputBackend):
+    """
+    Wraps an input backend and appends every event to a trace
+    """
+
+    def __init__(self, inner, writer):
+        self.inner = inner
+        self.writer = writer
+        self.name = inner.name
+
+    def _timed(self, name, *args):
+        self.inner._timed(name, *args)
+        self.writer.write(INPUT, {'name': name, 'args': list(args)})
+
+
+class RecordingEngine:
+    """
+    Wraps an OCR engine and appends every image_to_data result to a trace
+    """
+
+    def __init__(self, inner, writer):
+        self.inner = inner
+        self.writer = writer
+        self.name = inner.name
+
+    def image_to_data(self, image, lang, config):
+        start = time.perf_counter()
+        result = self.inner.image_to_data(image, lang, config)
+        self.writer.ocr(np.shape(image), lang, config, result, time.perf_counter() - start)
+        return result
+
+    def image_to_string(self, image, lang, config):
+        return self.inner.image_to_string(image, lang, config)
+
+    def close(self):
+        self.inner.close()
+
+
+class TraceRecorder:
+    """
+    Records a controller session: the configuration, then for each command or
+    batch every captured frame, input event and OCR result until its result.
+    """
+
+    def __init__(self, path, **writer_options):
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self.writer = TraceWriter(path, **writer_options)
+        self.controller = None
+        self.chat_processor = None
+        self._originals = None
+        self.commands = 0
+
+    def attach(self, controller, chat_processor=None):
+        """
+        Start recording everything the controller captures, sends and reads
+        """
+        ocr = controller.ocr
+        self._originals = (controller.capture, controller.input)
+        self._write_session(controller, chat_processor)
+        # Cached locations would hide lookups from the trace; templates are in the session
+        controller.element_cache.invalidate()
+        controller.capture = RecordingCapture(controller.capture, self.writer)
+        controller.input = RecordingInput(controller.input, self.writer)
+        ocr._engine = RecordingEngine(ocr.engine, self.writer)
+        controller.invalidate_frame()
+        if chat_processor is not None:
+            chat_processor.recorder = self
+        self.controller = controller
+        self.chat_processor = chat_processor
+
+    def _write_session(self, controller, chat_processor=None):
+        """
+        Configuration plus the persisted state that decides what the controller
+        does (calibration, layout, preset catalog, element templates), so a replay
+        starts from the same state
+        """
+        files, blobs, position = {}, [], 0
+        for name, path in session_files(controller).items():
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    data = f.read()
+                files[name] = [position, len(data)]
+                blobs.append(data)
+                position += len(data)
+        templates = {}
+        for name, template in controller.templates.templates.items():
+            ok, encoded = cv2.imencode('.png', np.asarray(template))
+            if ok:
+                templates[name] = [position, len(encoded)]
+                blobs.append(encoded.tobytes())
+                position += len(encoded)
+        self.writer.write(SESSION, {
+            'controller_config': controller.config,
+            'ocr_config': controller.ocr.config,
+            'edit_state': chat_processor.edit_state.export() if chat_processor else None,
+            'files': files,
+            'templates': templates
+        }, b''.join(blobs))
+
+    def detach(self):
+        """
+        Stop recording and restore the wrapped backends
+        """
+        if self.controller is None:
+            return
+        capture, input_backend = self._originals
+        if isinstance(self.controller.capture, RecordingCapture):
+            self.controller.capture = capture
+        if isinstance(self.controller.input, RecordingInput):
+            self.controller.input = input_backend
+        if isinstance(self.controller.ocr._engine, RecordingEngine):
+            # The engine that was live when recording started (possibly created for it), not a stale None
+            self.controller.ocr._engine = self.controller.ocr._engine.inner
+        if self.chat_processor is not None and self.chat_processor.recorder is self:
+            self.chat_processor.recorder = None
+        self.controller = self.chat_processor = None
+        self.writer.close()
+
+    def record_command(self, meta, func):
+        """
+        Run func between a command record and its result record
+        """
+        self.writer.write(COMMAND, meta)
+        start = time.perf_counter()
+        result = None
+        try:
+            result = func()
+            return result
+        finally:
+            self.writer.write(RESULT, {'result': result, 'elapsed': time.perf_counter() - start})
+            self.writer.flush()
+            self.commands += 1
+
+    def status(self):
+        return {
+            'path': self.path,
+            'commands': self.commands,
+            'frames': self.writer.frames,
+            'bytes': self.writer.size,
+            'raw_frame_bytes': self.writer.raw_bytes
+        }
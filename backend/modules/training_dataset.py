@@ -0,0 +1,360 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import cv2
+import numpy as np
+from .frame import normalize_text
+
+DATASET_VERSION = 1
+# One .npy file per column and shard; each can be memory-mapped on its own
+COLUMNS = ('labels', 'boxes', 'conf', 'sources', 'crop_offsets', 'crop_shapes', 'pixels', 'files')
+
+
+def _shard_name(number):
+    return f"{number:05d}"
+
+
+class TrainingDataset:
+    """
+    Labelled UI element crops and bounding boxes extracted from uploaded
+    screenshots, stored column-wise in shards of .npy files under
+    <directory>/shards/<n>/ and memory-mapped on load, so opening the dataset
+    reads no pixels and runs no OCR.
+
+    Per entry: labels (normalized text), boxes (left, top, width, height in the
+    source screenshot), conf, sources (index into the shard's files, the sha256
+    of each screenshot) and the gray crop, stored back to back in pixels at
+    crop_offsets with crop_shapes.
+    """
+
+    def __init__(self, directory=os.path.join('data', 'dataset')):
+        self.logger = logging.getLogger(__name__)
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, 'manifest.json')
+        self.manifest = {'version': DATASET_VERSION, 'shards': [], 'files': {}}
+        self.shards = []
+        self.load()
+
+    def load(self):
+        """
+        Read the manifest and memory-map every shard it lists
+        """
+        try:
+            if not os.path.exists(self.manifest_path):
+                return
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get('version') != DATASET_VERSION:
+                self.logger.warning(f"Ignoring training dataset version {manifest.get('version')}")
+                return
+            self.manifest = manifest
+            self.shards = [self._open_shard(name) for name in manifest['shards']]
+            self.logger.info(f"Loaded training dataset: {len(self)} elements from "
+                             f"{len(manifest['files'])} files")
+        except Exception as e:
+            self.logger.error(f"Error loading training dataset: {str(e)}")
+
+    def _shard_dir(self, name):
+        return os.path.join(self.directory, 'shards', name)
+
+    def _open_shard(self, name):
+        return {
+            column: np.load(os.path.join(self._shard_dir(name), column + '.npy'), mmap_mode='r')
+            for column in COLUMNS
+        }
+
+    def __len__(self):
+        return sum(len(shard['labels']) for shard in self.shards)
+
+    def __contains__(self, digest):
+        return digest in self.manifest['files']
+
+    def crop(self, shard, index):
+        """
+        Gray pixels of one entry; a view into the memory-mapped shard
+        """
+        shard = self.shards[shard]
+        offset = int(shard['crop_offsets'][index])
+        height, width = (int(v) for v in shard['crop_shapes'][index])
+        return shard['pixels'][offset:offset + height * width].reshape(height, width)
+
+    def entries(self, label):
+        """
+        (shard, index) of every entry with the given label
+        """
+        label = normalize_text(label)
+        return [
+            (number, int(index))
+            for number, shard in enumerate(self.shards)
+            for index in np.flatnonzero(shard['labels'] == label)
+        ]
+
+    def best_crops(self, min_conf=0):
+        """
+        Highest-confidence crop per label, e.g. to seed element templates
+        """
+        best = {}
+        for number, shard in enumerate(self.shards):
+            labels = np.asarray(shard['labels'])
+            conf = np.asarray(shard['conf'])
+            if not len(labels):
+                continue
+            # Sort by label, then by descending confidence; the first row of each label wins
+            order = np.lexsort((-conf, labels))
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = labels[order[1:]] != labels[order[:-1]]
+            for index in order[first]:
+                label = str(labels[index])
+                if conf[index] >= min_conf and (label not in best or conf[index] > best[label][0]):
+                    best[label] = (float(conf[index]), number, int(index))
+        return {label: self.crop(number, index) for label, (_, number, index) in best.items()}
+
+    def _save_manifest(self):
+        tmp_path = self.manifest_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def append(self, results, skipped=None):
+        """
+        Write the extracted entries of several files as one new shard and record
+        those files in the manifest. This is the checkpoint: files not yet in the
+        manifest are processed again on the next run.
+        results maps each file digest to the columns returned by extract_elements.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        files = {}
+        if results:
+            number = int(self.manifest['shards'][-1]) + 1 if self.manifest['shards'] else 1
+            name = _shard_name(number)
+            columns = self._merge(results)
+            shard_dir = self._shard_dir(name)
+            os.makedirs(shard_dir, exist_ok=True)
+            for column, values in columns.items():
+                np.save(os.path.join(shard_dir, column + '.npy'), values)
+            self.manifest['shards'].append(name)
+            self.shards.append(self._open_shard(name))
+            for digest, result in results.items():
+                files[digest] = {'shard': name, 'entries': len(result['labels']), 'status': 'ok'}
+        for digest, reason in (skipped or {}).items():
+            files[digest] = {'shard': None, 'entries': 0, 'status': 'skipped', 'error': reason}
+        self.manifest['files'].update(files)
+        self._save_manifest()
+
+    @staticmethod
+    def _merge(results):
+        digests = list(results)
+        parts = [results[digest] for digest in digests]
+        labels = [label for part in parts for label in part['labels']]
+        crops = [crop for part in parts for crop in part['crops']]
+        sizes = np.array([crop.size for crop in crops], dtype=np.int64)
+        offsets = np.zeros(len(crops), dtype=np.int64)
+        if len(crops) > 1:
+            offsets[1:] = np.cumsum(sizes)[:-1]
+        return {
+            'labels': np.array(labels, dtype=str) if labels else np.zeros(0, dtype='<U1'),
+            'boxes': np.concatenate([part['boxes'] for part in parts]).astype(np.int32),
+            'conf': np.concatenate([part['conf'] for part in parts]).astype(np.float32),
+            'sources': np.repeat(np.arange(len(parts), dtype=np.int32),
+                                 [len(part['labels']) for part in parts]),
+            'crop_offsets': offsets,
+            'crop_shapes': np.array([crop.shape for crop in crops], dtype=np.int32).reshape(-1, 2),
+            'pixels': np.concatenate([crop.ravel() for crop in crops]) if crops else np.zeros(0, dtype=np.uint8),
+            'files': np.array(digests, dtype=str)
+        }
+
+
+def extract_elements(ocr, image, min_conf=60, max_phrase_words=4, margin=4):
+    """
+    OCR a screenshot and cut out a gray crop for each confident word and each
+    short line (multi-word labels such as 'Auto Tone').
+    Returns the columns for TrainingDataset.append.
+    """
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    processed = ocr.preprocess_image(gray)
+    data = ocr.run_ocr(processed)
+    words = data.words
+    height, width = gray.shape
+
+    entries = []
+    for line in data.line_groups():
+        confident = words['conf'][line] >= min_conf
+        for index in line[confident]:
+            entries.append(([int(index)], data.text(index)))
+        if 1 < len(line) <= max_phrase_words and confident.all():
+            entries.append((list(line), ' '.join(data.text(index) for index in line)))
+
+    labels, boxes, conf, crops = [], [], [], []
+    for indices, text in entries:
+        selected = words[indices]
+        left = int(selected['left'].min())
+        top = int(selected['top'].min())
+        right = int((selected['left'] + selected['width']).max())
+        bottom = int((selected['top'] + selected['height']).max())
+        # Same margin as learned templates, so crops can be used as templates directly
+        crop = gray[max(top - margin, 0):min(bottom + margin, height),
+                    max(left - margin, 0):min(right + margin, width)]
+        if crop.size == 0:
+            continue
+        labels.append(normalize_text(text))
+        boxes.append((left, top, right - left, bottom - top))
+        conf.append(float(selected['conf'].mean()))
+        crops.append(np.ascontiguousarray(crop))
+    return {
+        'labels': labels,
+        'boxes': np.array(boxes, dtype=np.int32).reshape(-1, 4),
+        'conf': np.array(conf, dtype=np.float32),
+        'crops': crops
+    }
+
+
+# Per-worker OCR processor for the ingestion pool; lives in the worker processes only
+_worker_ocr = None
+
+
+def _init_worker(ocr_config):
+    global _worker_ocr
+    from .ocr_processor import OCRProcessor
+    _worker_ocr = OCRProcessor()
+    # Each worker is already one of several processes; no nested engine pool
+    _worker_ocr.update_config(dict(ocr_config, engine='subprocess'))
+
+
+def _ingest_file(digest, path, min_conf):
+    """
+    Returns (digest, columns, None), or (digest, None, reason) for a file that is
+    not an image and should not be retried
+    """
+    image = cv2.imread(path, cv2.IMREAD_COLOR)
+    if image is None:
+        return digest, None, 'Not a readable image'
+    return digest, extract_elements(_worker_ocr, image, min_conf=min_conf), None
+
+
+class IngestionPipeline:
+    """
+    Turns stored uploads into the training dataset on a background thread.
+    Only files missing from the dataset manifest are processed; they are OCR'd
+    across a process pool and committed as a new shard every checkpoint_every
+    files, so an interrupted run loses at most one checkpoint of work.
+    """
+
+    def __init__(self, upload_store, dataset=None, workers=None, checkpoint_every=16,
+                 min_conf=60, ocr_config=None, on_complete=None):
+        self.logger = logging.getLogger(__name__)
+        self.upload_store = upload_store
+        self.dataset = dataset or TrainingDataset()
+        self.workers = workers or max((os.cpu_count() or 2) - 1, 1)
+        self.checkpoint_every = checkpoint_every
+        self.min_conf = min_conf
+        self.ocr_config = ocr_config or {}
+        self.on_complete = on_complete
+        self._lock = threading.Lock()
+        self._thread = None
+        self._rerun = False
+        self._status = {
+            'running': False,
+            'processed': 0,
+            'total': 0,
+            'entries': 0,
+            'errors': 0,
+            'started_at': None,
+            'finished_at': None,
+            'last_error': None
+        }
+
+    def pending(self):
+        """
+        Digests and paths of stored uploads that are not in the dataset yet
+        """
+        return [(digest, path) for digest, path in self.upload_store.objects()
+                if digest not in self.dataset]
+
+    def start(self):
+        """
+        Start a run in the background; while one is running, schedule another
+        so files stored in the meantime are picked up. Returns True if started.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                self._rerun = True
+                return False
+            self._thread = threading.Thread(target=self._run, name='training-ingest', daemon=True)
+            self._thread.start()
+            return True
+
+    def _run(self):
+        while True:
+            try:
+                self.run()
+            except Exception as e:
+                self.logger.error(f"Training data ingestion failed: {str(e)}")
+                self._update(running=False, last_error=str(e), finished_at=time.time())
+            with self._lock:
+                if not self._rerun:
+                    return
+                self._rerun = False
+
+    def _update(self, **changes):
+        with self._lock:
+            self._status.update(changes)
+
+    def status(self):
+        with self._lock:
+            status = dict(self._status)
+        status['files'] = len(self.dataset.manifest['files'])
+        status['dataset_entries'] = len(self.dataset)
+        return status
+
+    def run(self, progress_callback=None):
+        """
+        Process every pending file and return the number of entries added
+        """
+        pending = self.pending()
+        self._update(running=True, processed=0, total=len(pending), entries=0, errors=0,
+                     started_at=time.time(), finished_at=None, last_error=None)
+        if not pending:
+            self._update(running=False, finished_at=time.time())
+            return 0
+
+        self.logger.info(f"Ingesting {len(pending)} training files with {self.workers} workers")
+        results, skipped = {}, {}
+        processed = added = errors = 0
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(pending)), initializer=_init_worker,
+                                 initargs=(self.ocr_config,)) as executor:
+            futures = deque(executor.submit(_ingest_file, digest, path, self.min_conf) for digest, path in pending)
+            while futures:
+                # Popped in order so each result is released once it is checkpointed
+                future = futures.popleft()
+                try:
+                    digest, columns, reason = future.result()
+                    if columns is None:
+                        skipped[digest] = reason
+                    else:
+                        results[digest] = columns
+                        added += len(columns['labels'])
+                except Exception as e:
+                    # Left out of the manifest, so the file is retried on the next run
+                    errors += 1
+                    self.logger.error(f"Error ingesting training file: {str(e)}")
+                    self._update(last_error=str(e))
+                processed += 1
+
+                if len(results) + len(skipped) >= self.checkpoint_every:
+                    self.dataset.append(results, skipped)
+                    results, skipped = {}, {}
+                self._update(processed=processed, entries=added, errors=errors)
+                if progress_callback:
+                    progress_callback(processed, len(pending))
+
+        if results or skipped:
+            self.dataset.append(results, skipped)
+        self._update(running=False, finished_at=time.time())
+        self.logger.info(f"Ingested {processed - errors} training files, {added} labelled elements")
+        if self.on_complete:
+            self.on_complete(self.dataset)
+        return added
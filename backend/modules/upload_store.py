@@ -0,0 +1,318 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+CHUNK_SIZE = 1024 * 1024
+READ_SIZE = 64 * 1024
+# Finished sessions still answer status requests and retried chunks for this long
+FINISHED_TTL = 3600
+# Unfinished sessions with no chunk written for this long are abandoned
+STALE_TTL = 24 * 3600
+
+
+class UploadError(Exception):
+    """
+    A client error in an upload request; status is the HTTP status to answer with
+    """
+
+    def __init__(self, message, status=400, **details):
+        super().__init__(message)
+        self.status = status
+        self.details = details
+
+
+class UploadStore:
+    """
+    Content-addressed store for training files with resumable uploads.
+
+    An upload session receives its bytes in order, in chunks of any size; each
+    chunk is streamed to a partial file in READ_SIZE pieces and hashed while it is
+    written, so memory stays flat. On completion the file is stored once under
+    objects/<sha256[:2]>/<sha256>; a duplicate is discarded instead of stored
+    again. index.json maps each digest to its size and the names it was uploaded as.
+    A finished session is kept for finished_ttl seconds, so a client that retries
+    the last chunk after a lost response gets the stored digest instead of a 404;
+    an unfinished one is dropped with its partial file after stale_ttl seconds
+    without a chunk.
+    """
+
+    def __init__(self, root=os.path.join('data', 'uploads'), chunk_size=CHUNK_SIZE, finished_ttl=FINISHED_TTL,
+                 stale_ttl=STALE_TTL):
+        self.logger = logging.getLogger(__name__)
+        self.root = root
+        self.chunk_size = chunk_size
+        self.finished_ttl = finished_ttl
+        self.stale_ttl = stale_ttl
+        self.objects_dir = os.path.join(root, 'objects')
+        self.sessions_dir = os.path.join(root, 'sessions')
+        self.index_path = os.path.join(root, 'index.json')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.sessions_dir, exist_ok=True)
+        self.index = {}
+        self._hashers = {}  # Upload id -> running sha256 of the bytes received so far
+        self._session_locks = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            if os.path.exists(self.index_path):
+                with open(self.index_path) as f:
+                    self.index = json.load(f)
+        except Exception as e:
+            self.logger.error(f"Error loading upload index: {str(e)}")
+
+    def _save_json(self, path, data):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def _session_path(self, upload_id):
+        return os.path.join(self.sessions_dir, upload_id + '.json')
+
+    def _part_path(self, upload_id):
+        return os.path.join(self.sessions_dir, upload_id + '.part')
+
+    def _load_session(self, upload_id):
+        if not upload_id or not all(c in '0123456789abcdef' for c in upload_id):
+            raise UploadError('Unknown upload', status=404)
+        try:
+            with open(self._session_path(upload_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise UploadError('Unknown upload', status=404)
+
+    def _session_lock(self, upload_id):
+        with self._lock:
+            return self._session_locks.setdefault(upload_id, threading.Lock())
+
+    def _find_session(self, key):
+        for entry in os.listdir(self.sessions_dir):
+            if entry.endswith('.json'):
+                try:
+                    with open(os.path.join(self.sessions_dir, entry)) as f:
+                        session = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                if session.get('key') == key:
+                    return session
+        return None
+
+    def _prune_sessions(self):
+        """
+        Forget finished sessions older than finished_ttl, and unfinished ones
+        (with their partial files) not written to for stale_ttl
+        """
+        now = time.time()
+        for entry in os.listdir(self.sessions_dir):
+            if not entry.endswith('.json'):
+                continue
+            path = os.path.join(self.sessions_dir, entry)
+            try:
+                with open(path) as f:
+                    session = json.load(f)
+                if session.get('digest') is not None:
+                    if session.get('finished_at', 0) < now - self.finished_ttl:
+                        os.remove(path)
+                        with self._lock:
+                            self._session_locks.pop(session['id'], None)
+                    continue
+                # The session file is rewritten after every chunk
+                if os.path.getmtime(path) >= now - self.stale_ttl:
+                    continue
+                lock = self._session_lock(session['id'])
+                if not lock.acquire(blocking=False):
+                    continue  # A chunk is being written right now
+                try:
+                    os.remove(path)
+                    if os.path.exists(self._part_path(session['id'])):
+                        os.remove(self._part_path(session['id']))
+                    self._hashers.pop(session['id'], None)
+                finally:
+                    lock.release()
+                with self._lock:
+                    self._session_locks.pop(session['id'], None)
+            except (OSError, ValueError):
+                continue
+
+    def _record(self, digest, size, filename):
+        with self._lock:
+            entry = self.index.setdefault(digest, {'size': size, 'names': [], 'stored_at': time.time()})
+            duplicate = bool(entry['names'])
+            if filename not in entry['names']:
+                entry['names'].append(filename)
+            self._save_json(self.index_path, self.index)
+        return duplicate
+
+    def objects(self):
+        """
+        (digest, path) of every stored file, in the order they were first stored
+        """
+        with self._lock:
+            entries = sorted(self.index.items(), key=lambda item: item[1]['stored_at'])
+        return [(digest, self.object_path(digest)) for digest, _ in entries]
+
+    def _public(self, session):
+        return {
+            'upload_id': session['id'],
+            'filename': session['filename'],
+            'size': session['size'],
+            'offset': session['offset'],
+            'chunk_size': self.chunk_size,
+            'complete': session.get('digest') is not None,
+            'digest': session.get('digest'),
+            'duplicate': session.get('duplicate', False)
+        }
+
+    def create(self, filename, size, key=None, sha256=None):
+        """
+        Start an upload, or resume the unfinished one with the same client key.
+        When the client already knows the file's sha256 and it is stored, the
+        upload completes immediately without sending any bytes.
+        """
+        filename = os.path.basename(str(filename or '')).strip()
+        if not filename:
+            raise UploadError('No filename provided')
+        try:
+            size = int(size)
+        except (TypeError, ValueError):
+            raise UploadError('Invalid size')
+        if size < 0:
+            raise UploadError('Invalid size')
+
+        if sha256 and sha256 in self.index and self.index[sha256]['size'] == size:
+            self._record(sha256, size, filename)
+            return {'upload_id': None, 'filename': filename, 'size': size, 'offset': size,
+                    'chunk_size': self.chunk_size, 'complete': True, 'digest': sha256, 'duplicate': True}
+
+        self._prune_sessions()
+        if key:
+            session = self._find_session(key)
+            if session and session['size'] == size:
+                return self._public(session)
+
+        session = {
+            'id': uuid.uuid4().hex,
+            'key': key,
+            'filename': filename,
+            'size': size,
+            'offset': 0,
+            'created_at': time.time(),
+            'digest': None
+        }
+        open(self._part_path(session['id']), 'wb').close()
+        self._save_json(self._session_path(session['id']), session)
+        if size == 0:
+            return self._finish(session, hashlib.sha256())
+        return self._public(session)
+
+    def status(self, upload_id):
+        return self._public(self._load_session(upload_id))
+
+    def _hasher(self, session):
+        """
+        Running hash of the received bytes; rebuilt from the partial file after a restart
+        """
+        hasher = self._hashers.get(session['id'])
+        if hasher is None:
+            hasher = hashlib.sha256()
+            with open(self._part_path(session['id']), 'rb') as f:
+                remaining = session['offset']
+                while remaining:
+                    data = f.read(min(READ_SIZE, remaining))
+                    if not data:
+                        break
+                    hasher.update(data)
+                    remaining -= len(data)
+            self._hashers[session['id']] = hasher
+        return hasher
+
+    def write(self, upload_id, offset, stream):
+        """
+        Append the bytes read from stream at offset, which must equal the number of
+        bytes already received. Returns the session status.
+        """
+        with self._session_lock(upload_id):
+            session = self._load_session(upload_id)
+            if session.get('digest') is not None:
+                return self._public(session)
+            if offset != session['offset']:
+                raise UploadError('Offset does not match the bytes received', status=409,
+                                  offset=session['offset'])
+
+            hasher = self._hasher(session)
+            received = session['offset']
+            limit = session['size']
+            try:
+                with open(self._part_path(upload_id), 'r+b') as f:
+                    # Drop any bytes past the last recorded offset (an interrupted chunk)
+                    f.truncate(received)
+                    f.seek(received)
+                    while True:
+                        data = stream.read(READ_SIZE)
+                        if not data:
+                            break
+                        if received + len(data) > limit:
+                            raise UploadError('More data than the declared size', status=413)
+                        f.write(data)
+                        hasher.update(data)
+                        received += len(data)
+            except Exception:
+                # The hash may include bytes that were not committed; rebuild it on resume
+                self._hashers.pop(upload_id, None)
+                raise
+            finally:
+                session['offset'] = received
+                self._save_json(self._session_path(upload_id), session)
+
+            if received == limit:
+                return self._finish(session, hasher)
+            return self._public(session)
+
+    def _finish(self, session, hasher):
+        digest = hasher.hexdigest()
+        part_path = self._part_path(session['id'])
+        target = self.object_path(digest)
+        if os.path.exists(target):
+            os.remove(part_path)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(part_path, target)
+        session['duplicate'] = self._record(digest, session['size'], session['filename'])
+        session['digest'] = digest
+        session['finished_at'] = time.time()
+        self._hashers.pop(session['id'], None)
+        # Kept so a retried last chunk is answered with the digest; pruned after finished_ttl
+        self._save_json(self._session_path(session['id']), session)
+        self.logger.info(f"Stored upload {session['filename']} as {digest}"
+                         f"{' (duplicate)' if session['duplicate'] else ''}")
+        return self._public(session)
+
+    def put_stream(self, filename, stream, size=None):
+        """
+        Store a whole stream in one call (single-request uploads)
+        """
+        upload_id = uuid.uuid4().hex
+        part_path = self._part_path(upload_id)
+        hasher = hashlib.sha256()
+        received = 0
+        with open(part_path, 'wb') as f:
+            while True:
+                data = stream.read(READ_SIZE)
+                if not data:
+                    break
+                f.write(data)
+                hasher.update(data)
+                received += len(data)
+        session = {'id': upload_id, 'filename': os.path.basename(filename), 'size': received,
+                   'offset': received, 'digest': None}
+        self._save_json(self._session_path(upload_id), session)
+        return self._finish(session, hasher)
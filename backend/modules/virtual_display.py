@@ -0,0 +1,152 @@
+import logging
+import os
+import shutil
+import subprocess
+import time
+from .input_backend import FakeInput, XTestInput
+from .screen_capture import FakeCapture, X11Capture
+
+
+class VirtualDisplay:
+    """
+    A screen plus the mouse and keyboard that drive it, for one pool worker.
+    start() makes it usable; capture_backend() and input_backend() build
+    backends bound to this display only.
+    """
+
+    name = 'base'
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def capture_backend(self):
+        raise NotImplementedError
+
+    def input_backend(self):
+        raise NotImplementedError
+
+    def describe(self):
+        return {'type': self.name}
+
+
+class XvfbDisplay(VirtualDisplay):
+    """
+    A headless X server (Xvfb) on display :number, optionally running an
+    application (e.g. Lightroom under Wine) with DISPLAY pointing at it.
+    Captured with X11Capture and driven with XTestInput on that display.
+    """
+
+    name = 'xvfb'
+
+    def __init__(self, number, size=(1920, 1080), depth=24, app_command=None, startup_timeout=10.0):
+        self.logger = logging.getLogger(__name__)
+        self.number = number
+        self.size = size
+        self.depth = depth
+        self.app_command = app_command
+        self.startup_timeout = startup_timeout
+        self.display_name = f":{number}"
+        self._server = None
+        self._app = None
+
+    def start(self):
+        if self._server is not None:
+            return
+        xvfb = shutil.which('Xvfb')
+        if xvfb is None:
+            raise RuntimeError('Xvfb is not installed')
+        width, height = self.size
+        self._server = subprocess.Popen(
+            [xvfb, self.display_name, '-screen', '0', f"{width}x{height}x{self.depth}", '-nolisten', 'tcp'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        # The server is ready once its socket exists
+        socket = f"/tmp/.X11-unix/X{self.number}"
+        deadline = time.monotonic() + self.startup_timeout
+        while not os.path.exists(socket):
+            if self._server.poll() is not None:
+                raise RuntimeError(f"Xvfb {self.display_name} exited with code {self._server.returncode}")
+            if time.monotonic() > deadline:
+                self.stop()
+                raise RuntimeError(f"Xvfb {self.display_name} did not start")
+            time.sleep(0.05)
+        if self.app_command:
+            self._app = subprocess.Popen(self.app_command, env=dict(os.environ, DISPLAY=self.display_name))
+        self.logger.info(f"Started virtual display {self.display_name}")
+
+    def stop(self):
+        for process in (self._app, self._server):
+            if process is not None and process.poll() is None:
+                process.terminate()
+                try:
+                    process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+        self._app = self._server = None
+
+    def capture_backend(self):
+        return X11Capture(display_name=self.display_name)
+
+    def input_backend(self):
+        return XTestInput(display_name=self.display_name)
+
+    def describe(self):
+        return {'type': self.name, 'display': self.display_name, 'size': list(self.size),
+                'running': self._server is not None and self._server.poll() is None}
+
+
+class FakeDisplay(VirtualDisplay):
+    """
+    In-process display for tests and benchmarks. With a screen factory (a
+    callable returning an object with capture and input, such as the
+    benchmarks' SyntheticLightroom) each display gets its own simulated UI;
+    otherwise it serves the given frames and only records input.
+    """
+
+    name = 'fake'
+
+    def __init__(self, number=0, screen_factory=None, frames=None):
+        self.number = number
+        self.screen_factory = screen_factory
+        self.frames = frames
+        self.screen = None
+        self._capture = None
+        self._input = None
+
+    def start(self):
+        if self.screen_factory is not None and self.screen is None:
+            self.screen = self.screen_factory()
+
+    def capture_backend(self):
+        if self.screen is not None:
+            return self.screen.capture
+        if self._capture is None:
+            self._capture = FakeCapture(self.frames)
+        return self._capture
+
+    def input_backend(self):
+        if self.screen is not None:
+            return self.screen.input
+        if self._input is None:
+            self._input = FakeInput()
+        return self._input
+
+    def describe(self):
+        return {'type': self.name, 'display': f"fake:{self.number}"}
+
+
+def create_displays(spec, first_number=99, app_command=None, **kwargs):
+    """
+    Displays from a spec such as 'xvfb:4' or 'fake:2'. app_command is started
+    on each Xvfb display; fake displays have no application.
+    """
+    kind, _, count = spec.partition(':')
+    count = int(count or 1)
+    if kind == 'xvfb':
+        return [XvfbDisplay(first_number + index, app_command=app_command, **kwargs) for index in range(count)]
+    if kind == 'fake':
+        return [FakeDisplay(index, **kwargs) for index in range(count)]
+    raise ValueError(f"Unknown display type '{kind}'")
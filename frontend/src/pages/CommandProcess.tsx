@@ -16,6 +16,21 @@ interface CommandResponse {
   error?: string;
 }
 
+interface JobStatus {
+  job_id: string;
+  status: 'queued' | 'running' | 'superseded' | 'succeeded' | 'failed';
+  progress: number;
+  message: string;
+  result?: CommandResponse;
+  error?: string;
+  queue_position?: number;
+}
+
+const API_URL = 'http://localhost:5000/api';
+const POLL_INTERVAL_MS = 500;
+
+const sleep = (ms: number) => new Promise(resolve => setTimeout(resolve, ms));
+
 const CommandProcess: React.FC = () => {
   const [messages, setMessages] = useState<Message[]>([]);
   const [inputValue, setInputValue] = useState('');
@@ -45,30 +60,51 @@ const CommandProcess: React.FC = () => {
     setInputValue('');
     setIsProcessing(true);
 
+    const systemMessageId = Date.now() + 1;
+    const updateSystemMessage = (text: string, status?: 'success' | 'error') => {
+      setMessages(prev => {
+        const message: Message = {
+          id: systemMessageId,
+          text,
+          type: 'system',
+          status,
+          timestamp: new Date()
+        };
+        return prev.some(m => m.id === systemMessageId)
+          ? prev.map(m => (m.id === systemMessageId ? message : m))
+          : [...prev, message];
+      });
+    };
+
     try {
-      const response = await axios.post<CommandResponse>('http://localhost:5000/api/command', {
+      // Submit as a job and poll for progress instead of holding the request open
+      const submitted = await axios.post<JobStatus>(`${API_URL}/jobs`, {
         command: inputValue
       });
-
-      const systemMessage: Message = {
-        id: Date.now() + 1,
-        text: response.data.message || response.data.error || 'Command processed successfully',
-        type: 'system',
-        status: response.data.success ? 'success' : 'error',
-        timestamp: new Date()
-      };
-
-      setMessages(prev => [...prev, systemMessage]);
+      updateSystemMessage('Queued...');
+
+      let job = submitted.data;
+      // A superseded job finishes with the outcome of the job it was merged into
+      while (job.status === 'queued' || job.status === 'running' || job.status === 'superseded') {
+        await sleep(POLL_INTERVAL_MS);
+        const response = await axios.get<JobStatus>(`${API_URL}/jobs/${submitted.data.job_id}`);
+        job = response.data;
+        if (job.status === 'queued') {
+          updateSystemMessage(`Queued (position ${(job.queue_position ?? 0) + 1})...`);
+        } else if (job.status === 'running') {
+          updateSystemMessage(`${job.message} (${Math.round(job.progress * 100)}%)`);
+        } else if (job.status === 'superseded') {
+          updateSystemMessage('Merged into a later adjustment...');
+        }
+      }
+
+      const result = job.result;
+      updateSystemMessage(
+        result?.message || result?.error || job.error || 'Command processed successfully',
+        job.status === 'succeeded' ? 'success' : 'error'
+      );
     } catch (error) {
-      const errorMessage: Message = {
-        id: Date.now() + 1,
-        text: 'Failed to process command. Please try again.',
-        type: 'system',
-        status: 'error',
-        timestamp: new Date()
-      };
-
-      setMessages(prev => [...prev, errorMessage]);
+      updateSystemMessage('Failed to process command. Please try again.', 'error');
     } finally {
       setIsProcessing(false);
     }
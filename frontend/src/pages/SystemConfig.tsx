@@ -1,12 +1,70 @@
 import React, { useState, useEffect } from 'react';
 import axios from 'axios';
 
+interface HistogramSummary {
+  name: string;
+  labels: Record<string, string>;
+  count: number;
+  mean_ms: number;
+  p50_ms: number;
+  p95_ms: number;
+}
+
+interface CounterValue {
+  name: string;
+  labels: Record<string, string>;
+  value: number;
+}
+
 interface SystemConfig {
   status: string;
-  lightroom_connected: boolean;
-  ocr_status: boolean;
+  // null until the background health check has run once
+  lightroom_connected: boolean | null;
+  ocr_status: boolean | null;
+  // Present once the controller has been built
+  ocr_config?: {
+    engine: string;
+    incremental: boolean;
+    text_regions: boolean;
+  };
+  metrics?: {
+    histograms: HistogramSummary[];
+    counters: CounterValue[];
+  };
 }
 
+const STAGE_ORDER = ['capture', 'gray', 'preprocess', 'tesseract', 'match', 'template', 'input', 'settle', 'sleep'];
+
+const statusColor = (ok: boolean | null | undefined) =>
+  ok == null ? 'bg-yellow-400' : ok ? 'bg-green-500' : 'bg-red-500';
+
+const formatMs = (value: number) => (value >= 100 ? value.toFixed(0) : value.toFixed(1));
+
+const TimingTable: React.FC<{ rows: { name: string; summary: HistogramSummary; extra?: string }[] }> = ({ rows }) => (
+  <table className="w-full text-sm">
+    <thead>
+      <tr className="text-left text-gray-500">
+        <th className="pr-2">Name</th>
+        <th className="pr-2 text-right">Count</th>
+        <th className="pr-2 text-right">Mean ms</th>
+        <th className="pr-2 text-right">p95 ms</th>
+        {rows.some((row) => row.extra) && <th className="text-right">OK / Fail</th>}
+      </tr>
+    </thead>
+    <tbody>
+      {rows.map(({ name, summary, extra }) => (
+        <tr key={name}>
+          <td className="pr-2">{name}</td>
+          <td className="pr-2 text-right">{summary.count}</td>
+          <td className="pr-2 text-right">{formatMs(summary.mean_ms)}</td>
+          <td className="pr-2 text-right">&le; {formatMs(summary.p95_ms)}</td>
+          {extra !== undefined && <td className="text-right">{extra}</td>}
+        </tr>
+      ))}
+    </tbody>
+  </table>
+);
+
 const SystemConfig: React.FC = () => {
   const [config, setConfig] = useState<SystemConfig | null>(null);
   const [loading, setLoading] = useState(true);
@@ -26,6 +84,16 @@ const SystemConfig: React.FC = () => {
     }
   };
 
+  const updateOcrSetting = async (key: string, value: boolean) => {
+    try {
+      await axios.post('http://localhost:5000/api/config', { [key]: value });
+      await fetchConfig();
+    } catch (err) {
+      setError('Failed to update OCR settings');
+      console.error('Error updating config:', err);
+    }
+  };
+
   useEffect(() => {
     fetchConfig();
     // Poll for updates every 30 seconds
@@ -33,6 +101,28 @@ const SystemConfig: React.FC = () => {
     return () => clearInterval(interval);
   }, []);
 
+  const histograms = config?.metrics?.histograms ?? [];
+  const counters = config?.metrics?.counters ?? [];
+  const stageRows = histograms
+    .filter((h) => h.name === 'lightroom_stage_seconds')
+    .sort((a, b) => STAGE_ORDER.indexOf(a.labels.stage) - STAGE_ORDER.indexOf(b.labels.stage))
+    .map((h) => ({ name: h.labels.stage, summary: h }));
+  const commandCount = (command: string, status: string) =>
+    counters.find((c) => c.name === 'lightroom_commands_total' && c.labels.command === command && c.labels.status === status)?.value ?? 0;
+  const commandRows = histograms
+    .filter((h) => h.name === 'lightroom_command_seconds')
+    .map((h) => ({
+      name: h.labels.command,
+      summary: h,
+      extra: `${commandCount(h.labels.command, 'success')} / ${commandCount(h.labels.command, 'failure') + commandCount(h.labels.command, 'error')}`
+    }));
+  const lookupSources = counters
+    .filter((c) => c.name === 'lightroom_element_lookups_total')
+    .reduce<Record<string, number>>((totals, c) => {
+      totals[c.labels.source] = (totals[c.labels.source] ?? 0) + c.value;
+      return totals;
+    }, {});
+
   if (loading) {
     return (
       <div className="min-h-screen bg-gray-100 py-6 flex flex-col justify-center sm:py-12">
@@ -81,8 +171,8 @@ const SystemConfig: React.FC = () => {
                 <div className="mb-6">
                   <h3 className="text-xl font-semibold mb-2">Lightroom Connection</h3>
                   <div className="flex items-center">
-                    <div className={`h-3 w-3 rounded-full mr-2 ${config?.lightroom_connected ? 'bg-green-500' : 'bg-red-500'}`}></div>
-                    <span>{config?.lightroom_connected ? 'Connected' : 'Disconnected'}</span>
+                    <div className={`h-3 w-3 rounded-full mr-2 ${statusColor(config?.lightroom_connected)}`}></div>
+                    <span>{config?.lightroom_connected == null ? 'Checking...' : config?.lightroom_connected ? 'Connected' : 'Disconnected'}</span>
                   </div>
                 </div>
 
@@ -90,11 +180,60 @@ const SystemConfig: React.FC = () => {
                 <div className="mb-6">
                   <h3 className="text-xl font-semibold mb-2">OCR System</h3>
                   <div className="flex items-center">
-                    <div className={`h-3 w-3 rounded-full mr-2 ${config?.ocr_status ? 'bg-green-500' : 'bg-red-500'}`}></div>
-                    <span>{config?.ocr_status ? 'Operational' : 'Not Working'}</span>
+                    <div className={`h-3 w-3 rounded-full mr-2 ${statusColor(config?.ocr_status)}`}></div>
+                    <span>{config?.ocr_status == null ? 'Checking...' : config?.ocr_status ? 'Operational' : 'Not Working'}</span>
                   </div>
+                  {config?.ocr_config && (
+                    <div className="mt-2 text-sm space-y-1">
+                      <div>Engine: {config.ocr_config.engine}</div>
+                      <label className="flex items-center">
+                        <input
+                          type="checkbox"
+                          className="mr-2"
+                          checked={config.ocr_config.incremental}
+                          onChange={(e) => updateOcrSetting('incremental', e.target.checked)}
+                        />
+                        Incremental OCR (re-read only changed tiles)
+                      </label>
+                      <label className="flex items-center">
+                        <input
+                          type="checkbox"
+                          className="mr-2"
+                          checked={config.ocr_config.text_regions}
+                          onChange={(e) => updateOcrSetting('text_regions', e.target.checked)}
+                        />
+                        Text regions (OCR only detected text boxes)
+                      </label>
+                    </div>
+                  )}
                 </div>
 
+                {/* Hot-path timings */}
+                {stageRows.length > 0 && (
+                  <div className="mb-6">
+                    <h3 className="text-xl font-semibold mb-2">Stage Timings</h3>
+                    <TimingTable rows={stageRows} />
+                  </div>
+                )}
+
+                {commandRows.length > 0 && (
+                  <div className="mb-6">
+                    <h3 className="text-xl font-semibold mb-2">Command Timings</h3>
+                    <TimingTable rows={commandRows} />
+                  </div>
+                )}
+
+                {Object.keys(lookupSources).length > 0 && (
+                  <div className="mb-6">
+                    <h3 className="text-xl font-semibold mb-2">Element Lookups</h3>
+                    <div className="text-sm">
+                      {Object.entries(lookupSources).map(([source, count]) => (
+                        <span key={source} className="mr-4">{source}: {count}</span>
+                      ))}
+                    </div>
+                  </div>
+                )}
+
                 {/* Refresh Button */}
                 <div className="mt-8">
                   <button
@@ -1,17 +1,81 @@
-import React, { useState, useRef } from 'react';
+import React, { useState, useRef, useEffect } from 'react';
 import axios from 'axios';
 
 interface UploadStatus {
+  key: string;
   file: string;
   status: 'pending' | 'uploading' | 'success' | 'error';
   progress: number;
   error?: string;
+  duplicate?: boolean;
 }
 
+interface UploadSession {
+  upload_id: string | null;
+  offset: number;
+  size: number;
+  chunk_size: number;
+  complete: boolean;
+  duplicate: boolean;
+}
+
+interface IngestStatus {
+  running: boolean;
+  processed: number;
+  total: number;
+  entries: number;
+  errors: number;
+  last_error: string | null;
+  files: number;
+  dataset_entries: number;
+}
+
+const API_URL = 'http://localhost:5000/api';
+const MAX_RETRIES = 3;
+
+// Identifies a file across page reloads so the server can resume its upload
+const uploadKey = (file: File) => `${file.name}:${file.size}:${file.lastModified}`;
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
+
 const Training: React.FC = () => {
   const [dragActive, setDragActive] = useState(false);
   const [uploads, setUploads] = useState<UploadStatus[]>([]);
   const fileInputRef = useRef<HTMLInputElement>(null);
+  // Files by upload key, kept so interrupted uploads can be resumed
+  const filesRef = useRef<Record<string, File>>({});
+  const [ingest, setIngest] = useState<IngestStatus | null>(null);
+
+  const fetchIngest = async () => {
+    try {
+      const response = await axios.get<IngestStatus>(`${API_URL}/training/ingest`);
+      setIngest(response.data);
+    } catch (error) {
+      console.error('Error fetching ingestion status:', error);
+    }
+  };
+
+  const startIngest = async () => {
+    try {
+      const response = await axios.post<IngestStatus>(`${API_URL}/training/ingest`);
+      setIngest(response.data);
+    } catch (error) {
+      console.error('Error starting ingestion:', error);
+    }
+  };
+
+  useEffect(() => {
+    fetchIngest();
+    // Uploads start ingestion on the server; poll faster while it runs
+    const interval = setInterval(fetchIngest, ingest?.running ? 2000 : 10000);
+    return () => clearInterval(interval);
+  }, [ingest?.running]);
+
+  const updateUpload = (key: string, changes: Partial<UploadStatus>) => {
+    setUploads(prev => prev.map(upload =>
+      upload.key === key ? { ...upload, ...changes } : upload
+    ));
+  };
 
   const handleDrag = (e: React.DragEvent) => {
     e.preventDefault();
@@ -39,54 +103,72 @@ const Training: React.FC = () => {
     }
   };
 
+  const uploadFile = async (file: File) => {
+    const key = uploadKey(file);
+    updateUpload(key, { status: 'uploading', error: undefined });
+    try {
+      // Starts a new upload or returns how far an earlier attempt got
+      let { data: session } = await axios.post<UploadSession>(`${API_URL}/training/uploads`, {
+        filename: file.name,
+        size: file.size,
+        key
+      });
+      let offset = session.offset;
+      let retries = 0;
+
+      while (!session.complete) {
+        updateUpload(key, { progress: Math.round((offset * 100) / (file.size || 1)) });
+        const chunk = file.slice(offset, offset + session.chunk_size);
+        try {
+          const response = await axios.put<UploadSession>(
+            `${API_URL}/training/uploads/${session.upload_id}?offset=${offset}`,
+            chunk,
+            { headers: { 'Content-Type': 'application/octet-stream' } }
+          );
+          session = response.data;
+          offset = session.offset;
+          retries = 0;
+        } catch (error) {
+          if (!axios.isAxiosError(error) || retries >= MAX_RETRIES) {
+            throw error;
+          }
+          retries += 1;
+          if (error.response?.status === 409 && typeof error.response.data?.offset === 'number') {
+            // The server has a different offset; continue from there
+            offset = error.response.data.offset;
+          } else {
+            await sleep(500 * 2 ** retries);
+            const status = await axios.get<UploadSession>(`${API_URL}/training/uploads/${session.upload_id}`);
+            offset = status.data.offset;
+          }
+        }
+      }
+
+      updateUpload(key, { status: 'success', progress: 100, duplicate: session.duplicate });
+    } catch (error) {
+      updateUpload(key, {
+        status: 'error',
+        error: error instanceof Error ? error.message : 'Upload failed'
+      });
+    }
+  };
+
   const handleFiles = async (files: File[]) => {
+    // Re-adding a file replaces its entry; the server resumes it from its key
     const newUploads = files.map(file => ({
+      key: uploadKey(file),
       file: file.name,
       status: 'pending' as const,
       progress: 0
     }));
+    files.forEach(file => {
+      filesRef.current[uploadKey(file)] = file;
+    });
 
-    setUploads(prev => [...prev, ...newUploads]);
-
-    for (let i = 0; i < files.length; i++) {
-      const file = files[i];
-      const formData = new FormData();
-      formData.append('file', file);
-
-      try {
-        setUploads(prev => prev.map(upload => 
-          upload.file === file.name 
-            ? { ...upload, status: 'uploading' }
-            : upload
-        ));
-
-        const response = await axios.post('http://localhost:5000/api/training/upload', formData, {
-          onUploadProgress: (progressEvent) => {
-            const progress = Math.round((progressEvent.loaded * 100) / (progressEvent.total || 100));
-            setUploads(prev => prev.map(upload => 
-              upload.file === file.name 
-                ? { ...upload, progress }
-                : upload
-            ));
-          }
-        });
-
-        setUploads(prev => prev.map(upload => 
-          upload.file === file.name 
-            ? { ...upload, status: 'success', progress: 100 }
-            : upload
-        ));
-      } catch (error) {
-        setUploads(prev => prev.map(upload => 
-          upload.file === file.name 
-            ? { 
-                ...upload, 
-                status: 'error', 
-                error: error instanceof Error ? error.message : 'Upload failed'
-              }
-            : upload
-        ));
-      }
+    setUploads(prev => [...prev.filter(upload => !files.some(file => uploadKey(file) === upload.key)), ...newUploads]);
+
+    for (const file of files) {
+      await uploadFile(file);
     }
   };
 
@@ -141,8 +223,8 @@ const Training: React.FC = () => {
                   <div className="mt-8">
                     <h3 className="text-xl font-semibold mb-4">Uploads</h3>
                     <div className="space-y-4">
-                      {uploads.map((upload, index) => (
-                        <div key={index} className="bg-gray-50 rounded-lg p-4">
+                      {uploads.map((upload) => (
+                        <div key={upload.key} className="bg-gray-50 rounded-lg p-4">
                           <div className="flex items-center justify-between mb-2">
                             <span className="font-medium truncate">{upload.file}</span>
                             <span className={`text-sm ${
@@ -172,7 +254,19 @@ const Training: React.FC = () => {
                           </div>
 
                           {upload.error && (
-                            <p className="text-sm text-red-500 mt-2">{upload.error}</p>
+                            <div className="flex items-center justify-between mt-2">
+                              <p className="text-sm text-red-500">{upload.error}</p>
+                              <button
+                                onClick={() => uploadFile(filesRef.current[upload.key])}
+                                className="text-sm text-blue-500 hover:text-blue-600"
+                              >
+                                Resume
+                              </button>
+                            </div>
+                          )}
+
+                          {upload.duplicate && (
+                            <p className="text-sm text-gray-500 mt-2">Already in the training set; stored once</p>
                           )}
                         </div>
                       ))}
@@ -180,6 +274,43 @@ const Training: React.FC = () => {
                   </div>
                 )}
 
+                {/* Dataset */}
+                {ingest && (
+                  <div className="mt-8 bg-gray-50 rounded-lg p-4">
+                    <div className="flex items-center justify-between mb-2">
+                      <h3 className="text-xl font-semibold">Dataset</h3>
+                      <button
+                        onClick={startIngest}
+                        disabled={ingest.running}
+                        className="text-sm text-blue-500 hover:text-blue-600 disabled:text-gray-400"
+                      >
+                        Process new files
+                      </button>
+                    </div>
+                    <p className="text-sm text-gray-600">
+                      {ingest.dataset_entries} labelled elements from {ingest.files} files
+                    </p>
+                    {ingest.running && (
+                      <div className="mt-2">
+                        <p className="text-sm text-blue-500">
+                          Processing {ingest.processed} of {ingest.total} files
+                        </p>
+                        <div className="w-full bg-gray-200 rounded-full h-2 mt-1">
+                          <div
+                            className="h-2 rounded-full bg-blue-500"
+                            style={{ width: `${ingest.total ? (ingest.processed * 100) / ingest.total : 0}%` }}
+                          ></div>
+                        </div>
+                      </div>
+                    )}
+                    {ingest.errors > 0 && (
+                      <p className="text-sm text-red-500 mt-2">
+                        {ingest.errors} files failed and will be retried: {ingest.last_error}
+                      </p>
+                    )}
+                  </div>
+                )}
+
                 {/* Instructions */}
                 <div className="mt-8 bg-gray-50 rounded-lg p-4">
                   <h4 className="font-semibold mb-2">Training Guidelines</h4>
@@ -187,7 +318,7 @@ const Training: React.FC = () => {
                     <li>Upload high-quality images or videos for better training results</li>
                     <li>Include a variety of lighting conditions and subjects</li>
                     <li>Ensure files are in supported formats (JPG, PNG for images; MP4 for videos)</li>
-                    <li>Maximum file size: 50MB per file</li>
+                    <li>Interrupted uploads resume where they stopped when the same file is added again</li>
                   </ul>
                 </div>
               </div>